@@ -1,69 +1,444 @@
+import importlib
+import os
+import sqlite3
 import sys
 import time
-import requests
+from collections import deque
+from functools import partial
 
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSettings, QSize
+from PyQt5.QtCore import (Qt, QObject, QThread, QTimer, pyqtSignal, QSettings, QSize, QAbstractListModel,
+                          QModelIndex)
 from PyQt5.QtGui import QClipboard, QPalette, QColor, QFont
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                             QLineEdit, QPushButton, QTextEdit, QFileDialog, QAction,
+                             QLineEdit, QPushButton, QPlainTextEdit, QFileDialog, QAction, QMenu,
                              QMessageBox, QCheckBox, QGroupBox, QGridLayout, QStatusBar, QProgressBar,
-                             QDialog, QDialogButtonBox, QFormLayout, QSplitter, QToolBar, QStyle)
-
-
-class RequestThread(QThread):
-    finished_signal = pyqtSignal(object, float)  # 用于传递响应结果或异常和请求耗时
+                             QDialog, QDialogButtonBox, QFormLayout, QSplitter, QToolBar, QStyle,
+                             QSpinBox, QDoubleSpinBox, QComboBox, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+                             QListView, QStyledItemDelegate)
+
+from transcriber import cache, defaults, jobstore, subtitles, timing
+
+
+class LazyModule:
+    """首次访问属性时才导入的模块。
+
+    转录流程依赖的 requests、aiohttp、numpy 等在第一次提交任务、开始实时转录或打开首选项时才加载，
+    主窗口不必等待它们导入即可显示。
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+accounts = LazyModule("transcriber.accounts")
+async_engine = LazyModule("transcriber.async_engine")
+chunking = LazyModule("transcriber.chunking")
+core = LazyModule("transcriber.core")
+dedup = LazyModule("transcriber.dedup")
+live = LazyModule("transcriber.live")
+preprocess = LazyModule("transcriber.preprocess")
+scheduler = LazyModule("transcriber.scheduler")
+transport = LazyModule("transcriber.transport")
+vad = LazyModule("transcriber.vad")
+
+
+# 同时进行中的请求数上限，避免超出API的速率限制
+DEFAULT_MAX_WORKERS = 3
+MAX_WORKERS_LIMIT = 16
+
+DEFAULT_CACHE_MAX_MB = 64
+
+# 传输引擎：每个任务一个线程（requests），或所有任务共用一个事件循环线程（asyncio + aiohttp）
+ENGINE_THREADS = "threads"
+ENGINE_ASYNC = "asyncio"
+ASYNC_CONNECTIONS_LIMIT = 1000
+
+# 任务状态
+STATUS_PENDING = "等待"
+STATUS_RUNNING = "进行中"
+STATUS_DONE = "完成"
+STATUS_CACHED = "完成（缓存）"
+STATUS_FAILED = "失败"
+STATUS_CANCELLED = "已取消"
+STATUS_DUPLICATE = "重复"
+
+
+# 任务在持久化任务数据库中的 ID 保存在队列表格第一列的这个角色中
+JOB_ID_ROLE = Qt.UserRole + 1
+
+# 上传进度信号的最小发送间隔（秒），避免大量信号阻塞界面线程
+PROGRESS_INTERVAL = 0.1
+# 关闭窗口时等待进行中的任务取消并结束的最长时间（秒）
+CLOSE_TIMEOUT = 3.0
+
+# 结果列表中单个条目的最大字数，长文本在句末切分为多个条目，视图只为可见条目排版
+RESULT_SEGMENT_CHARS = 1000
+# 每轮事件循环插入的条目数，以及视图每轮排版的条目数，避免一次处理大量条目阻塞界面
+RESULT_APPEND_BATCH = 200
+RESULT_LAYOUT_BATCH = 20
+SENTENCE_ENDINGS = "。！？；!?;.\n"
+
+# 深色与浅色主题的调色板与样式表颜色，调色板与样式表按主题只生成一次（见 theme_resources()）
+THEME_PALETTES = {
+    True: {
+        QPalette.Window: (53, 53, 53),
+        QPalette.WindowText: Qt.white,
+        QPalette.Base: (35, 35, 35),
+        QPalette.AlternateBase: (53, 53, 53),
+        QPalette.ToolTipBase: Qt.white,
+        QPalette.ToolTipText: Qt.white,
+        QPalette.Text: Qt.white,
+        QPalette.Button: (53, 53, 53),
+        QPalette.ButtonText: Qt.white,
+        QPalette.BrightText: Qt.red,
+        QPalette.Link: (42, 130, 218),
+        QPalette.Highlight: (42, 130, 218),
+        QPalette.HighlightedText: Qt.black,
+    },
+    False: {
+        QPalette.Window: (240, 240, 240),
+        QPalette.WindowText: Qt.black,
+        QPalette.Base: (255, 255, 255),
+        QPalette.AlternateBase: (240, 240, 240),
+        QPalette.ToolTipBase: Qt.white,
+        QPalette.ToolTipText: Qt.black,
+        QPalette.Text: Qt.black,
+        QPalette.Button: (240, 240, 240),
+        QPalette.ButtonText: Qt.black,
+        QPalette.BrightText: Qt.red,
+        QPalette.Link: (42, 130, 218),
+        QPalette.Highlight: (42, 130, 218),
+        QPalette.HighlightedText: Qt.white,
+    },
+}
+THEME_COLORS = {
+    True: {"border": "#444", "button": "#444", "button_hover": "#555", "edit_border": "#555",
+           "edit_background": "#333", "selection": "#666", "list_background": "#222", "label": ""},
+    False: {"border": "#aaa", "button": "#ddd", "button_hover": "#ccc", "edit_border": "#aaa",
+            "edit_background": "#fff", "selection": "#3399ff", "list_background": "#fff", "label": "color: #000;"},
+}
+STYLESHEET_TEMPLATE = """
+    QGroupBox {{
+        font-weight: bold;
+        border: 1px solid {border};
+        border-radius: 5px;
+        margin-top: 10px;
+        font-size: 14px;
+    }}
+    QGroupBox:title {{
+        subcontrol-origin: margin;
+        subcontrol-position: top center;
+        padding: 5px;
+    }}
+    QPushButton {{
+        padding: 8px 16px;
+        border-radius: 4px;
+        background-color: {button};
+        font-size: 13px;
+    }}
+    QPushButton:hover {{
+        background-color: {button_hover};
+    }}
+    QLineEdit {{
+        border: 1px solid {edit_border};
+        border-radius: 3px;
+        padding: 6px;
+        background: {edit_background};
+        selection-background-color: {selection};
+        font-size: 13px;
+    }}
+    QListView {{
+        border: 1px solid {edit_border};
+        border-radius: 4px;
+        background: {list_background};
+        selection-background-color: {selection};
+        font-size: 16px;
+    }}
+    QCheckBox, QLabel {{
+        font-size: 13px;
+        {label}
+    }}
+"""
+_theme_cache = {}
+
+
+def theme_resources(dark):
+    """返回主题的 (调色板, 样式表)，首次使用时生成并缓存，切换主题时不再重复构造。"""
+    if dark not in _theme_cache:
+        palette = QPalette()
+        for role, color in THEME_PALETTES[dark].items():
+            palette.setColor(role, QColor(*color) if isinstance(color, tuple) else color)
+        # 去掉缩进与空行，缩短 Qt 每次解析样式表的输入
+        lines = (line.strip() for line in STYLESHEET_TEMPLATE.format(**THEME_COLORS[dark]).splitlines())
+        _theme_cache[dark] = (palette, "\n".join(line for line in lines if line))
+    return _theme_cache[dark]
+
+
+def split_segments(text, max_chars=RESULT_SEGMENT_CHARS):
+    """把长文本尽量在句末标点处切分为不超过 max_chars 字的片段，片段直接相连即为原文。"""
+    segments = []
+    start = 0
+    while len(text) - start > max_chars:
+        end = start + max_chars
+        cut = max(text.rfind(char, start + max_chars // 2, end) for char in SENTENCE_ENDINGS)
+        cut = cut + 1 if cut >= 0 else end
+        segments.append(text[start:cut])
+        start = cut
+    segments.append(text[start:])
+    return segments
+
+
+class ResultModel(QAbstractListModel):
+    """转录结果列表，每个文件（长文本则为文件中的一段）对应一个条目。
+
+    追加的条目先进入队列，由定时器分批插入；复制与导出通过 iter_text() 逐条读取，不拼接整段文本。
+    每个文件带时间戳的分段（subtitles.from_response() 的结果）保存在该文件的第一个条目中，供导出字幕。
+    实时转录的后续分段以 continued=True 追加，与前面的条目同属一个文件，分段列表由调用方在原处扩充。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # [文件名, 文本, 是否为该文件的第一段, 分段]，单个任务时文件名为 None，分段只保存在第一段中
+        self.entries = []
+        self.queue = deque()
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.insert_batch)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name, text, first, _ = self.entries[index.row()]
+        if role == Qt.DisplayRole:
+            return f"【{name}】\n{text}" if first and name else text
+        if role == Qt.EditRole:
+            return text
+        if role == Qt.ToolTipRole:
+            return name
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        return flags | Qt.ItemIsEditable if index.isValid() else flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        self.entries[index.row()][1] = value
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def append_text(self, name, text, segments=None, continued=False):
+        self.queue.extend([name, piece, i == 0 and not continued, segments if i == 0 and not continued else None]
+                          for i, piece in enumerate(split_segments(text)))
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def insert_batch(self):
+        count = min(RESULT_APPEND_BATCH, len(self.queue))
+        if count:
+            start = len(self.entries)
+            self.beginInsertRows(QModelIndex(), start, start + count - 1)
+            self.entries.extend(self.queue.popleft() for _ in range(count))
+            self.endInsertRows()
+        if not self.queue:
+            self.timer.stop()
+
+    def clear(self):
+        self.beginResetModel()
+        self.entries = []
+        self.queue.clear()
+        self.timer.stop()
+        self.endResetModel()
+
+    def is_empty(self):
+        return not self.entries and not self.queue
+
+    def iter_text(self, rows=None):
+        """按条目生成纯文本（含尚未插入的条目），格式与逐个追加的文本一致。rows 为要导出的行号。"""
+        entries = self.entries + list(self.queue) if rows is None else [self.entries[row] for row in rows]
+        for i, (name, text, first, _) in enumerate(entries):
+            if first and i:
+                yield "\n\n"
+            if first and name:
+                yield f"【{name}】\n"
+            yield text
+
+    def iter_segments(self):
+        """为每个带分段的文件生成 (文件名, 分段)，取消或失败的任务没有分段。
+
+        只有一个不带时间戳的分段时使用列表中（可能已编辑过）的文本，识别出的多个分段按原样导出。
+        """
+        entries = self.entries + list(self.queue)
+        for i, (name, _, first, segments) in enumerate(entries):
+            if not first or not segments:
+                continue
+            if len(segments) == 1:
+                end = i + 1
+                while end < len(entries) and not entries[end][2]:
+                    end += 1
+                text = "".join(entry[1] for entry in entries[i:end]).strip()
+                segments = [(segments[0][0], segments[0][1], text)] if text else []
+            yield name, segments
+
+    def segment_file_count(self):
+        return sum(1 for entry in self.entries + list(self.queue) if entry[2] and entry[3])
+
+
+class ResultDelegate(QStyledItemDelegate):
+    """用多行文本框编辑结果条目。"""
+
+    def createEditor(self, parent, option, index):
+        return QPlainTextEdit(parent)
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.toPlainText(), Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+
+class JobReporter:
+    """RequestThread 与 AsyncRequest 共用的进度与重试报告，在工作线程中调用。"""
+    last_progress_time = 0.0
+
+    def report_progress(self, sent, total):
+        now = time.time()
+        if sent >= total or now - self.last_progress_time >= PROGRESS_INTERVAL:
+            self.last_progress_time = now
+            self.progress_signal.emit(sent, total)
+
+    def report_retry(self, stats):
+        self.retry_signal.emit(stats.retries, stats.throttle_seconds)
+
+
+class RequestThread(QThread, JobReporter):
+    finished_signal = pyqtSignal(object, float)  # 用于传递TranscriptionResult或异常和请求耗时
+    progress_signal = pyqtSignal(object, object)  # 已上传字节数与总字节数（可能超过2GB，不用int）
+    retry_signal = pyqtSignal(int, float)  # 重试次数与因限流、退避等待的总时长
     running = True
 
-    def __init__(self, token, model_name, file_path, parent=None):
+    def __init__(self, token, model_name, file_path, parent=None, options=None):
         super().__init__(parent)
         self.token = token
         self.model_name = model_name
         self.file_path = file_path
+        self.options = options
+        self.cancel_token = core.CancelToken()
 
     def run(self):
-        url = "https://api.siliconflow.cn/v1/audio/transcriptions"
-        headers = {
-            "Authorization": f"Bearer {self.token}"
-        }
-
         start_time = time.time()
         try:
-            with open(self.file_path, 'rb') as f:
-                files = {
-                    'file': f
-                }
-                data = {
-                    'model': self.model_name
-                }
-
-                if not self.running:
-                    self.finished_signal.emit(None, 0)
-                    return
-
-                response = requests.post(url, headers=headers, files=files, data=data, timeout=60)
-                elapsed = time.time() - start_time
-                if self.running:
-                    self.finished_signal.emit(response, elapsed)
-                else:
-                    self.finished_signal.emit(None, 0)
-        except Exception as e:
+            result = core.transcribe_file(self.token, self.model_name, self.file_path,
+                                          self.options, self.cancel_token, self.report_progress, self.report_retry)
             elapsed = time.time() - start_time
             if self.running:
+                self.finished_signal.emit(result, elapsed)
+            else:
+                self.finished_signal.emit(None, 0)
+        except Exception as e:
+            elapsed = time.time() - start_time
+            if self.running and not isinstance(e, core.TranscriptionCancelled):
                 self.finished_signal.emit(e, elapsed)
             else:
                 self.finished_signal.emit(None, 0)
 
     def cancel(self):
         self.running = False
+        # 关闭正在使用的连接，线程立即从上传或等待响应中返回
+        self.cancel_token.cancel()
+
+
+class AsyncRequest(QObject, JobReporter):
+    """提交到异步传输引擎的任务，信号与 RequestThread 相同。
+
+    回调在引擎的事件循环线程中调用，信号以排队方式传递到界面线程。
+    """
+    finished_signal = pyqtSignal(object, float)
+    progress_signal = pyqtSignal(object, object)
+    retry_signal = pyqtSignal(int, float)
+    finished = pyqtSignal()
+
+    def __init__(self, engine, token, model_name, file_path, parent=None, options=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.token = token
+        self.model_name = model_name
+        self.file_path = file_path
+        self.options = options
+        self.job = None
+        self.done = False
+
+    def start(self):
+        self.job = self.engine.submit(self.token, self.model_name, self.file_path, self.options,
+                                      self.report_progress, self.report_done, self.report_retry)
+
+    def report_done(self, result, elapsed):
+        self.done = True
+        self.finished_signal.emit(result, elapsed)
+        self.finished.emit()
+
+    def isRunning(self):
+        return not self.done
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+
+class DedupThread(QThread):
+    """提交前在后台计算指纹、检测重复的音频。"""
+    finished_signal = pyqtSignal(object, float)  # 分组列表（dedup.DuplicateGroup）或异常，以及检测耗时
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.cancel_token = core.CancelToken()
+
+    def run(self):
+        start_time = time.time()
+        try:
+            groups = dedup.find_groups(self.paths, cancel_token=self.cancel_token)
+        except Exception as e:
+            groups = e
+        self.finished_signal.emit(groups, time.time() - start_time)
+
+    def cancel(self):
+        self.cancel_token.cancel()
+
+
+class LiveSession(QObject):
+    """实时转录会话：LiveTranscriber 的回调在其工作线程中调用，信号以排队方式传递到界面线程。"""
+    chunk_signal = pyqtSignal(object)  # 按顺序交付的 live.LiveChunk
+    finished_signal = pyqtSignal()
+
+    def __init__(self, token, model_name, source, options, parent=None):
+        super().__init__(parent)
+        self.transcriber = live.LiveTranscriber(token, model_name, source, options,
+                                                on_chunk=self.chunk_signal.emit,
+                                                on_finished=self.finished_signal.emit)
 
 
 class PreferencesDialog(QDialog):
-    """首选项对话框，用于编辑Token和Model。"""
-    def __init__(self, token, model, parent=None):
+    """首选项对话框，用于编辑Token、Model以及保存在QSettings中的其他选项。"""
+    def __init__(self, token, model, settings, parent=None):
         super().__init__(parent)
         self.setWindowTitle("首选项")
         self.token = token
         self.model = model
+        self.settings = settings
         self.init_ui()
 
     def init_ui(self):
@@ -82,8 +457,163 @@ class PreferencesDialog(QDialog):
 
         self.model_edit = QLineEdit(self.model)
 
+        # 账号池：更多 Token 与备用模型
+        self.extra_tokens_edit = QPlainTextEdit(self.settings.value("extra_tokens", ""))
+        self.extra_tokens_edit.setPlaceholderText("每行一个，与上面的 Token 一起轮流使用")
+        self.extra_tokens_edit.setFixedHeight(60)
+        self.extra_tokens_edit.setToolTip("批量任务的请求分配到多个账号，按测得的延迟与剩余配额选择；"
+                                          "被限流或连续失败的账号暂停使用一段时间。")
+        self.fallback_models_edit = QLineEdit(self.settings.value("fallback_models", ""))
+        self.fallback_models_edit.setPlaceholderText("逗号分隔，可留空")
+        self.fallback_models_edit.setToolTip("所有账号都无法使用当前模型（被限流或失败）时，按顺序改用这些模型。"
+                                             "备用模型的结果不写入缓存。")
+        self.account_rpm_spin = QSpinBox()
+        self.account_rpm_spin.setRange(0, 100000)
+        self.account_rpm_spin.setSuffix(" 次/分钟")
+        self.account_rpm_spin.setSpecialValueText("不限")
+        self.account_rpm_spin.setValue(self.settings.value("account_rpm", 0, type=int))
+        self.account_rpm_spin.setToolTip("每个账号每分钟的请求配额，用完的账号在配额恢复前不再分配请求。")
+
+        self.api_url_edit = QLineEdit(self.settings.value("api_url", ""))
+        self.api_url_edit.setPlaceholderText(os.environ.get(transport.API_URL_ENV) or transport.DEFAULT_API_URL)
+        self.api_url_edit.setToolTip("兼容 SiliconFlow /v1/audio/transcriptions 的接口地址，"
+                                     "例如用于离线测试的本地模拟服务器。留空使用默认地址。")
+
+        self.max_workers_spin = QSpinBox()
+        self.max_workers_spin.setRange(1, MAX_WORKERS_LIMIT)
+        self.max_workers_spin.setValue(self.settings.value("max_workers", DEFAULT_MAX_WORKERS, type=int))
+        self.max_workers_spin.setToolTip("批量转录时同时进行的最大请求数，过大可能触发API限流。")
+
+        # 传输引擎
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItem("多线程（每个任务一个线程）", ENGINE_THREADS)
+        self.engine_combo.addItem("异步（单线程事件循环，需要 aiohttp）", ENGINE_ASYNC)
+        self.engine_combo.setCurrentIndex(max(0, self.engine_combo.findData(
+            self.settings.value("transport_engine", ENGINE_THREADS))))
+        self.engine_combo.setToolTip("异步引擎在一个线程中同时进行大量上传，适合成百上千个文件的批量任务。")
+        if not async_engine.available():
+            self.engine_combo.setCurrentIndex(0)
+            self.engine_combo.model().item(1).setEnabled(False)
+        self.async_connections_spin = QSpinBox()
+        self.async_connections_spin.setRange(1, ASYNC_CONNECTIONS_LIMIT)
+        self.async_connections_spin.setValue(
+            self.settings.value("async_connections", async_engine.DEFAULT_MAX_CONNECTIONS, type=int))
+        self.async_connections_spin.setToolTip("异步引擎同时进行的请求数。需要本地解码的任务（分段、去静音）"
+                                               "仍按“最大并发数”使用线程处理。")
+        self.engine_combo.currentIndexChanged.connect(
+            lambda: self.async_connections_spin.setEnabled(self.engine_combo.currentData() == ENGINE_ASYNC))
+        self.async_connections_spin.setEnabled(self.engine_combo.currentData() == ENGINE_ASYNC)
+
+        # 失败重试与限流
+        self.max_retries_spin = QSpinBox()
+        self.max_retries_spin.setRange(0, 20)
+        self.max_retries_spin.setValue(
+            self.settings.value("max_retries", scheduler.DEFAULT_MAX_RETRIES, type=int))
+        self.max_retries_spin.setToolTip("遇到限流（429）、服务端错误（5xx）或网络错误时自动重试的次数，"
+                                         "按指数退避等待并遵守 Retry-After。")
+        self.rate_limit_spin = QDoubleSpinBox()
+        self.rate_limit_spin.setRange(0.0, 100.0)
+        self.rate_limit_spin.setSingleStep(0.5)
+        self.rate_limit_spin.setSuffix(" 次/秒")
+        self.rate_limit_spin.setSpecialValueText("不限")
+        self.rate_limit_spin.setValue(self.settings.value("rate_limit", 0.0, type=float))
+        self.rate_limit_spin.setToolTip("请求速率上限。被限流时会自动降低速率与并发数，之后逐步恢复。")
+
+        # 长音频分段
+        self.chunking_cb = QCheckBox("长音频自动分段并发转录（需要 numpy）")
+        self.chunking_cb.setChecked(self.settings.value("chunking_enabled", True, type=bool))
+        self.chunk_seconds_spin = QSpinBox()
+        self.chunk_seconds_spin.setRange(30, 3600)
+        self.chunk_seconds_spin.setSuffix(" 秒")
+        self.chunk_seconds_spin.setValue(
+            self.settings.value("chunk_seconds", chunking.DEFAULT_CHUNK_SECONDS, type=int))
+        self.chunk_seconds_spin.setToolTip("超过该长度的音频会在附近的静音处切分。")
+        self.chunk_overlap_spin = QSpinBox()
+        self.chunk_overlap_spin.setRange(0, 30)
+        self.chunk_overlap_spin.setSuffix(" 秒")
+        self.chunk_overlap_spin.setValue(
+            self.settings.value("chunk_overlap", chunking.DEFAULT_OVERLAP_SECONDS, type=int))
+        self.chunk_overlap_spin.setToolTip("相邻分段之间重叠的时长，拼接时会去除重复文字。")
+        self.chunk_parallelism_spin = QSpinBox()
+        self.chunk_parallelism_spin.setRange(1, MAX_WORKERS_LIMIT)
+        self.chunk_parallelism_spin.setValue(
+            self.settings.value("chunk_parallelism", chunking.DEFAULT_PARALLELISM, type=int))
+        self.chunk_parallelism_spin.setToolTip("单个文件同时上传的分段数，与最大并发数相乘即为总请求数上限。")
+        self.chunking_cb.toggled.connect(self.chunk_seconds_spin.setEnabled)
+        self.chunking_cb.toggled.connect(self.chunk_overlap_spin.setEnabled)
+        self.chunking_cb.toggled.connect(self.chunk_parallelism_spin.setEnabled)
+        for widget in (self.chunk_seconds_spin, self.chunk_overlap_spin, self.chunk_parallelism_spin):
+            widget.setEnabled(self.chunking_cb.isChecked())
+
+        # 转录缓存
+        self.cache_cb = QCheckBox("缓存转录结果（按音频内容与模型）")
+        self.cache_cb.setChecked(self.settings.value("cache_enabled", True, type=bool))
+        self.cache_dir_edit = QLineEdit(self.settings.value("cache_dir", ""))
+        self.cache_dir_edit.setPlaceholderText(cache.default_cache_dir())
+        self.cache_dir_edit.setToolTip("可以填写团队共享的目录，留空使用默认位置。")
+        self.cache_max_spin = QSpinBox()
+        self.cache_max_spin.setRange(1, 10240)
+        self.cache_max_spin.setSuffix(" MB")
+        self.cache_max_spin.setValue(self.settings.value("cache_max_mb", DEFAULT_CACHE_MAX_MB, type=int))
+        self.cache_max_spin.setToolTip("超出上限时淘汰最久未使用的缓存。")
+        self.cache_cb.toggled.connect(self.cache_dir_edit.setEnabled)
+        self.cache_cb.toggled.connect(self.cache_max_spin.setEnabled)
+        self.cache_dir_edit.setEnabled(self.cache_cb.isChecked())
+        self.cache_max_spin.setEnabled(self.cache_cb.isChecked())
+
+        # 上传前预处理
+        self.preprocess_cb = QCheckBox("上传前预处理（下混单声道、重采样到16 kHz并压缩）")
+        self.preprocess_cb.setChecked(self.settings.value("preprocess_enabled", False, type=bool))
+        self.preprocess_cb.setToolTip("重新编码需要 ffmpeg；没有 ffmpeg 时仅将 WAV 转为 16 kHz 单声道。")
+        self.preprocess_format_combo = QComboBox()
+        self.preprocess_format_combo.addItems(list(preprocess.FORMATS))
+        self.preprocess_format_combo.setCurrentText(
+            self.settings.value("preprocess_format", preprocess.DEFAULT_FORMAT))
+        self.preprocess_cb.toggled.connect(self.preprocess_format_combo.setEnabled)
+        self.preprocess_format_combo.setEnabled(self.preprocess_cb.isChecked())
+
+        # 去除静音
+        self.vad_cb = QCheckBox("上传前去除长静音（需要 numpy）")
+        self.vad_cb.setChecked(self.settings.value("vad_enabled", False, type=bool))
+        self.vad_min_silence_spin = QDoubleSpinBox()
+        self.vad_min_silence_spin.setRange(0.3, 10.0)
+        self.vad_min_silence_spin.setSingleStep(0.1)
+        self.vad_min_silence_spin.setSuffix(" 秒")
+        self.vad_min_silence_spin.setValue(
+            self.settings.value("vad_min_silence", vad.DEFAULT_MIN_SILENCE_SECONDS, type=float))
+        self.vad_min_silence_spin.setToolTip("仅去除长于该时长的静音段。")
+        self.vad_cb.toggled.connect(self.vad_min_silence_spin.setEnabled)
+        self.vad_min_silence_spin.setEnabled(self.vad_cb.isChecked())
+
+        # 合并重复的音频
+        self.dedup_cb = QCheckBox("提交前合并重复的音频（相同或近似的录音只转录一次）")
+        self.dedup_cb.setChecked(self.settings.value("dedup_enabled", False, type=bool))
+        self.dedup_cb.setToolTip("比较音频指纹，重新导出、换了格式或截取的副本直接使用同组代表文件的结果；"
+                                 "近似检测需要 numpy。")
+
         layout.addRow("Bearer Token:", token_hlayout)
         layout.addRow("Model:", self.model_edit)
+        layout.addRow("更多 Token:", self.extra_tokens_edit)
+        layout.addRow("备用模型:", self.fallback_models_edit)
+        layout.addRow("每个账号配额:", self.account_rpm_spin)
+        layout.addRow("API 地址:", self.api_url_edit)
+        layout.addRow("最大并发数:", self.max_workers_spin)
+        layout.addRow("传输引擎:", self.engine_combo)
+        layout.addRow("异步并发数:", self.async_connections_spin)
+        layout.addRow("最大重试次数:", self.max_retries_spin)
+        layout.addRow("请求速率上限:", self.rate_limit_spin)
+        layout.addRow(self.preprocess_cb)
+        layout.addRow("编码格式:", self.preprocess_format_combo)
+        layout.addRow(self.vad_cb)
+        layout.addRow("最短静音:", self.vad_min_silence_spin)
+        layout.addRow(self.chunking_cb)
+        layout.addRow("分段长度:", self.chunk_seconds_spin)
+        layout.addRow("分段重叠:", self.chunk_overlap_spin)
+        layout.addRow("分段并发数:", self.chunk_parallelism_spin)
+        layout.addRow(self.dedup_cb)
+        layout.addRow(self.cache_cb)
+        layout.addRow("缓存目录:", self.cache_dir_edit)
+        layout.addRow("缓存上限:", self.cache_max_spin)
 
         button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
         button_box.setContentsMargins(0, 10, 0, 0)
@@ -105,148 +635,208 @@ class PreferencesDialog(QDialog):
     def get_values(self):
         return self.token_edit.text().strip(), self.model_edit.text().strip()
 
+    def save_options(self):
+        """将Token与Model以外的选项写入QSettings。"""
+        self.settings.setValue("api_url", self.api_url_edit.text().strip())
+        self.settings.setValue("extra_tokens", self.extra_tokens_edit.toPlainText().strip())
+        self.settings.setValue("fallback_models", self.fallback_models_edit.text().strip())
+        self.settings.setValue("account_rpm", self.account_rpm_spin.value())
+        self.settings.setValue("max_workers", self.max_workers_spin.value())
+        self.settings.setValue("transport_engine", self.engine_combo.currentData())
+        self.settings.setValue("async_connections", self.async_connections_spin.value())
+        self.settings.setValue("max_retries", self.max_retries_spin.value())
+        self.settings.setValue("rate_limit", self.rate_limit_spin.value())
+        self.settings.setValue("chunking_enabled", self.chunking_cb.isChecked())
+        self.settings.setValue("chunk_seconds", self.chunk_seconds_spin.value())
+        self.settings.setValue("chunk_overlap", self.chunk_overlap_spin.value())
+        self.settings.setValue("chunk_parallelism", self.chunk_parallelism_spin.value())
+        self.settings.setValue("preprocess_enabled", self.preprocess_cb.isChecked())
+        self.settings.setValue("preprocess_format", self.preprocess_format_combo.currentText())
+        self.settings.setValue("vad_enabled", self.vad_cb.isChecked())
+        self.settings.setValue("vad_min_silence", self.vad_min_silence_spin.value())
+        self.settings.setValue("dedup_enabled", self.dedup_cb.isChecked())
+        self.settings.setValue("cache_enabled", self.cache_cb.isChecked())
+        self.settings.setValue("cache_dir", self.cache_dir_edit.text().strip())
+        self.settings.setValue("cache_max_mb", self.cache_max_spin.value())
+
+
+class StatsDialog(QDialog):
+    """性能统计：按模型对比总耗时与上传速率，并显示各阶段耗时的 p50/p95。
+
+    records 为任务数据库中已结束任务的统计记录（jobstore.JobStore.records()），
+    account_stats 为最近一批任务的账号池统计（AccountPool.stats()），没有使用账号池时为 None。
+    """
+    def __init__(self, records, account_stats=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能统计")
+        self.resize(760, 520)
+        self.records = records
+        self.account_stats = account_stats
+        self.summaries = timing.summarize(records)
+        self.init_ui()
+
+    @staticmethod
+    def format_seconds(value):
+        return "-" if value is None else f"{value:.2f}s"
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        model_group = QGroupBox("按模型对比（命中缓存的任务不计入耗时）")
+        model_layout = QVBoxLayout()
+        headers = ["模型", "任务数", "失败", "缓存命中", "总耗时 p50", "总耗时 p95", "上传速率"]
+        self.model_table = QTableWidget(len(self.summaries), len(headers))
+        self.model_table.setHorizontalHeaderLabels(headers)
+        self.model_table.verticalHeader().setVisible(False)
+        self.model_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.model_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.model_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.model_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for row, summary in enumerate(self.summaries):
+            rate = summary.upload_rate
+            values = [summary.model or "全部模型", str(summary.jobs), str(summary.failed), str(summary.cache_hits),
+                      self.format_seconds(summary.latency(0.5)), self.format_seconds(summary.latency(0.95)),
+                      "-" if rate is None else f"{rate / 1024 / 1024:.2f} MB/s"]
+            for column, value in enumerate(values):
+                self.model_table.setItem(row, column, QTableWidgetItem(value))
+        self.model_table.itemSelectionChanged.connect(self.update_stage_table)
+        model_layout.addWidget(self.model_table)
+        model_group.setLayout(model_layout)
+
+        self.stage_group = QGroupBox()
+        stage_layout = QVBoxLayout()
+        self.stage_table = QTableWidget(len(timing.STAGES), 2)
+        self.stage_table.setHorizontalHeaderLabels(["p50", "p95"])
+        self.stage_table.setVerticalHeaderLabels([timing.STAGE_LABELS[stage] for stage in timing.STAGES])
+        self.stage_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.stage_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        stage_layout.addWidget(self.stage_table)
+        self.stage_group.setLayout(stage_layout)
+
+        button_layout = QHBoxLayout()
+        export_json_button = QPushButton("导出 JSON")
+        export_json_button.clicked.connect(lambda: self.export("json"))
+        export_csv_button = QPushButton("导出 CSV")
+        export_csv_button.clicked.connect(lambda: self.export("csv"))
+        for button in (export_json_button, export_csv_button):
+            button.setEnabled(bool(self.records))
+            button_layout.addWidget(button)
+        button_layout.addStretch()
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.reject)
+        button_layout.addWidget(button_box)
+
+        layout.addWidget(model_group)
+        layout.addWidget(self.stage_group)
+        if self.account_stats:
+            layout.addWidget(self.account_group())
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        self.model_table.selectRow(0)
+
+    def account_group(self):
+        group = QGroupBox("账号池（最近一批任务）")
+        group_layout = QVBoxLayout()
+        headers = ["账号 / 模型", "请求", "成功", "限流", "失败", "平均延迟", "吞吐", "剩余配额", "状态"]
+        table = QTableWidget(len(self.account_stats), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for row, stats in enumerate(self.account_stats):
+            values = [stats["account"], str(stats["requests"]), str(stats["successes"]), str(stats["throttled"]),
+                      str(stats["failures"]), self.format_seconds(stats["latency"]),
+                      f"{stats['throughput']:.1f} 次/分钟",
+                      "不限" if stats["remaining"] is None else str(stats["remaining"]), stats["state"]]
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+        group_layout.addWidget(table)
+        group.setLayout(group_layout)
+        return group
+
+    def update_stage_table(self):
+        rows = self.model_table.selectionModel().selectedRows()
+        summary = self.summaries[rows[0].row() if rows else 0]
+        self.stage_group.setTitle(f"各阶段耗时（{summary.model or '全部模型'}，重试与分段的多次请求累计）")
+        for row, stage in enumerate(timing.STAGES):
+            for column, fraction in enumerate((0.5, 0.95)):
+                self.stage_table.setItem(row, column, QTableWidgetItem(
+                    self.format_seconds(summary.stage_latency(stage, fraction))))
+
+    def export(self, fmt):
+        file_filter = "JSON 文件 (*.json)" if fmt == "json" else "CSV 文件 (*.csv)"
+        export_path, _ = QFileDialog.getSaveFileName(self, "导出性能统计", f"transcriber-stats.{fmt}", file_filter)
+        if not export_path:
+            return
+        try:
+            with open(export_path, 'w', encoding='utf-8', newline='') as f:
+                if fmt == "json":
+                    timing.export_json(self.records, f)
+                else:
+                    timing.export_csv(self.records, f)
+            QMessageBox.information(self, "导出成功", f"统计数据已导出到 {export_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "导出失败", f"无法导出文件：{str(e)}")
+
 
 class TranscriptionApp(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.request_thread = None
+        self.request_threads = {}  # 任务行号 -> 进行中的RequestThread 或 AsyncRequest
+        self.async_engine = None
+        self.batch_engine = None  # 本批次使用的异步引擎，为 None 时使用线程
+        self.pending_rows = deque()
+        self.max_workers = DEFAULT_MAX_WORKERS
+        self.batch_total = 0
+        self.batch_done = 0
+        self.batch_failed = 0
+        self.batch_start_time = 0.0
+        self.batch_token = ""
+        self.batch_model = ""
+        self.transcription_cache = None
+        self.transcription_options = None
+        self.account_pool = None  # 最近一批任务使用的账号池，只有一个 Token 且没有备用模型时为 None
+        self.job_progress = {}  # 任务行号 -> (已上传字节数, 总字节数)
+        self.job_retries = {}  # 任务行号 -> (重试次数, 限流等待秒数)
+        self.batch_retries = 0
+        self.upload_window_start = 0.0
+        self.upload_window_bytes = 0
+        self.job_store = None
+        self.resumed_batch = False  # 本批次是否包含上次恢复的任务，此时单个任务的结果也追加显示
+        self.dedup_thread = None  # 正在检测重复音频的 DedupThread
+        self.duplicate_rows = {}  # 代表文件的行号 -> [(副本的行号, dedup.DuplicateCopy)]
+        self.batch_duplicates = 0  # 本批次由代表文件分发结果、没有上传的副本数
+        self.batch_duplicate_bytes = 0
+        self.live_session = None  # 进行中的实时转录
+        self.live_name = ""
+        self.live_started = False  # 本次实时转录是否已在结果列表中开始一个条目
+        self.live_segments = []  # 本次实时转录的分段，保存在结果列表的第一个条目中
         self.settings = QSettings("MyCompany", "SiliconFlowSpeechTranscriber")
 
         # 读取上次主题选择，默认为深色主题
         self.dark_theme_enabled = self.settings.value("dark_theme_enabled", True, type=bool)
 
+        # 先设置样式、字体与主题再创建控件，每个控件只按最终的样式初始化一次
+        QApplication.setStyle("Fusion")
+        QApplication.setFont(QFont("Sans Serif", 12))
+        self.apply_theme(self.dark_theme_enabled)
         self.init_ui()
         self.load_settings()
-        self.apply_theme(self.dark_theme_enabled)
+        # 缓存与任务数据库在主窗口显示后再打开
+        QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """打开缓存与任务数据库，恢复上次未完成的任务。"""
+        self.transcription_cache = self.load_cache()
+        self.update_cache_label()
+        self.job_store = self.load_job_store()
+        self.restore_jobs()
 
     def apply_theme(self, dark: bool):
-        """根据dark值切换主题"""
-        if dark:
-            QApplication.setStyle("Fusion")
-            dark_palette = QPalette()
-            dark_palette.setColor(QPalette.Window, QColor(53,53,53))
-            dark_palette.setColor(QPalette.WindowText, Qt.white)
-            dark_palette.setColor(QPalette.Base, QColor(35,35,35))
-            dark_palette.setColor(QPalette.AlternateBase, QColor(53,53,53))
-            dark_palette.setColor(QPalette.ToolTipBase, Qt.white)
-            dark_palette.setColor(QPalette.ToolTipText, Qt.white)
-            dark_palette.setColor(QPalette.Text, Qt.white)
-            dark_palette.setColor(QPalette.Button, QColor(53,53,53))
-            dark_palette.setColor(QPalette.ButtonText, Qt.white)
-            dark_palette.setColor(QPalette.BrightText, Qt.red)
-            dark_palette.setColor(QPalette.Link, QColor(42,130,218))
-            dark_palette.setColor(QPalette.Highlight, QColor(42,130,218))
-            dark_palette.setColor(QPalette.HighlightedText, Qt.black)
-            QApplication.setPalette(dark_palette)
-
-            font = QFont("Sans Serif", 12)
-            QApplication.setFont(font)
-
-            self.setStyleSheet("""
-                QGroupBox {
-                    font-weight: bold;
-                    border: 1px solid #444;
-                    border-radius: 5px;
-                    margin-top: 10px;
-                    font-size: 14px;
-                }
-                QGroupBox:title {
-                    subcontrol-origin: margin;
-                    subcontrol-position: top center;
-                    padding: 5px;
-                }
-                QPushButton {
-                    padding: 8px 16px;
-                    border-radius: 4px;
-                    background-color: #444;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background-color: #555;
-                }
-                QLineEdit {
-                    border: 1px solid #555;
-                    border-radius: 3px;
-                    padding: 6px;
-                    background: #333;
-                    selection-background-color: #666;
-                    font-size: 13px;
-                }
-                QTextEdit {
-                    border: 1px solid #555;
-                    border-radius: 4px;
-                    background: #222;
-                    selection-background-color: #666;
-                    font-size: 16px; 
-                }
-                QCheckBox, QLabel {
-                    font-size: 13px;
-                }
-            """)
-        else:
-            # 浅色主题
-            QApplication.setStyle("Fusion")
-            light_palette = QPalette()
-            light_palette.setColor(QPalette.Window, QColor(240,240,240))
-            light_palette.setColor(QPalette.WindowText, Qt.black)
-            light_palette.setColor(QPalette.Base, QColor(255,255,255))
-            light_palette.setColor(QPalette.AlternateBase, QColor(240,240,240))
-            light_palette.setColor(QPalette.ToolTipBase, Qt.white)
-            light_palette.setColor(QPalette.ToolTipText, Qt.black)
-            light_palette.setColor(QPalette.Text, Qt.black)
-            light_palette.setColor(QPalette.Button, QColor(240,240,240))
-            light_palette.setColor(QPalette.ButtonText, Qt.black)
-            light_palette.setColor(QPalette.BrightText, Qt.red)
-            light_palette.setColor(QPalette.Link, QColor(42,130,218))
-            light_palette.setColor(QPalette.Highlight, QColor(42,130,218))
-            light_palette.setColor(QPalette.HighlightedText, Qt.white)
-            QApplication.setPalette(light_palette)
-
-            font = QFont("Sans Serif", 12)
-            QApplication.setFont(font)
-
-            self.setStyleSheet("""
-                QGroupBox {
-                    font-weight: bold;
-                    border: 1px solid #aaa;
-                    border-radius: 5px;
-                    margin-top: 10px;
-                    font-size: 14px;
-                }
-                QGroupBox:title {
-                    subcontrol-origin: margin;
-                    subcontrol-position: top center;
-                    padding: 5px;
-                }
-                QPushButton {
-                    padding: 8px 16px;
-                    border-radius: 4px;
-                    background-color: #ddd;
-                    font-size: 13px;
-                }
-                QPushButton:hover {
-                    background-color: #ccc;
-                }
-                QLineEdit {
-                    border: 1px solid #aaa;
-                    border-radius: 3px;
-                    padding: 6px;
-                    background: #fff;
-                    selection-background-color: #3399ff;
-                    font-size: 13px;
-                }
-                QTextEdit {
-                    border: 1px solid #aaa;
-                    border-radius: 4px;
-                    background: #fff;
-                    selection-background-color: #3399ff;
-                    font-size: 16px; 
-                }
-                QCheckBox, QLabel {
-                    font-size: 13px;
-                    color: #000;
-                }
-            """)
+        """根据dark值切换主题，只替换调色板与样式表（Fusion 样式与字体在启动时设置一次）。"""
+        palette, stylesheet = theme_resources(dark)
+        QApplication.setPalette(palette)
+        self.setStyleSheet(stylesheet)
 
         self.dark_theme_enabled = dark
         self.settings.setValue("dark_theme_enabled", self.dark_theme_enabled)
@@ -273,6 +863,17 @@ class TranscriptionApp(QMainWindow):
         self.cancel_action.triggered.connect(self.cancel_request)
         toolbar.addAction(self.cancel_action)
 
+        # 实时转录：从麦克风或模拟输入（音频文件）边录音边转录
+        self.live_action = QAction(self.style().standardIcon(QStyle.SP_MediaPlay), "实时转录", self)
+        self.live_action.triggered.connect(self.toggle_live)
+        live_menu = QMenu(self)
+        self.live_mic_action = live_menu.addAction("麦克风", partial(self.start_live, False))
+        # 首次展开菜单时才检查能否录音，启动时不导入录音与音频处理模块
+        live_menu.aboutToShow.connect(self.update_live_menu)
+        live_menu.addAction("模拟输入（音频文件）...", partial(self.start_live, True))
+        self.live_action.setMenu(live_menu)
+        toolbar.addAction(self.live_action)
+
         toolbar.addSeparator()
 
         # 清空结果
@@ -287,7 +888,13 @@ class TranscriptionApp(QMainWindow):
 
         # 导出结果
         self.export_action = QAction(self.style().standardIcon(QStyle.SP_DialogSaveButton), "导出结果", self)
-        self.export_action.triggered.connect(self.export_to_file)
+        self.export_action.triggered.connect(partial(self.export_to_file, "txt"))
+        # 下拉菜单中选择带时间戳的导出格式
+        export_menu = QMenu(self)
+        export_menu.addAction("文本 (TXT)", partial(self.export_to_file, "txt"))
+        for fmt in subtitles.FORMATS:
+            export_menu.addAction(subtitles.FORMAT_LABELS[fmt], partial(self.export_to_file, fmt))
+        self.export_action.setMenu(export_menu)
         toolbar.addAction(self.export_action)
 
         # 中心Widget
@@ -328,7 +935,7 @@ class TranscriptionApp(QMainWindow):
         self.file_path_edit = QLineEdit()
         self.file_path_edit.setToolTip("在此显示选中的音频文件路径。")
         file_button_widget = QPushButton("选择文件")
-        file_button_widget.setToolTip("点击选择要转录的音频文件。")
+        file_button_widget.setToolTip("点击选择要转录的音频文件，可多选加入任务队列。")
         file_button_widget.setIcon(self.style().standardIcon(QStyle.SP_DialogOpenButton))
         file_button_widget.clicked.connect(self.select_file)
 
@@ -336,16 +943,52 @@ class TranscriptionApp(QMainWindow):
         input_layout.addWidget(self.file_path_edit, 2, 1)
         input_layout.addWidget(file_button_widget, 2, 2)
 
+        # 任务队列区
+        queue_group = QGroupBox("任务队列")
+        queue_layout = QVBoxLayout(queue_group)
+        queue_layout.setSpacing(10)
+        queue_layout.setContentsMargins(10,10,10,10)
+        self.queue_table = QTableWidget(0, 4)
+        self.queue_table.setHorizontalHeaderLabels(["文件", "状态", "耗时", "上传节省"])
+        self.queue_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in (1, 2, 3):
+            self.queue_table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.queue_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.queue_table.setToolTip("选择多个文件或将文件、文件夹拖放到窗口中即可加入队列。")
+        queue_layout.addWidget(self.queue_table)
+
+        self.clear_queue_button = QPushButton("清空队列")
+        self.clear_queue_button.setIcon(self.style().standardIcon(QStyle.SP_DialogResetButton))
+        self.clear_queue_button.clicked.connect(self.clear_queue)
+        queue_button_layout = QHBoxLayout()
+        queue_button_layout.addStretch(1)
+        queue_button_layout.addWidget(self.clear_queue_button)
+        queue_layout.addLayout(queue_button_layout)
+
         # 下方结果显示区
         result_group = QGroupBox("转录结果")
         result_group_layout = QVBoxLayout(result_group)
         result_group_layout.setSpacing(10)
         result_group_layout.setContentsMargins(10,10,10,10)
-        self.result_text = QTextEdit()
+        # 每个文件或每段文字一个条目，只有可见条目参与排版，长时间录音或大批量结果也不会卡住界面
+        self.result_model = ResultModel(self)
+        self.result_view = QListView()
+        self.result_view.setModel(self.result_model)
+        self.result_view.setItemDelegate(ResultDelegate(self.result_view))
+        self.result_view.setWordWrap(True)
+        self.result_view.setLayoutMode(QListView.Batched)
+        self.result_view.setBatchSize(RESULT_LAYOUT_BATCH)
+        self.result_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.result_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
         # 可编辑
-        self.result_text.setReadOnly(False)
-        self.result_text.setToolTip("此处显示转录结果，你可对结果进行编辑。")
-        result_group_layout.addWidget(self.result_text)
+        self.result_view.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.result_view.setToolTip("此处显示转录结果，双击条目可进行编辑。")
+        self.result_model.rowsAboutToBeInserted.connect(self.remember_result_scroll)
+        self.result_model.rowsInserted.connect(self.follow_results)
+        self.follow_result_bottom = True
+        result_group_layout.addWidget(self.result_view)
 
         # 使用QSplitter分隔上下区域
         splitter = QSplitter(Qt.Vertical)
@@ -354,6 +997,7 @@ class TranscriptionApp(QMainWindow):
         top_layout.setSpacing(0)
         top_layout.setContentsMargins(0,0,0,0)
         top_layout.addWidget(input_group)
+        top_layout.addWidget(queue_group)
 
         splitter.addWidget(top_widget)
         splitter.addWidget(result_group)
@@ -367,11 +1011,21 @@ class TranscriptionApp(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("就绪")
 
+        self.upload_rate_label = QLabel()
+        self.upload_rate_label.setVisible(False)
+        self.status_bar.addPermanentWidget(self.upload_rate_label)
+        self.upload_rate_timer = QTimer(self)
+        self.upload_rate_timer.setInterval(1000)
+        self.upload_rate_timer.timeout.connect(self.update_upload_rate)
+
         self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 0)  # 不确定进度显示
+        self.progress_bar.setRange(0, 0)  # 收到上传进度前为不确定进度
         self.progress_bar.setVisible(False)
         self.status_bar.addPermanentWidget(self.progress_bar)
 
+        self.cache_label = QLabel()
+        self.status_bar.addPermanentWidget(self.cache_label)
+
         # 菜单栏
         menubar = self.menuBar()
         setting_menu = menubar.addMenu("设置")
@@ -383,21 +1037,36 @@ class TranscriptionApp(QMainWindow):
         theme_action.triggered.connect(self.toggle_theme)
         setting_menu.addAction(theme_action)
 
+        clear_cache_action = QAction("清空缓存", self)
+        clear_cache_action.triggered.connect(self.clear_cache)
+        setting_menu.addAction(clear_cache_action)
+
+        view_menu = menubar.addMenu("查看")
+        stats_action = QAction("性能统计", self)
+        stats_action.triggered.connect(self.show_stats_dialog)
+        view_menu.addAction(stats_action)
+
         help_menu = menubar.addMenu("帮助")
         about_action = QAction("关于", self)
         about_action.triggered.connect(self.show_about_dialog)
         help_menu.addAction(about_action)
 
+        # 支持将文件或文件夹拖放到窗口中加入队列
+        self.setAcceptDrops(True)
+
     def open_preferences(self):
         current_token = self.token_edit.text().strip()
         current_model = self.model_edit.text().strip()
 
-        dialog = PreferencesDialog(current_token, current_model, self)
+        dialog = PreferencesDialog(current_token, current_model, self.settings, self)
         if dialog.exec_() == QDialog.Accepted:
             token, model = dialog.get_values()
             self.token_edit.setText(token)
             self.model_edit.setText(model)
+            dialog.save_options()
             self.save_settings()
+            self.transcription_cache = self.load_cache()
+            self.update_cache_label()
 
     def toggle_token_visibility(self, checked):
         if checked:
@@ -413,27 +1082,107 @@ class TranscriptionApp(QMainWindow):
         QMessageBox.information(self, "关于",
                                 "SiliconFlow Speech Transcriber\n\n"
                                 "这是一个示例程序，用于调用SiliconFlow语音转文本API。\n"
-                                "功能包括多线程请求、进度指示、取消操作、配置保存、\n"
+                                "功能包括批量任务队列、并发请求、进度指示、取消操作、配置保存、\n"
                                 "错误提示、复制导出结果、显示耗时以及首选项对话框。\n"
                                 "UI支持深色与浅色主题切换，更加舒适美观。\n\n"
                                 "作者：yeahhe（LINUXDO）")
 
+    def show_stats_dialog(self):
+        if self.job_store is None:
+            QMessageBox.warning(self, "无法统计", "任务数据库不可用，没有可统计的记录。")
+            return
+        try:
+            records = self.job_store.records()
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "无法统计", f"读取任务数据库失败：{e}")
+            return
+        account_stats = self.account_pool.stats() if self.account_pool is not None else None
+        StatsDialog(records, account_stats, self).exec_()
+
     def select_file(self):
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, "选择音频文件", "",
             "音频文件 (*.wav *.mp3 *.m4a *.flac *.ogg);;所有文件 (*)",
             options=options
         )
-        if file_path:
-            self.file_path_edit.setText(file_path)
+        if file_paths:
+            self.file_path_edit.setText(file_paths[-1])
+            self.add_jobs(file_paths)
             self.save_settings()
 
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+        else:
+            super().dragEnterEvent(event)
+
+    def dropEvent(self, event):
+        paths = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        files = core.collect_audio_files(paths)
+        if not files:
+            self.status_bar.showMessage("拖放的内容中没有找到音频文件。")
+            return
+        event.acceptProposedAction()
+        self.file_path_edit.setText(files[-1])
+        self.add_jobs(files)
+        self.save_settings()
+
+    def add_jobs(self, file_paths):
+        """将文件加入任务队列，返回新任务的行号列表。"""
+        rows = []
+        for file_path in file_paths:
+            row = self.queue_table.rowCount()
+            self.queue_table.insertRow(row)
+            name_item = QTableWidgetItem(os.path.basename(file_path))
+            name_item.setData(Qt.UserRole, file_path)
+            name_item.setToolTip(file_path)
+            self.queue_table.setItem(row, 0, name_item)
+            self.queue_table.setItem(row, 1, QTableWidgetItem(STATUS_PENDING))
+            self.queue_table.setItem(row, 2, QTableWidgetItem(""))
+            self.queue_table.setItem(row, 3, QTableWidgetItem(""))
+            rows.append(row)
+        self.status_bar.showMessage(f"队列中共有 {self.queue_table.rowCount()} 个任务")
+        return rows
+
+    def job_status(self, row):
+        return self.queue_table.item(row, 1).text()
+
+    def set_job_status(self, row, status, elapsed=None, detail=""):
+        self.queue_table.item(row, 1).setText(f"{status}（{detail}）" if detail else status)
+        if elapsed is not None:
+            self.queue_table.item(row, 2).setText(f"{elapsed:.2f}s")
+
+    def clear_queue(self):
+        if self.request_threads:
+            QMessageBox.warning(self, "警告", "请求进行中，无法清空队列。")
+            return
+        # 清空的未完成任务不再在下次启动时恢复
+        for row in range(self.queue_table.rowCount()):
+            if self.job_status(row) == STATUS_PENDING:
+                self.record_job(row, status=jobstore.CANCELLED)
+        self.queue_table.setRowCount(0)
+        self.status_bar.showMessage("就绪")
+
+    def remember_result_scroll(self):
+        scroll_bar = self.result_view.verticalScrollBar()
+        self.follow_result_bottom = scroll_bar.value() >= scroll_bar.maximum()
+
+    def follow_results(self):
+        """新结果插入前已滚动到底部时，继续跟随显示最新结果。"""
+        if self.follow_result_bottom:
+            self.result_view.scrollToBottom()
+
     def clear_results(self):
-        self.result_text.clear()
+        self.result_model.clear()
+        # 实时转录仍在进行时，之后的分段开始一个新条目
+        self.live_started = False
+        self.live_segments = []
 
     def copy_to_clipboard(self):
-        text = self.result_text.toPlainText()
+        """复制选中的条目，没有选中时复制全部结果。"""
+        rows = sorted(index.row() for index in self.result_view.selectionModel().selectedIndexes())
+        text = "".join(self.result_model.iter_text(rows or None))
         if text:
             clipboard = QApplication.clipboard()
             clipboard.setText(text, QClipboard.Clipboard)
@@ -441,17 +1190,42 @@ class TranscriptionApp(QMainWindow):
         else:
             QMessageBox.warning(self, "无内容", "当前没有可复制的内容。")
 
-    def export_to_file(self):
-        text = self.result_text.toPlainText()
-        if not text:
+    def export_to_file(self, fmt="txt"):
+        """导出为文本或带时间戳的 SRT/WebVTT/JSON。
+
+        多个文件导出为字幕时选择一个文件夹，每个音频写一个字幕文件；JSON 把所有文件写入一个数组。
+        """
+        if self.result_model.is_empty():
             QMessageBox.warning(self, "无内容", "当前没有可导出的内容。")
             return
+        if fmt != "txt" and not self.result_model.segment_file_count():
+            QMessageBox.warning(self, "无内容", "当前没有可导出的转录结果。")
+            return
+        if fmt in ("srt", "vtt") and self.result_model.segment_file_count() > 1:
+            directory = QFileDialog.getExistingDirectory(self, f"导出{subtitles.FORMAT_LABELS[fmt]}到文件夹")
+            if directory:
+                try:
+                    paths = subtitles.export_batch(self.result_model.iter_segments(), directory, fmt)
+                    QMessageBox.information(self, "导出成功", f"已导出 {len(paths)} 个文件到 {directory}")
+                except Exception as e:
+                    QMessageBox.critical(self, "导出失败", f"无法导出文件：{str(e)}")
+            return
+
+        label = "文本文件" if fmt == "txt" else subtitles.FORMAT_LABELS[fmt]
         options = QFileDialog.Options()
-        export_path, _ = QFileDialog.getSaveFileName(self, "导出转录结果", "", "文本文件 (*.txt);;所有文件 (*)", options=options)
+        export_path, _ = QFileDialog.getSaveFileName(self, "导出转录结果", "", f"{label} (*.{fmt});;所有文件 (*)",
+                                                     options=options)
         if export_path:
             try:
+                # 逐条写入，不在内存中拼接整段文本
                 with open(export_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
+                    if fmt == "txt":
+                        f.writelines(self.result_model.iter_text())
+                    elif fmt == "json":
+                        f.writelines(subtitles.iter_json(self.result_model.iter_segments()))
+                    else:
+                        for _, segments in self.result_model.iter_segments():
+                            subtitles.write(f, fmt, segments)
                 QMessageBox.information(self, "导出成功", f"结果已导出到 {export_path}")
             except Exception as e:
                 QMessageBox.critical(self, "导出失败", f"无法导出文件：{str(e)}")
@@ -467,57 +1241,538 @@ class TranscriptionApp(QMainWindow):
         if not model_name:
             QMessageBox.warning(self, "警告", "请先输入模型名称。")
             return
-        if not file_path:
-            QMessageBox.warning(self, "警告", "请先选择音频文件。")
-            return
 
-        # 显示进度
+        rows = [row for row in range(self.queue_table.rowCount()) if self.job_status(row) == STATUS_PENDING]
+        if not rows:
+            if not file_path:
+                QMessageBox.warning(self, "警告", "请先选择音频文件。")
+                return
+            rows = self.add_jobs([file_path])
+
+        self.batch_token = token
+        self.batch_model = model_name
+        self.register_jobs(rows, model_name)
+        self.batch_total = len(rows)
+        self.batch_done = 0
+        self.batch_failed = 0
+        self.batch_retries = 0
+        self.batch_duplicates = 0
+        self.batch_duplicate_bytes = 0
+        self.duplicate_rows = {}
+        self.batch_start_time = time.time()
+        self.pending_rows = deque(rows)
+        self.max_workers = self.settings.value("max_workers", DEFAULT_MAX_WORKERS, type=int)
+        transport.set_api_url(self.settings.value("api_url", ""))
+        self.batch_engine = self.load_async_engine()
+        if self.batch_engine is not None:
+            self.max_workers = self.batch_engine.max_connections
+        self.transcription_cache = self.load_cache()
+        self.account_pool = self.load_account_pool(token)
+        self.transcription_options = self.load_transcription_options()
+
+        # 显示进度：收到第一个上传进度前为不确定进度
+        self.job_progress = {}
+        self.job_retries = {}
+        self.progress_bar.setRange(0, 0)
         self.progress_bar.setVisible(True)
+        self.upload_window_start = time.time()
+        self.upload_window_bytes = 0
+        self.upload_rate_label.setText("上传: 0.00 MB/s")
+        self.upload_rate_label.setVisible(True)
+        self.upload_rate_timer.start()
         self.status_bar.showMessage("请求中...")
         self.submit_action.setEnabled(False)
+        self.live_action.setEnabled(False)
         self.cancel_action.setEnabled(True)
+        self.clear_queue_button.setEnabled(False)
 
-        # 启动线程
-        self.request_thread = RequestThread(token, model_name, file_path)
-        self.request_thread.finished_signal.connect(self.handle_response)
-        self.request_thread.start()
+        if self.settings.value("dedup_enabled", False, type=bool) and len(rows) > 1:
+            self.start_dedup(rows)
+        else:
+            self.start_pending_jobs()
+
+    def start_dedup(self, rows):
+        """在后台检测重复的音频，完成后只启动每组代表文件的任务。"""
+        paths = [self.queue_table.item(row, 0).data(Qt.UserRole) for row in rows]
+        self.status_bar.showMessage(f"正在检测 {len(paths)} 个文件中重复的音频...")
+        self.dedup_thread = DedupThread(paths, self)
+        self.dedup_thread.finished_signal.connect(partial(self.handle_dedup, self.dedup_thread, rows))
+        self.dedup_thread.finished.connect(self.dedup_thread.deleteLater)
+        self.dedup_thread.start()
+
+    def handle_dedup(self, thread, rows, groups, elapsed):
+        if thread is not self.dedup_thread:
+            # 检测期间本批任务已被取消
+            return
+        self.dedup_thread = None
+        if isinstance(groups, Exception):
+            self.status_bar.showMessage(f"检测重复音频失败，逐个转录：{groups}")
+        else:
+            # 同一个文件可能在队列中出现多次，按出现顺序对应行号
+            rows_by_path = {}
+            for row in rows:
+                rows_by_path.setdefault(self.queue_table.item(row, 0).data(Qt.UserRole), deque()).append(row)
+            for group in groups:
+                representative_row = rows_by_path[group.representative.path].popleft()
+                copies = [(rows_by_path[duplicate.path].popleft(), duplicate) for duplicate in group.copies]
+                if copies:
+                    self.duplicate_rows[representative_row] = copies
+                for row, duplicate in copies:
+                    self.pending_rows.remove(row)
+                    self.queue_table.item(row, 3).setText(
+                        f"与 {os.path.basename(group.representative.path)} 重复")
+            self.status_bar.showMessage(f"请求中... | 去重：{dedup.describe_summary(dedup.plan_summary(groups), elapsed)}")
+        self.start_pending_jobs()
+
+    def start_pending_jobs(self):
+        """在不超过最大并发数的前提下启动等待中的任务。"""
+        while self.pending_rows and len(self.request_threads) < self.max_workers:
+            row = self.pending_rows.popleft()
+            file_path = self.queue_table.item(row, 0).data(Qt.UserRole)
+            # 以窗口为父对象，由Qt管理线程生命周期，结束后自动释放
+            if self.batch_engine is not None:
+                thread = AsyncRequest(self.batch_engine, self.batch_token, self.batch_model, file_path, self,
+                                      options=self.transcription_options)
+            else:
+                thread = RequestThread(self.batch_token, self.batch_model, file_path, self,
+                                       options=self.transcription_options)
+            thread.finished_signal.connect(partial(self.handle_response, row))
+            thread.progress_signal.connect(partial(self.handle_progress, row))
+            thread.retry_signal.connect(partial(self.handle_retry, row))
+            thread.finished.connect(thread.deleteLater)
+            self.request_threads[row] = thread
+            self.set_job_status(row, STATUS_RUNNING)
+            self.record_job(row, status=jobstore.RUNNING)
+            thread.start()
+
+    def handle_progress(self, row, sent, total):
+        previous_sent, _ = self.job_progress.get(row, (0, total))
+        self.job_progress[row] = (sent, total)
+        self.upload_window_bytes += max(0, sent - previous_sent)
+        self.update_progress_bar()
+
+    def handle_retry(self, row, retries, throttle_seconds):
+        self.job_retries[row] = (retries, throttle_seconds)
+        if row in self.request_threads:
+            self.set_job_status(row, STATUS_RUNNING, detail=scheduler.describe_retries(retries, throttle_seconds))
+
+    def update_progress_bar(self):
+        """进度 = （已结束的任务数 + 进行中任务的上传比例之和）/ 任务总数。"""
+        if not self.job_progress:
+            return
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 1000)
+        running = sum(sent / total for sent, total in self.job_progress.values() if total)
+        self.progress_bar.setValue(int((self.batch_done + running) / self.batch_total * 1000))
+
+    def update_upload_rate(self):
+        now = time.time()
+        elapsed = now - self.upload_window_start
+        if elapsed > 0:
+            rate = self.upload_window_bytes / elapsed / 1024 / 1024
+            self.upload_rate_label.setText(f"上传: {rate:.2f} MB/s")
+        self.upload_window_start = now
+        self.upload_window_bytes = 0
 
     def cancel_request(self):
-        if self.request_thread and self.request_thread.isRunning():
-            self.request_thread.cancel()
-            self.result_text.setText("请求已取消。请稍候...")
+        if self.dedup_thread is not None:
+            self.dedup_thread.cancel()
+            self.dedup_thread = None
+        while self.pending_rows:
+            row = self.pending_rows.popleft()
+            # 尚未开始的代表文件被取消时其副本一并取消
+            for copy_row in [row] + [copy_row for copy_row, _ in self.duplicate_rows.pop(row, ())]:
+                self.set_job_status(copy_row, STATUS_CANCELLED)
+                self.record_job(copy_row, status=jobstore.CANCELLED)
+        for thread in list(self.request_threads.values()):
+            if thread.isRunning():
+                thread.cancel()
+        if self.request_threads:
+            self.status_bar.showMessage("请求已取消。请稍候...")
+        else:
+            self.finish_batch()
         self.cancel_action.setEnabled(False)
 
-    def handle_response(self, result, elapsed):
+    def handle_response(self, row, result, elapsed):
+        self.record_response(row, result, elapsed)
+        for copy_row, duplicate in self.duplicate_rows.pop(row, ()):
+            self.share_result(copy_row, duplicate, result)
+
+        self.update_progress_bar()
+        if self.pending_rows:
+            self.start_pending_jobs()
+        if self.request_threads:
+            self.status_bar.showMessage(f"请求中... | {self.batch_summary()}")
+        else:
+            self.finish_batch(elapsed if self.batch_total == 1 and not self.resumed_batch else None)
+
+    def share_result(self, row, duplicate, result):
+        """把代表文件的结果分发给副本；代表文件转录失败或无法截取出副本的部分时，副本单独转录。"""
+        if result is None:
+            self.set_job_status(row, STATUS_CANCELLED)
+            self.record_job(row, status=jobstore.CANCELLED)
+            return
+        derived = None
+        if isinstance(result, core.TranscriptionResult):
+            derived = core.duplicate_result(result, duplicate, self.transcription_options)
+        if derived is None:
+            self.queue_table.item(row, 3).setText("")
+            self.pending_rows.append(row)
+            return
+        self.batch_duplicates += 1
+        self.batch_duplicate_bytes += derived.original_bytes
+        self.record_response(row, derived, 0.0)
+
+    def record_response(self, row, result, elapsed):
+        """显示并记录一个任务的结果，result 为 None 表示任务被取消。"""
+        self.request_threads.pop(row, None)
+        self.job_progress.pop(row, None)
+        retries, throttle_seconds = self.job_retries.pop(row, (0, 0.0))
+        retry_detail = scheduler.describe_retries(retries, throttle_seconds)
+        file_name = self.queue_table.item(row, 0).text()
+        single = self.batch_total == 1 and not self.resumed_batch
+
+        if result is None:
+            # 请求被取消
+            self.set_job_status(row, STATUS_CANCELLED)
+            self.record_job(row, status=jobstore.CANCELLED)
+            self.result_model.append_text(None if single else file_name, "请求已被用户取消。")
+        else:
+            self.batch_done += 1
+            self.batch_retries += retries
+            if isinstance(result, transport.TranscriptionError):
+                self.batch_failed += 1
+                self.set_job_status(row, STATUS_FAILED, elapsed, retry_detail)
+                self.show_job_result(file_name, str(result), single)
+                self.record_job(row, status=jobstore.FAILED, error=str(result), elapsed=elapsed, retries=retries,
+                                throttle_seconds=throttle_seconds)
+            elif isinstance(result, Exception):
+                self.batch_failed += 1
+                self.set_job_status(row, STATUS_FAILED, elapsed, retry_detail)
+                self.show_job_result(file_name, f"请求异常: {str(result)}", single)
+                self.record_job(row, status=jobstore.FAILED, error=f"请求异常: {str(result)}", elapsed=elapsed,
+                                retries=retries, throttle_seconds=throttle_seconds)
+            else:
+                if result.models_used:
+                    fallback_detail = f"备用模型 {', '.join(sorted(result.models_used))}"
+                    retry_detail = f"{retry_detail}，{fallback_detail}" if retry_detail else fallback_detail
+                status = STATUS_CACHED if result.cache_hit else STATUS_DONE
+                if result.duplicate_of:
+                    status, retry_detail = STATUS_DUPLICATE, f"同 {os.path.basename(result.duplicate_of)}"
+                self.set_job_status(row, status, elapsed, retry_detail)
+                self.record_job(row, status=jobstore.DONE, text=result.text, result=result.data, elapsed=elapsed,
+                                cache_hit=result.cache_hit, retries=retries, throttle_seconds=throttle_seconds,
+                                timing=result.timing.as_dict())
+                if result.uploaded_bytes is not None:
+                    self.queue_table.item(row, 3).setText(self.describe_savings(result))
+                transcription = result.text
+                if transcription:
+                    self.show_job_result(file_name, transcription, single, result.segments)
+                else:
+                    self.show_job_result(file_name, "未获取到转录文本。", single)
+            self.update_cache_label()
+
+    def describe_savings(self, result):
+        """根据实际上传速率估算预处理与去静音节省的字节数与上传时间。"""
+        if result.duplicate_of:
+            return f"{result.original_bytes / 1024 / 1024:.1f} MB（未上传）"
+        saved = result.original_bytes - result.uploaded_bytes
+        if saved <= 0 or not result.original_bytes:
+            description = "无"
+        else:
+            rate = result.uploaded_bytes / result.upload_seconds if result.upload_seconds else 0
+            saved_seconds = saved / rate if rate else 0
+            description = (f"{saved / 1024 / 1024:.1f} MB ({saved * 100 / result.original_bytes:.0f}%)"
+                           f" / 约 {saved_seconds:.1f}s")
+        if result.offset_map is not None:
+            description += f" | 静音 {result.offset_map.removed_fraction * 100:.0f}%"
+        return description
+
+    def load_transcription_options(self):
+        """根据首选项生成转录选项（分段、缓存、预处理、去静音、重试与限流）。"""
+        chunk_settings = None
+        if self.settings.value("chunking_enabled", True, type=bool):
+            chunk_settings = chunking.ChunkSettings(
+                self.settings.value("chunk_seconds", chunking.DEFAULT_CHUNK_SECONDS, type=int),
+                self.settings.value("chunk_overlap", chunking.DEFAULT_OVERLAP_SECONDS, type=int),
+                self.settings.value("chunk_parallelism", chunking.DEFAULT_PARALLELISM, type=int)
+            )
+        preprocess_format = None
+        if self.settings.value("preprocess_enabled", False, type=bool):
+            preprocess_format = self.settings.value("preprocess_format", preprocess.DEFAULT_FORMAT)
+        vad_min_silence = None
+        if self.settings.value("vad_enabled", False, type=bool):
+            vad_min_silence = self.settings.value("vad_min_silence", vad.DEFAULT_MIN_SILENCE_SECONDS, type=float)
+        # 同一批任务共享一个调度器，限流信号对所有任务生效
+        request_scheduler = scheduler.RequestScheduler(
+            max_retries=self.settings.value("max_retries", scheduler.DEFAULT_MAX_RETRIES, type=int),
+            rate=self.settings.value("rate_limit", 0.0, type=float) or None
+        )
+        return core.TranscriptionOptions(chunk_settings, self.transcription_cache, preprocess_format, vad_min_silence,
+                                         request_scheduler, self.account_pool)
+
+    def load_account_pool(self, token):
+        """首选项中设置了更多 Token 或备用模型时返回本批任务使用的 AccountPool，否则返回 None。"""
+        tokens = [token]
+        for line in self.settings.value("extra_tokens", "").splitlines():
+            line = line.strip()
+            if line and line not in tokens:
+                tokens.append(line)
+        fallback_models = [model.strip() for model in self.settings.value("fallback_models", "").split(",")
+                           if model.strip()]
+        if len(tokens) == 1 and not fallback_models:
+            return None
+        rpm = self.settings.value("account_rpm", 0, type=int) or None
+        return accounts.AccountPool(tokens, fallback_models, rpm)
+
+    def load_async_engine(self):
+        """选用异步传输引擎时返回 AsyncEngine（设置改变时重新创建），否则返回 None。"""
+        if self.settings.value("transport_engine", ENGINE_THREADS) != ENGINE_ASYNC or not async_engine.available():
+            return None
+        connections = self.settings.value("async_connections", async_engine.DEFAULT_MAX_CONNECTIONS, type=int)
+        engine = self.async_engine
+        if engine is None or engine.max_connections != connections or engine.local_workers != self.max_workers:
+            if engine is not None:
+                engine.close()
+            self.async_engine = async_engine.AsyncEngine(connections, local_workers=self.max_workers)
+        return self.async_engine
+
+    def load_job_store(self):
+        """打开持久化任务数据库，失败时仅在状态栏提示，不影响转录。"""
+        try:
+            store = jobstore.JobStore()
+            store.prune()
+            return store
+        except (OSError, sqlite3.Error) as e:
+            self.status_bar.showMessage(f"无法打开任务数据库：{str(e)}")
+            return None
+
+    def restore_jobs(self):
+        """恢复上次未完成的批量任务：已完成的任务直接显示结果，其余任务重新排队等待提交。"""
+        if self.job_store is None:
+            return
+        try:
+            jobs = self.job_store.resumable_jobs()
+        except sqlite3.Error as e:
+            self.status_bar.showMessage(f"读取任务数据库失败：{str(e)}")
+            return
+        if not jobs:
+            return
+        unfinished = 0
+        for job in jobs:
+            row = self.add_jobs([job.path])[0]
+            self.queue_table.item(row, 0).setData(JOB_ID_ROLE, job.id)
+            file_name = os.path.basename(job.path)
+            if job.status == jobstore.DONE:
+                retry_detail = scheduler.describe_retries(job.retries, job.throttle_seconds)
+                self.set_job_status(row, STATUS_CACHED if job.cache_hit else STATUS_DONE, job.elapsed, retry_detail)
+                self.show_job_result(file_name, job.text or "未获取到转录文本。", False,
+                                     subtitles.from_response(job.result))
+            elif job.status == jobstore.FAILED:
+                self.set_job_status(row, STATUS_FAILED, job.elapsed)
+                self.show_job_result(file_name, job.error or "", False)
+            elif job.status == jobstore.CANCELLED:
+                self.set_job_status(row, STATUS_CANCELLED)
+            else:
+                unfinished += 1
+        self.model_edit.setText(jobs[-1].model)
+        self.resumed_batch = True
+        self.status_bar.showMessage(f"已恢复上次未完成的任务：{len(jobs) - unfinished} 个已完成，"
+                                    f"{unfinished} 个待继续，点击“提交请求”继续。")
+
+    def register_jobs(self, rows, model_name):
+        """为尚未写入任务数据库的任务新建一个批次（恢复的任务沿用原来的记录）。"""
+        if self.job_store is None:
+            return
+        new_rows = [row for row in rows if self.queue_table.item(row, 0).data(JOB_ID_ROLE) is None]
+        if not new_rows:
+            return
+        paths = [self.queue_table.item(row, 0).data(Qt.UserRole) for row in new_rows]
+        try:
+            job_ids = self.job_store.create_batch(paths, model_name)
+        except sqlite3.Error as e:
+            self.status_bar.showMessage(f"写入任务数据库失败：{str(e)}")
+            return
+        for row, job_id in zip(new_rows, job_ids):
+            self.queue_table.item(row, 0).setData(JOB_ID_ROLE, job_id)
+
+    def record_job(self, row, **fields):
+        job_id = self.queue_table.item(row, 0).data(JOB_ID_ROLE)
+        if self.job_store is not None and job_id is not None:
+            self.job_store.update(job_id, **fields)
+
+    def load_cache(self):
+        """按设置创建（或复用）转录缓存，未启用时返回 None。"""
+        if not self.settings.value("cache_enabled", True, type=bool):
+            return None
+        directory = self.settings.value("cache_dir", "") or cache.default_cache_dir()
+        max_bytes = self.settings.value("cache_max_mb", DEFAULT_CACHE_MAX_MB, type=int) * 1024 * 1024
+        current = self.transcription_cache
+        if current is not None and current.directory == directory:
+            current.max_bytes = max_bytes
+            return current
+        try:
+            return cache.TranscriptionCache(directory, max_bytes)
+        except OSError as e:
+            self.status_bar.showMessage(f"无法使用缓存目录：{str(e)}")
+            return None
+
+    def clear_cache(self):
+        reply = QMessageBox.question(self, "清空缓存", "确定要删除所有已缓存的转录结果吗？")
+        if reply != QMessageBox.Yes:
+            return
+        transcription_cache = self.transcription_cache or cache.TranscriptionCache(
+            self.settings.value("cache_dir", "") or cache.default_cache_dir())
+        transcription_cache.clear()
+        self.update_cache_label()
+        self.status_bar.showMessage("缓存已清空")
+
+    def update_cache_label(self):
+        if self.transcription_cache is None:
+            self.cache_label.setText("缓存: 未启用")
+        else:
+            self.cache_label.setText(
+                f"缓存 命中: {self.transcription_cache.hits} | 未命中: {self.transcription_cache.misses}")
+
+    def show_job_result(self, file_name, text, single, segments=None):
+        """单个任务时直接显示结果，批量任务时按文件追加结果。segments 为带时间戳的分段，供导出字幕。"""
+        if single:
+            self.result_model.clear()
+            self.result_model.append_text(None, text, segments)
+        else:
+            self.result_model.append_text(file_name, text, segments)
+
+    def batch_summary(self):
+        """返回批量任务的进度与吞吐量描述。"""
+        total_elapsed = time.time() - self.batch_start_time
+        throughput = self.batch_done / total_elapsed * 60 if total_elapsed > 0 else 0.0
+        summary = f"完成 {self.batch_done}/{self.batch_total}"
+        if self.batch_failed:
+            summary += f"（失败 {self.batch_failed}）"
+        if self.batch_retries:
+            summary += f" | 重试 {self.batch_retries} 次"
+        if self.batch_duplicates:
+            summary += f" | 去重 {self.batch_duplicates} 个（{self.batch_duplicate_bytes / 1024 / 1024:.1f} MB）"
+        return f"{summary} | 总耗时: {total_elapsed:.2f}s | 吞吐: {throughput:.1f} 个/分钟"
+
+    def finish_batch(self, elapsed=None):
+        self.resumed_batch = False
         self.progress_bar.setVisible(False)
+        self.upload_rate_timer.stop()
+        self.upload_rate_label.setVisible(False)
         self.submit_action.setEnabled(True)
+        self.live_action.setEnabled(True)
         self.cancel_action.setEnabled(False)
+        self.clear_queue_button.setEnabled(True)
 
-        if result is None:
-            # 请求被取消
+        if self.batch_done == 0:
             self.status_bar.showMessage("就绪")
-            self.result_text.append("\n请求已被用户取消。")
-            return
+        elif elapsed is not None:
+            self.status_bar.showMessage(f"就绪 | 耗时: {elapsed:.2f}s")
+        else:
+            self.status_bar.showMessage(f"就绪 | {self.batch_summary()}")
 
-        self.status_bar.showMessage(f"就绪 | 耗时: {elapsed:.2f}s")
+    def update_live_menu(self):
+        self.live_mic_action.setEnabled(live.available())
+        if not live.available():
+            self.live_mic_action.setToolTip("需要安装 sounddevice")
 
-        if isinstance(result, Exception):
-            self.result_text.setText(f"请求异常: {str(result)}")
-            return
+    def toggle_live(self):
+        if self.live_session is not None:
+            self.stop_live()
+        else:
+            self.start_live(not live.available())
 
-        response = result
-        if response.status_code == 200:
-            resp_json = response.json()
-            transcription = resp_json.get("text", "")
-            if transcription:
-                self.result_text.setText(transcription)
+    def start_live(self, simulated):
+        """开始实时转录：simulated 为 True 时选择一个音频文件按实时速度作为模拟输入，否则从麦克风录音。"""
+        if self.live_session is not None:
+            return
+        token = self.token_edit.text().strip()
+        model_name = self.model_edit.text().strip()
+        if not token:
+            QMessageBox.warning(self, "警告", "请先输入Bearer Token。")
+            return
+        if not model_name:
+            QMessageBox.warning(self, "警告", "请先输入模型名称。")
+            return
+        if simulated:
+            path, _ = QFileDialog.getOpenFileName(self, "选择作为模拟输入的音频文件", "",
+                                                  "音频文件 (*.wav *.mp3 *.m4a *.flac *.ogg);;所有文件 (*)")
+            if not path:
+                return
+        transport.set_api_url(self.settings.value("api_url", ""))
+        self.transcription_cache = self.load_cache()
+        self.account_pool = self.load_account_pool(token)
+        try:
+            source = live.WavSource(path) if simulated else live.MicrophoneSource()
+            session = LiveSession(token, model_name, source, self.load_transcription_options(), self)
+            session.chunk_signal.connect(self.handle_live_chunk)
+            session.finished_signal.connect(self.finish_live)
+            session.transcriber.start()
+        except Exception as e:
+            QMessageBox.critical(self, "无法开始实时转录", str(e))
+            return
+        self.live_session = session
+        self.live_name = f"实时转录 {time.strftime('%H:%M:%S')}"
+        self.live_started = False
+        self.live_segments = []
+        self.live_action.setText("停止实时转录")
+        self.live_action.setIcon(self.style().standardIcon(QStyle.SP_MediaStop))
+        self.submit_action.setEnabled(False)
+        self.status_bar.showMessage(f"实时转录中：{source.label}")
+
+    def stop_live(self):
+        """停止录音，已录下的语音转录完后结束。"""
+        self.live_session.transcriber.stop()
+        self.live_action.setEnabled(False)
+        self.status_bar.showMessage("正在转录已录下的语音...")
+
+    def handle_live_chunk(self, chunk):
+        """按录音顺序追加实时分段的文本，并在状态栏显示该分段的延迟。"""
+        if chunk.error is None and chunk.piece:
+            self.live_segments.extend(chunk.segments)
+            if self.live_started:
+                self.result_model.append_text(self.live_name, chunk.piece, continued=True)
             else:
-                self.result_text.setText("未获取到转录文本。")
-        else:
-            self.result_text.setText(f"请求失败，状态码: {response.status_code}\n响应内容: {response.text}")
+                self.live_started = True
+                self.result_model.append_text(self.live_name, chunk.piece.lstrip(), self.live_segments)
+        summary = live.describe_summary(self.live_session.transcriber.latency_summary())
+        self.status_bar.showMessage(f"实时转录中 | {live.describe_chunk(chunk)} | {summary}")
+
+    def finish_live(self):
+        session = self.live_session
+        self.live_session = None
+        session.deleteLater()
+        self.live_action.setText("实时转录")
+        self.live_action.setIcon(self.style().standardIcon(QStyle.SP_MediaPlay))
+        self.live_action.setEnabled(True)
+        self.submit_action.setEnabled(True)
+        self.status_bar.showMessage(f"实时转录结束 | {live.describe_summary(session.transcriber.latency_summary())}")
 
     def closeEvent(self, event):
         self.save_settings()
+        # 先取消所有进行中的任务，并在 CLOSE_TIMEOUT 内等待其结束，之后再关闭任务记录与连接
+        deadline = time.monotonic() + CLOSE_TIMEOUT
+        workers = list(self.request_threads.values())
+        if self.dedup_thread is not None:
+            workers.append(self.dedup_thread)
+        for worker in workers:
+            worker.cancel()
+        if self.live_session is not None:
+            self.live_session.transcriber.cancel()
+        for worker in workers:
+            if isinstance(worker, QThread):
+                worker.wait(max(0, int((deadline - time.monotonic()) * 1000)))
+        if self.live_session is not None:
+            self.live_session.transcriber.wait(max(0.0, deadline - time.monotonic()))
+        if self.async_engine is not None:
+            # 取消引擎中尚未完成的 AsyncRequest 并停止事件循环
+            self.async_engine.close()
+        if self.job_store is not None:
+            self.job_store.close()
+        if "transcriber.transport" in sys.modules:
+            # 没有发送过请求时不必为关闭会话导入网络模块
+            transport.close_session()
         super().closeEvent(event)
 
     def save_settings(self):
@@ -527,7 +1782,7 @@ class TranscriptionApp(QMainWindow):
 
     def load_settings(self):
         saved_token = self.settings.value("token", "")
-        saved_model = self.settings.value("model", "FunAudioLLM/SenseVoiceSmall")
+        saved_model = self.settings.value("model", defaults.DEFAULT_MODEL)
         saved_file_path = self.settings.value("file_path", "")
 
         self.token_edit.setText(saved_token)
@@ -0,0 +1,92 @@
+"""账号池基准：单个 Token 与多个 Token 在各自速率配额下的批量吞吐对比。
+
+启动 mock_server.py 的模拟服务器，速率配额按 Token 分别计算（--rps 为每个 Token 的配额），
+分别用 1 个到 --max-keys 个 Token 转录同一批短音频，统计总耗时、吞吐、服务端返回的 429 次数与各账号的统计。
+--invalid 个 Token 设为无效（返回 401），用于观察失效账号被移出轮换；
+--account-rpm 把每个 Token 的配额告诉账号池，配额按 60 秒窗口计算，窗口内用完配额的账号不再分配请求
+（秒级的突发仍由服务端 429 与 Retry-After 调节）。
+
+用法：
+    python benchmarks/bench_accounts.py --jobs 200 --rps 5 --max-keys 4
+    python benchmarks/bench_accounts.py --jobs 200 --rps 5 --max-keys 4 --account-rpm 300
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import accounts, core, scheduler, transport  # noqa: E402
+
+
+def write_wav(path, seconds):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(os.urandom(int(seconds * 16000) * 2))
+
+
+def run(path, tokens, args):
+    pool = accounts.AccountPool(tokens, rpm=args.account_rpm) if len(tokens) > 1 else None
+    options = core.TranscriptionOptions(scheduler=scheduler.RequestScheduler(max_retries=args.max_retries),
+                                        accounts=pool)
+    failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(core.transcribe_file, tokens[0], "bench", path, options) for _ in range(args.jobs)]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                failed += 1
+    return time.perf_counter() - start, failed, pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--rps", type=float, default=5.0, help="每个 Token 的速率配额（次/秒）")
+    parser.add_argument("--max-keys", type=int, default=4)
+    parser.add_argument("--invalid", type=int, default=0, help="其中无效的 Token 个数")
+    parser.add_argument("--account-rpm", type=int, help="账号池中每个 Token 的配额（次/分钟）")
+    parser.add_argument("--delay", type=float, default=0.1)
+    parser.add_argument("--max-retries", type=int, default=10)
+    args = parser.parse_args()
+
+    tokens = [f"sk-{i:02d}-benchmark-{i:04d}" for i in range(args.max_keys)]
+    invalid = tokens[len(tokens) - args.invalid:] if args.invalid else []
+    server = start_server(delay=args.delay, rps=args.rps, retry_after=1.0, per_token=True, invalid_tokens=invalid)
+    transport.set_api_url(server.url)
+    workdir = tempfile.mkdtemp(prefix="bench_accounts_")
+    path = os.path.join(workdir, "short.wav")
+    write_wav(path, 5)
+    print(f"{args.jobs} 个任务 | {args.workers} 个并发 | 每个 Token {args.rps:g} 次/秒 | 无效 Token {len(invalid)} 个")
+    print("Token 数   总耗时    任务/秒   429   失败")
+    try:
+        keys = 1
+        while keys <= args.max_keys:
+            selected = tokens[:keys]
+            throttled = server.throttled
+            wall, failed, pool = run(path, selected, args)
+            print(f"{keys:6d} {wall:9.2f}s {args.jobs / wall:9.2f} {server.throttled - throttled:5d} {failed:6d}")
+            if pool is not None:
+                for stats in pool.stats():
+                    print(f"         {accounts.describe_account(stats)}")
+            keys *= 2
+    finally:
+        os.unlink(path)
+        os.rmdir(workdir)
+        transport.close_session()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""传输引擎基准：每个任务一个线程（requests）与单线程事件循环（asyncio + aiohttp）的对比。
+
+在 10、100、500 个并发任务下分别统计吞吐、客户端进程的峰值内存（RSS）与峰值线程数。
+每种引擎、每个并发数都在独立的子进程中运行，互不影响峰值内存的统计；
+模拟服务器在父进程中运行，--delay 模拟服务端处理耗时，使请求真正同时进行。
+
+用法：
+    python benchmarks/bench_async.py --concurrency 10 100 500 --delay 0.5
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import async_engine, core, transport  # noqa: E402
+
+ENGINES = ("threads", "asyncio")
+
+
+def thread_count():
+    """当前进程的线程数（包括非 Python 线程）。"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("Threads:"):
+                return int(line.split()[1])
+    return threading.active_count()
+
+
+def run_threads(paths, concurrency):
+    """与图形界面的多线程模式相同：每个进行中的任务占用一个线程。"""
+    errors = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(core.transcribe_file, "benchmark", "bench", path) for path in paths]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                errors += 1
+    return errors
+
+
+def run_asyncio(paths, concurrency):
+    engine = async_engine.AsyncEngine(max_connections=concurrency)
+    remaining = [len(paths)]
+    errors = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def on_done(result, elapsed):
+        with lock:
+            if result is None or isinstance(result, Exception):
+                errors[0] += 1
+            remaining[0] -= 1
+            if not remaining[0]:
+                done.set()
+
+    for path in paths:
+        engine.submit("benchmark", "bench", path, done_callback=on_done)
+    done.wait()
+    engine.close()
+    return errors[0]
+
+
+def child(engine, concurrency, jobs, path, url):
+    """在子进程中运行一组任务，输出一行 JSON 结果。"""
+    # 线程数超过连接池大小时 urllib3 会丢弃多余连接并逐个告警
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+    transport.API_URL = url
+    peak_threads = [thread_count()]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(0.02):
+            peak_threads[0] = max(peak_threads[0], thread_count())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    errors = (run_threads if engine == "threads" else run_asyncio)([path] * jobs, concurrency)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    print(json.dumps({
+        "elapsed": elapsed,
+        "errors": errors,
+        # Linux 上 ru_maxrss 的单位为 KB
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_threads": peak_threads[0],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--jobs-per-slot", type=int, default=2, help="任务数 = 并发数 × 该值")
+    parser.add_argument("--size", type=int, default=256 * 1024, help="每个任务上传的字节数")
+    parser.add_argument("--delay", type=float, default=0.5, help="模拟的服务端处理耗时（秒）")
+    parser.add_argument("--child", nargs=4, metavar=("ENGINE", "CONCURRENCY", "JOBS", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        engine, concurrency, jobs, path = args.child
+        child(engine, int(concurrency), int(jobs), path, args.url)
+        return
+
+    if not async_engine.available():
+        sys.exit("需要先安装 aiohttp")
+    server = start_server(delay=args.delay)
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+        f.write(os.urandom(args.size))
+    try:
+        print(f"上传 {args.size // 1024} KB / 任务，服务端处理耗时 {args.delay:g}s")
+        for concurrency in args.concurrency:
+            jobs = concurrency * args.jobs_per_slot
+            for engine in ENGINES:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", engine, str(concurrency), str(jobs),
+                     f.name, "--url", server.url],
+                    check=True, capture_output=True, text=True).stdout
+                stats = json.loads(output.strip().splitlines()[-1])
+                print(f"并发 {concurrency:4d} | {engine:<7} | {jobs:5d} 个任务 {stats['elapsed']:7.2f}s"
+                      f" | 吞吐 {jobs / stats['elapsed']:7.1f} 个/秒 | 峰值内存 {stats['peak_rss_mb']:6.1f} MB"
+                      f" | 峰值线程 {stats['peak_threads']:4d} | 失败 {stats['errors']}")
+    finally:
+        os.unlink(f.name)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""取消延迟基准：从调用 cancel() 到转录线程返回所需的时间。
+
+分别测试两种情况：
+  * 上传中取消：模拟服务器按 --upload-rate 限速接收较大的请求体；
+  * 等待响应时取消：请求体很小，模拟服务器收完后再等待 --delay 秒才响应。
+
+用法：
+    python benchmarks/bench_cancel.py --rounds 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import cancel, transport  # noqa: E402
+
+
+def measure(url, payload, wait_before_cancel):
+    """在后台线程中上传 payload，wait_before_cancel 秒后取消，返回取消延迟（秒）与线程结束时的异常类型。"""
+    token = cancel.CancelToken()
+    outcome = {}
+
+    def work():
+        try:
+            transport.transcribe("benchmark", "bench", ("bench.bin", payload, "application/octet-stream"),
+                                 url=url, cancel_token=token)
+            outcome["error"] = None
+        except Exception as e:
+            outcome["error"] = type(e).__name__
+
+    thread = threading.Thread(target=work)
+    thread.start()
+    time.sleep(wait_before_cancel)
+    start = time.perf_counter()
+    token.cancel()
+    thread.join()
+    return time.perf_counter() - start, outcome.get("error")
+
+
+def report(name, url, payload, wait, rounds):
+    latencies = []
+    errors = set()
+    for _ in range(rounds):
+        latency, error = measure(url, payload, wait)
+        latencies.append(latency)
+        errors.add(error)
+    latencies.sort()
+    print(f"{name}: 中位数 {statistics.median(latencies) * 1000:.1f}ms | 最大 {latencies[-1] * 1000:.1f}ms"
+          f" | 结束方式 {', '.join(sorted(str(e) for e in errors))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--upload-rate", type=float, default=512 * 1024, help="模拟上传速率（字节/秒）")
+    parser.add_argument("--size-mb", type=float, default=20, help="上传中取消时的请求体大小（MB）")
+    parser.add_argument("--delay", type=float, default=30.0, help="模拟的服务端处理耗时（秒）")
+    args = parser.parse_args()
+
+    upload_server = start_server(upload_rate=args.upload_rate)
+    slow_server = start_server(delay=args.delay)
+    report("上传中取消", upload_server.url, os.urandom(int(args.size_mb * 1024 * 1024)), 0.5, args.rounds)
+    report("等待响应时取消", slow_server.url, b"\0" * 1024, 0.5, args.rounds)
+    upload_server.shutdown()
+    slow_server.shutdown()
+    transport.close_session()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""去重基准：同一批录音以多种副本出现时，检测重复并只转录代表文件能省下多少请求与上传。
+
+生成 --recordings 段不同的合成“说话”音频（不同音高的谐波音节与停顿），每段再生成 --variants 中的副本：
+copy 为内容相同的文件，quiet 音量降低 8 dB，stereo 重采样为 44.1 kHz 立体声，trim 截取中间的一半，
+mp3 以 64 kbps 重新编码（需要 ffmpeg；模拟服务器按 16 kHz PCM 估算时间戳，代表文件为 mp3 时截取的副本会单独转录）。
+启动 mock_server.py 的模拟服务器（--segment-seconds 为响应中时间戳分段的长度），分别在不去重与去重时转录整批文件，
+报告请求数、上传字节数、总耗时与检测耗时，并按生成时的来源检查分组：副本是否都并入了原录音的组、有没有误合并。
+
+用法：
+    python benchmarks/bench_dedup.py --recordings 10 --seconds 30
+    python benchmarks/bench_dedup.py --recordings 20 --variants copy quiet stereo trim mp3 --threshold 0.3
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import audio, core, dedup, scheduler, transport  # noqa: E402
+
+VARIANTS = ("copy", "quiet", "stereo", "trim", "mp3")
+
+
+def synthesize(seconds, seed):
+    """合成一段“说话”：随机音高的谐波音节，音节之间偶尔有停顿。"""
+    np = audio.np
+    rng = np.random.default_rng(seed)
+    rate = audio.SAMPLE_RATE
+    parts = []
+    total = 0
+    while total < seconds * rate:
+        length = int(rng.uniform(0.1, 0.4) * rate)
+        t = np.arange(length) / float(rate)
+        pitch = rng.uniform(90, 250)
+        syllable = sum(rng.uniform(0.2, 1.0) / k * np.sin(2 * np.pi * pitch * k * t) for k in range(1, 12))
+        envelope = np.sin(np.pi * np.arange(length) / length)
+        parts.append(syllable * envelope * 3000 + rng.standard_normal(length) * 100)
+        total += length
+        if rng.random() < 0.2:
+            pause = int(rng.uniform(0.2, 0.8) * rate)
+            parts.append(rng.standard_normal(pause) * 20)
+            total += pause
+    return np.clip(np.concatenate(parts)[:int(seconds * rate)], -32000, 32000).astype(np.int16)
+
+
+def write_wav(path, samples, rate=audio.SAMPLE_RATE, channels=1):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+
+
+def write_variant(path, samples, variant, original):
+    np = audio.np
+    rate = audio.SAMPLE_RATE
+    if variant == "copy":
+        shutil.copyfile(original, path)
+    elif variant == "quiet":
+        write_wav(path, (samples * 0.4).astype(np.int16))
+    elif variant == "stereo":
+        resampled = audio.resample(samples, rate, 44100)
+        write_wav(path, np.repeat(resampled, 2), 44100, channels=2)
+    elif variant == "trim":
+        quarter = len(samples) // 4
+        write_wav(path, samples[quarter:len(samples) - quarter])
+    elif variant == "mp3":
+        subprocess.run(["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", original, "-b:a", "64k", path], check=True)
+
+
+def build_archive(directory, args):
+    """返回 [(路径, 来源录音序号)]，副本与原录音交错排列，与实际归档的顺序类似。"""
+    files = []
+    for recording in range(args.recordings):
+        samples = synthesize(args.seconds, recording)
+        original = os.path.join(directory, f"rec{recording:03d}.wav")
+        write_wav(original, samples)
+        files.append((original, recording))
+        for variant in args.variants:
+            extension = "mp3" if variant == "mp3" else "wav"
+            path = os.path.join(directory, f"rec{recording:03d}_{variant}.{extension}")
+            write_variant(path, samples, variant, original)
+            files.append((path, recording))
+    return files
+
+
+def check_groups(groups, source):
+    """返回 (并入原录音所在组的副本数, 副本总数, 误合并的文件数)。"""
+    merged = wrong = 0
+    for group in groups:
+        recordings = [source[path] for path in group.paths]
+        majority = max(set(recordings), key=recordings.count)
+        merged += recordings.count(majority) - 1
+        wrong += len(recordings) - recordings.count(majority)
+    copies = len(source) - len(set(source.values()))
+    return merged, copies, wrong
+
+
+def run(groups, args):
+    options = core.TranscriptionOptions(scheduler=scheduler.RequestScheduler(max_retries=args.max_retries))
+    failed = shared = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(core.transcribe_group, "benchmark", "bench", group, options) for group in groups]
+        for future in futures:
+            for _, result in future.result():
+                if isinstance(result, Exception):
+                    failed += 1
+                elif result.duplicate_of:
+                    shared += 1
+    return failed, shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recordings", type=int, default=10, help="不同录音的数量")
+    parser.add_argument("--seconds", type=float, default=30, help="每段录音的时长（秒）")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=["copy", "quiet", "stereo", "trim"])
+    parser.add_argument("--threshold", type=float, default=dedup.DEFAULT_MAX_BIT_ERROR, help="指纹位错误率阈值")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.3, help="服务端处理耗时（秒）")
+    parser.add_argument("--segment-seconds", type=float, default=1.0, help="响应中时间戳分段的长度（秒）")
+    parser.add_argument("--max-retries", type=int, default=scheduler.DEFAULT_MAX_RETRIES)
+    args = parser.parse_args()
+    audio.require_numpy()
+    if "mp3" in args.variants and not audio.ffmpeg_available():
+        parser.error("mp3 副本需要 ffmpeg")
+
+    server = start_server(delay=args.delay, segment_seconds=args.segment_seconds)
+    transport.set_api_url(server.url)
+    workdir = tempfile.mkdtemp(prefix="bench_dedup_")
+    try:
+        files = build_archive(workdir, args)
+        source = dict(files)
+        paths = [path for path, _ in files]
+        total_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+        print(f"{len(paths)} 个文件（{args.recordings} 段录音 × {1 + len(args.variants)}），共 {total_mb:.1f} MB"
+              f" | 每段 {args.seconds:g}s | 副本: {' '.join(args.variants)}")
+        print("模式      请求数   上传 MB    检测耗时    总耗时   分发  失败")
+        for label, use_dedup in (("不去重", False), ("去重", True)):
+            requests, received = server.requests, server.bytes_received
+            start = time.perf_counter()
+            groups = dedup.find_groups(paths, args.threshold, args.workers) if use_dedup else dedup.singletons(paths)
+            detect = time.perf_counter() - start
+            failed, shared = run(groups, args)
+            wall = time.perf_counter() - start
+            print(f"{label:<6} {server.requests - requests:8d} {(server.bytes_received - received) / 1024 / 1024:9.1f}"
+                  f" {detect:10.2f}s {wall:9.2f}s {shared:5d} {failed:5d}")
+        merged, copies, wrong = check_groups(groups, source)
+        print(f"分组：{merged}/{copies} 个副本并入原录音所在的组，误合并 {wrong} 个 | "
+              f"{dedup.describe_summary(dedup.plan_summary(groups))}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+        transport.close_session()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""任务数据库写入基准：逐条提交与后台批量写入的对比。
+
+模拟 N 个文件的批量任务，每个任务依次写入“进行中”和“完成（含转录文本）”两次状态更新，
+统计调用方（界面线程）花在写入上的总时间。
+
+用法：
+    python benchmarks/bench_jobstore.py --jobs 1000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcriber import jobstore  # noqa: E402
+
+TEXT = "这是一段模拟的转录文本。" * 50
+
+
+def bench_per_update(path, count):
+    """每次状态更新单独提交一个事务。"""
+    store = jobstore.JobStore(path)
+    ids = store.create_batch([f"audio_{i}.wav" for i in range(count)], "model")
+    store.close()
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    start = time.perf_counter()
+    for job_id in ids:
+        with connection:
+            connection.execute("UPDATE jobs SET status = ? WHERE id = ?", (jobstore.RUNNING, job_id))
+        with connection:
+            connection.execute("UPDATE jobs SET status = ?, text = ?, elapsed = ? WHERE id = ?",
+                               (jobstore.DONE, TEXT, 1.0, job_id))
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return elapsed
+
+
+def bench_batched(path, count):
+    """JobStore.update 只进入内存队列，由后台线程批量写入。"""
+    store = jobstore.JobStore(path)
+    ids = store.create_batch([f"audio_{i}.wav" for i in range(count)], "model")
+    start = time.perf_counter()
+    for job_id in ids:
+        store.update(job_id, status=jobstore.RUNNING)
+        store.update(job_id, status=jobstore.DONE, text=TEXT, elapsed=1.0)
+    caller = time.perf_counter() - start
+    store.close()
+    total = time.perf_counter() - start
+    return caller, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        per_update = bench_per_update(os.path.join(tmp, "per_update.sqlite3"), args.jobs)
+        caller, total = bench_batched(os.path.join(tmp, "batched.sqlite3"), args.jobs)
+    print(f"{args.jobs} 个任务，{args.jobs * 2} 次状态更新")
+    print(f"  逐条提交: {per_update * 1000:.1f}ms")
+    print(f"  批量写入: 调用方 {caller * 1000:.1f}ms | 含最终写入 {total * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
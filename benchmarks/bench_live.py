@@ -0,0 +1,110 @@
+"""实时转录基准：把合成的“说话”音频按实时速度作为模拟输入，测量每个分段从语音结束到文本交付的延迟。
+
+合成音频由 1～6 秒的有声段（随机噪声，模拟一句话）与 0.7～2 秒的静音交替组成，
+启动 mock_server.py 的模拟服务器（--delay 与 --jitter 为服务端处理耗时），
+对 --parallelism 中的每个并发数各运行一次，报告切出的分段数、延迟 p50/p95/最大值与各阶段的平均耗时，
+并检查分段是否按顺序交付。--speed 大于 1 时按倍速输入，缩短运行时间（此时分段到达得更密集）。
+
+用法：
+    python benchmarks/bench_live.py --seconds 60 --parallelism 1 4
+    python benchmarks/bench_live.py --seconds 120 --speed 4 --delay 1.0 --verbose
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import wave
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import audio, core, live, scheduler, transport  # noqa: E402
+
+
+def write_utterances(path, seconds, seed=0):
+    """写入有声段与静音交替的 WAV，返回有声段的个数。"""
+    np = audio.np
+    rng = np.random.default_rng(seed)
+    rate = audio.SAMPLE_RATE
+    parts = []
+    utterances = 0
+    total = 0
+    while total < seconds * rate:
+        gap = int(rng.uniform(0.7, 2.0) * rate)
+        parts.append((rng.standard_normal(gap) * 30).astype(np.int16))
+        length = int(rng.uniform(1.0, 6.0) * rate)
+        # 音量起伏的噪声，近似一句话的能量包络
+        envelope = 0.6 + 0.4 * np.sin(np.linspace(0, rng.uniform(4, 12) * np.pi, length)) ** 2
+        parts.append((rng.standard_normal(length) * 3000 * envelope).astype(np.int16))
+        utterances += 1
+        total += gap + length
+    parts.append(np.zeros(rate, dtype=np.int16))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(np.concatenate(parts).tobytes())
+    return utterances
+
+
+def run(path, parallelism, args):
+    options = core.TranscriptionOptions(scheduler=scheduler.RequestScheduler(max_retries=args.max_retries))
+    finished = threading.Event()
+
+    def on_chunk(chunk):
+        if args.verbose:
+            print(f"    {live.describe_chunk(chunk)}")
+
+    transcriber = live.LiveTranscriber("benchmark", "bench", live.WavSource(path, args.speed), options,
+                                       on_chunk=on_chunk, on_finished=finished.set, parallelism=parallelism,
+                                       min_silence=args.min_silence, max_chunk=args.max_chunk)
+    transcriber.start()
+    finished.wait()
+    return transcriber
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60, help="合成音频的时长（秒）")
+    parser.add_argument("--speed", type=float, default=1.0, help="输入速度（倍速）")
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[1, live.DEFAULT_PARALLELISM])
+    parser.add_argument("--min-silence", type=float, default=live.DEFAULT_MIN_SILENCE_SECONDS)
+    parser.add_argument("--max-chunk", type=float, default=live.DEFAULT_MAX_CHUNK_SECONDS)
+    parser.add_argument("--delay", type=float, default=0.5, help="服务端处理耗时（秒）")
+    parser.add_argument("--jitter", type=float, default=0.5, help="处理耗时的随机增量上限（秒）")
+    parser.add_argument("--max-retries", type=int, default=scheduler.DEFAULT_MAX_RETRIES)
+    parser.add_argument("--verbose", action="store_true", help="打印每个分段的延迟")
+    args = parser.parse_args()
+    audio.require_numpy()
+
+    server = start_server(delay=args.delay, jitter=args.jitter, seed=0)
+    transport.set_api_url(server.url)
+    workdir = tempfile.mkdtemp(prefix="bench_live_")
+    path = os.path.join(workdir, "speech.wav")
+    utterances = write_utterances(path, args.seconds)
+    print(f"模拟输入 {args.seconds:g}s（{utterances} 句）| {args.speed:g} 倍速 | 服务端耗时 {args.delay:g}"
+          f"～{args.delay + args.jitter:g}s")
+    print("并发  分段  失败  顺序    p50     p95     最大   " + "  ".join(
+        f"{live.LATENCY_LABELS[stage]}(均)" for stage in live.LATENCY_STAGES))
+    try:
+        for parallelism in args.parallelism:
+            transcriber = run(path, parallelism, args)
+            summary = transcriber.latency_summary()
+            chunks = [chunk for chunk in transcriber.chunks if chunk.error is None]
+            in_order = [chunk.index for chunk in transcriber.chunks] == list(range(len(transcriber.chunks)))
+            means = [sum(chunk.stages()[stage] for chunk in chunks) / max(len(chunks), 1)
+                     for stage in live.LATENCY_STAGES]
+            print(f"{parallelism:4d} {summary['chunks']:5d} {summary['failed']:5d}  {'是' if in_order else '否':<4}"
+                  f" {summary['p50'] or 0:6.2f}s {summary['p95'] or 0:6.2f}s {summary['max'] or 0:6.2f}s  "
+                  + "  ".join(f"{mean:8.2f}s" for mean in means))
+    finally:
+        os.unlink(path)
+        os.rmdir(workdir)
+        transport.close_session()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
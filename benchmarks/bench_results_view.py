@@ -0,0 +1,115 @@
+"""结果视图基准：把结果逐个追加到 QTextEdit 与分批插入 ResultModel + QListView 的对比。
+
+模拟多个长录音的转录结果，统计界面线程单次最长阻塞时间（决定界面是否“卡死”）、
+全部结果插入完成的总耗时，以及导出为文本的耗时。
+
+用法：
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_results_view.py --hours 10 --files 20
+"""
+import argparse
+import importlib.util
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtWidgets import QApplication, QTextEdit  # noqa: E402
+
+# 中文语音每小时约 15000 字
+CHARS_PER_HOUR = 15000
+SENTENCE = "这是一段用于测试界面性能的模拟转录文本，"
+
+
+def load_app_module():
+    spec = importlib.util.spec_from_file_location("app", os.path.join(ROOT, "SiliconFlow-Speech-Transcriber.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_transcripts(hours, files):
+    per_file = int(hours * CHARS_PER_HOUR / files)
+    text = (SENTENCE * (per_file // len(SENTENCE) + 1))[:per_file - 1] + "。"
+    return [(f"recording_{i:03d}.wav", text) for i in range(files)]
+
+
+def pump(app, until):
+    """处理事件直到 until() 为真，返回单次处理事件的最长耗时。"""
+    longest = 0.0
+    while not until():
+        start = time.perf_counter()
+        app.processEvents()
+        longest = max(longest, time.perf_counter() - start)
+    return longest
+
+
+def bench_text_edit(app, transcripts):
+    edit = QTextEdit()
+    edit.resize(900, 500)
+    edit.show()
+    app.processEvents()
+    start = time.perf_counter()
+    longest = 0.0
+    for name, text in transcripts:
+        step = time.perf_counter()
+        edit.append(f"【{name}】\n{text}\n")
+        app.processEvents()
+        longest = max(longest, time.perf_counter() - step)
+    total = time.perf_counter() - start
+    start = time.perf_counter()
+    io.StringIO().write(edit.toPlainText())
+    export = time.perf_counter() - start
+    edit.close()
+    return longest, total, export
+
+
+def bench_model_view(app, app_module, transcripts):
+    model = app_module.ResultModel()
+    view = app_module.QListView()
+    view.setModel(model)
+    view.setWordWrap(True)
+    view.setLayoutMode(app_module.QListView.Batched)
+    view.setBatchSize(app_module.RESULT_LAYOUT_BATCH)
+    view.resize(900, 500)
+    view.show()
+    app.processEvents()
+    start = time.perf_counter()
+    longest = 0.0
+    for name, text in transcripts:
+        step = time.perf_counter()
+        model.append_text(name, text)
+        longest = max(longest, time.perf_counter() - step)
+        longest = max(longest, pump(app, lambda: not model.queue))
+    total = time.perf_counter() - start
+    start = time.perf_counter()
+    io.StringIO().writelines(model.iter_text())
+    export = time.perf_counter() - start
+    view.close()
+    return longest, total, export, model.rowCount()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=10, help="转录结果对应的录音总时长（小时）")
+    parser.add_argument("--files", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    app_module = load_app_module()
+    transcripts = make_transcripts(args.hours, args.files)
+    chars = sum(len(text) for _, text in transcripts)
+    print(f"{args.files} 个文件，共 {chars} 字（约 {args.hours:g} 小时录音）")
+
+    longest, total, export = bench_text_edit(app, transcripts)
+    print(f"QTextEdit       : 最长阻塞 {longest * 1000:8.1f}ms | 插入完成 {total * 1000:8.1f}ms"
+          f" | 导出 {export * 1000:6.1f}ms")
+    longest, total, export, rows = bench_model_view(app, app_module, transcripts)
+    print(f"ResultModel 视图: 最长阻塞 {longest * 1000:8.1f}ms | 插入完成 {total * 1000:8.1f}ms"
+          f" | 导出 {export * 1000:6.1f}ms | {rows} 个条目")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""测量命令行与图形界面入口的冷启动时间，以及图形界面从启动到主窗口首次绘制的时间。
+
+用法：
+    python benchmarks/bench_startup.py -n 10
+
+每种入口启动 n 个新的 Python 进程，报告耗时的中位数与最小值，
+并确认导入 transcriber.core 时不会加载 PyQt5。
+首次绘制：在新进程中创建主窗口并显示，从启动进程到主窗口收到第一个绘制事件的时间，
+同时列出此时已经加载的网络与音频处理模块（应在首次使用时才加载）。没有显示器时使用 QT_QPA_PLATFORM=offscreen。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI_SCRIPT = os.path.join(ROOT, "SiliconFlow-Speech-Transcriber.py")
+
+ENTRY_POINTS = [
+    ("import transcriber.core", ["-c", "import transcriber.core"]),
+    ("python -m transcriber --help", ["-m", "transcriber", "--help"]),
+    ("导入图形界面脚本", ["-c", "import importlib.util as u; s = u.spec_from_file_location('app', %r); "
+                        "s.loader.exec_module(u.module_from_spec(s))" % GUI_SCRIPT]),
+]
+
+
+# 首次绘制前不应加载的模块
+DEFERRED_MODULES = ("requests", "aiohttp", "numpy", "transcriber.core", "transcriber.transport")
+
+# 在子进程中显示主窗口，收到第一个绘制事件时输出已加载的模块并退出
+FIRST_PAINT_PROBE = """
+import importlib.util, json, sys
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+spec = importlib.util.spec_from_file_location("app", %r)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+
+
+class Probe(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not app.property("painted"):
+            app.setProperty("painted", True)
+            print(json.dumps([name for name in %r if name in sys.modules]), flush=True)
+            QTimer.singleShot(0, app.quit)
+        return False
+
+
+app = QApplication(sys.argv)
+window = module.TranscriptionApp()
+probe = Probe()
+window.installEventFilter(probe)
+window.show()
+app.exec_()
+""" % (GUI_SCRIPT, DEFERRED_MODULES)
+
+
+def measure_first_paint(count):
+    """返回 (各次首次绘制耗时, 首次绘制时已加载的模块)。"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    timings = []
+    loaded = []
+    for _ in range(count):
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, "-c", FIRST_PAINT_PROBE], cwd=ROOT, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True)
+        line = process.stdout.readline()
+        timings.append(time.perf_counter() - start)
+        process.wait()
+        loaded = json.loads(line)
+    return timings, loaded
+
+
+def measure(args, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--count", type=int, default=10)
+    args = parser.parse_args()
+
+    check = subprocess.run(
+        [sys.executable, "-c", "import sys, transcriber.core; print('PyQt5' in sys.modules)"],
+        cwd=ROOT, stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    print(f"导入 transcriber.core 是否加载 PyQt5: {check.stdout.strip()}")
+
+    for label, entry_args in ENTRY_POINTS:
+        timings = measure(entry_args, args.count)
+        print(f"{label:<32} 中位数 {statistics.median(timings) * 1000:7.1f}ms"
+              f" | 最小 {min(timings) * 1000:7.1f}ms")
+
+    timings, loaded = measure_first_paint(args.count)
+    print(f"{'图形界面首次绘制':<32} 中位数 {statistics.median(timings) * 1000:7.1f}ms"
+          f" | 最小 {min(timings) * 1000:7.1f}ms")
+    print(f"首次绘制时已加载: {', '.join(loaded) if loaded else '无'}")
+
+
+if __name__ == "__main__":
+    main()
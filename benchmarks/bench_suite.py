@@ -0,0 +1,211 @@
+"""端到端基准：单个文件、批量与大文件三种路径的吞吐、延迟、CPU 与峰值内存。
+
+默认在本进程中启动 mock_server.py 的模拟服务器，每个场景在独立的子进程中运行转录，
+子进程的 CPU 时间与峰值内存（RSS）只包含客户端本身。场景：
+  * single：逐个转录 --single-count 个短音频；
+  * batch：以 --workers 个线程并发转录 --batch-count 个短音频，共享一个 RequestScheduler（重试与限流）；
+  * large：转录一个 --large-minutes 分钟的长音频，有 numpy 时在静音处分段并发上传，否则整个文件流式上传。
+
+服务端参数（处理耗时、上传带宽、并发能力、速率配额、随机 429 与错误）与 mock_server.py 相同，
+--url 可改为测试已有的服务。--json 把结果保存下来，便于比较不同版本。
+
+用法：
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --delay 0.3 --delay-per-mb 0.1 --rps 30 --error-rate 0.02 --json bench.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import audio, chunking, core, scheduler, timing, transport  # noqa: E402
+
+SCENARIOS = ("single", "batch", "large")
+SAMPLE_RATE = 16000
+
+
+def write_noise_wav(path, seconds):
+    """短音频：服务器不解码内容，随机数据即可。"""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(os.urandom(int(seconds * SAMPLE_RATE) * 2))
+
+
+def write_speech_like_wav(path, seconds):
+    """长音频：每 10 秒中约 8 秒有声、2 秒静音，使分段能在静音处切分。需要 numpy。"""
+    import numpy as np
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        rng = np.random.default_rng(0)
+        period = 10 * SAMPLE_RATE
+        for start in range(0, int(seconds * SAMPLE_RATE), period):
+            samples = (rng.standard_normal(period) * 3000).astype(np.int16)
+            samples[int(period * 0.8):] = 0
+            f.writeframes(samples.tobytes())
+
+
+def run_jobs(paths, workers, options):
+    """并发转录 paths，返回 (各任务耗时, 失败数, 请求数, 重试次数)。"""
+    latencies = []
+    failed = 0
+    requests = 0
+    retries = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(core.transcribe_file, "benchmark", "bench", path, options) for path in paths]
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception:
+                failed += 1
+                continue
+            latencies.append(result.elapsed)
+            requests += result.timing.requests
+            retries += result.retry_stats.retries
+    return latencies, failed, requests, retries
+
+
+def child(scenario, args):
+    """在子进程中运行一个场景，输出一行 JSON。"""
+    request_scheduler = scheduler.RequestScheduler(max_retries=args.max_retries)
+    if scenario == "single":
+        options = core.TranscriptionOptions(scheduler=request_scheduler)
+        paths, workers = [args.short_path] * args.single_count, 1
+    elif scenario == "batch":
+        options = core.TranscriptionOptions(scheduler=request_scheduler)
+        paths, workers = [args.short_path] * args.batch_count, args.workers
+    else:
+        chunk_settings = chunking.ChunkSettings() if audio.numpy_available() else None
+        options = core.TranscriptionOptions(chunk_settings, scheduler=request_scheduler)
+        paths, workers = [args.large_path], 1
+
+    start = time.perf_counter()
+    latencies, failed, requests, retries = run_jobs(paths, workers, options)
+    wall = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    transport.close_session()
+    print(json.dumps({
+        "scenario": scenario,
+        "jobs": len(paths),
+        "failed": failed,
+        "requests": requests,
+        "retries": retries,
+        "wall": wall,
+        "p50": timing.percentile(latencies, 0.5),
+        "p95": timing.percentile(latencies, 0.95),
+        "p99": timing.percentile(latencies, 0.99),
+        "cpu_seconds": usage.ru_utime + usage.ru_stime,
+        # Linux 上 ru_maxrss 的单位为 KB
+        "peak_rss_mb": usage.ru_maxrss / 1024,
+    }))
+
+
+def format_seconds(value):
+    return "     -" if value is None else f"{value:6.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--single-count", type=int, default=20)
+    parser.add_argument("--batch-count", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=8, help="batch 场景的并发线程数")
+    parser.add_argument("--short-seconds", type=float, default=30, help="短音频时长（秒）")
+    parser.add_argument("--large-minutes", type=float, default=30, help="长音频时长（分钟）")
+    parser.add_argument("--max-retries", type=int, default=scheduler.DEFAULT_MAX_RETRIES)
+    parser.add_argument("--json", help="把结果写入该 JSON 文件")
+    parser.add_argument("--url", help="测试已有的服务，而不是启动模拟服务器")
+
+    group = parser.add_argument_group("模拟服务器")
+    group.add_argument("--delay", type=float, default=0.2)
+    group.add_argument("--delay-per-mb", type=float, default=0.05)
+    group.add_argument("--jitter", type=float, default=0.1)
+    group.add_argument("--upload-rate", type=float, help="每个连接的上传速率上限（字节/秒）")
+    group.add_argument("--max-concurrent", type=int)
+    group.add_argument("--rps", type=float)
+    group.add_argument("--retry-after", type=float, default=1.0)
+    group.add_argument("--throttle-rate", type=float, default=0.0)
+    group.add_argument("--error-rate", type=float, default=0.0)
+
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--short-path", help=argparse.SUPPRESS)
+    parser.add_argument("--large-path", help=argparse.SUPPRESS)
+    args, _ = parser.parse_known_args()
+
+    if args.child:
+        child(args.child, args)
+        return
+
+    server = None
+    url = args.url
+    if not url:
+        server = start_server(delay=args.delay, delay_per_mb=args.delay_per_mb, jitter=args.jitter,
+                              upload_rate=args.upload_rate, max_concurrent=args.max_concurrent, rps=args.rps,
+                              retry_after=args.retry_after, throttle_rate=args.throttle_rate,
+                              error_rate=args.error_rate, seed=0)
+        url = server.url
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    short_path = os.path.join(workdir, "short.wav")
+    large_path = os.path.join(workdir, "large.wav")
+    write_noise_wav(short_path, args.short_seconds)
+    if "large" in args.scenarios:
+        if audio.numpy_available():
+            write_speech_like_wav(large_path, args.large_minutes * 60)
+        else:
+            write_noise_wav(large_path, args.large_minutes * 60)
+
+    results = []
+    env = dict(os.environ, **{transport.API_URL_ENV: url})
+    print(f"接口 {url} | 短音频 {os.path.getsize(short_path) / 1024 / 1024:.1f} MB"
+          + (f" | 长音频 {os.path.getsize(large_path) / 1024 / 1024:.1f} MB" if "large" in args.scenarios else ""))
+    print("场景    任务  失败  请求  重试    总耗时    任务/秒   请求/秒   p50    p95    p99   CPU(s)  CPU%  峰值内存")
+    try:
+        for scenario in args.scenarios:
+            before = server.requests if server else 0
+            command = [sys.executable, os.path.abspath(__file__), *sys.argv[1:], "--child", scenario,
+                       "--short-path", short_path, "--large-path", large_path]
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            # 使用模拟服务器时按服务端收到的请求数计算（包括被限流与失败的请求）
+            if server:
+                stats["requests"] = server.requests - before
+            stats["requests_per_second"] = stats["requests"] / stats["wall"]
+            stats["jobs_per_second"] = stats["jobs"] / stats["wall"]
+            results.append(stats)
+            print(f"{scenario:<7}{stats['jobs']:5d} {stats['failed']:5d} {stats['requests']:5d} {stats['retries']:5d}"
+                  f" {stats['wall']:8.2f}s {stats['jobs_per_second']:9.2f} {stats['requests_per_second']:9.2f}"
+                  f" {format_seconds(stats['p50'])} {format_seconds(stats['p95'])} {format_seconds(stats['p99'])}"
+                  f" {stats['cpu_seconds']:7.2f} {stats['cpu_seconds'] / stats['wall'] * 100:5.0f}"
+                  f" {stats['peak_rss_mb']:7.1f} MB")
+    finally:
+        for path in (short_path, large_path):
+            if os.path.exists(path):
+                os.unlink(path)
+        os.rmdir(workdir)
+        if server:
+            server.shutdown()
+
+    if server:
+        print(f"服务端：请求 {server.requests} | 429 {server.throttled} | 模拟错误 {server.failed}"
+              f" | 接收 {server.bytes_received / 1024 / 1024:.1f} MB | 连接 {server.connections}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"url": url, "args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
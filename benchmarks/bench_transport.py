@@ -0,0 +1,80 @@
+"""对比每次新建连接（requests.post）与共享Session连续请求的耗时。
+
+用法：
+    python benchmarks/bench_transport.py -n 200
+    python benchmarks/bench_transport.py -n 200 --certfile cert.pem --keyfile key.pem
+
+指定自签名证书时走 HTTPS，可以体现 TLS 握手的开销。
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import transport  # noqa: E402
+
+
+def run(label, post, count, payload):
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        response = post(("sample.wav", io.BytesIO(payload), "audio/wav"))
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:<16} 总耗时 {total:7.3f}s | 平均 {statistics.mean(latencies) * 1000:7.2f}ms"
+          f" | p50 {statistics.median(latencies) * 1000:7.2f}ms | p95 {p95 * 1000:7.2f}ms")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--count", type=int, default=200, help="每种方式的请求次数")
+    parser.add_argument("--size", type=int, default=64 * 1024, help="上传的音频字节数")
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+
+    server = start_server(certfile=args.certfile, keyfile=args.keyfile)
+    verify = not args.certfile
+    payload = os.urandom(args.size)
+    headers = {"Authorization": "Bearer benchmark"}
+
+    def fresh_post(file):
+        return requests.post(server.url, headers=headers, files={"file": file},
+                             data={"model": "bench"}, timeout=30, verify=verify)
+
+    session = transport.create_session()
+    session.verify = verify
+    # REQUESTS_CA_BUNDLE 等环境变量会覆盖 session.verify，使自签名证书的 HTTPS 测试失败
+    session.trust_env = False
+
+    def pooled_post(file):
+        return transport.post_transcription("benchmark", "bench", file, url=server.url,
+                                            timeout=30, session=session)
+
+    before = server.connections
+    fresh = run("requests.post", fresh_post, args.count, payload)
+    fresh_connections = server.connections - before
+
+    before = server.connections
+    pooled = run("共享Session", pooled_post, args.count, payload)
+    pooled_connections = server.connections - before
+
+    print(f"新建连接数: requests.post {fresh_connections} | 共享Session {pooled_connections}")
+    print(f"加速比: {fresh / pooled:.2f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
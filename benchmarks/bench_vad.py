@@ -0,0 +1,100 @@
+"""去静音（VAD）基准：统计去掉的音频比例，以及开启/关闭 VAD 时的上传字节数与端到端耗时。
+
+用法：
+    python benchmarks/bench_vad.py                      # 使用合成的示例音频（有 ffmpeg 时另有一份 MP3）
+    python benchmarks/bench_vad.py a.wav b.mp3 --upload-rate 2000000 --format ogg
+
+两种模式都经 core.transcribe_file 转录：不使用 VAD 时直接上传原文件（或 --format 预处理后的文件）；
+使用 VAD 时为解码 + 去静音 + 编码（默认 core.VAD_FORMAT）+ 上传，编码结果不比原文件小时改为上传原文件。
+模拟服务器按 --upload-rate 限制上传速率以模拟真实网络。
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import audio, core, preprocess, transport, vad  # noqa: E402
+
+
+def synthesize_sample(path, seconds=120, silence_ratio=0.4, seed=0):
+    """生成由带噪“语音”片段与低电平静音交替组成的 WAV 文件。"""
+    np = audio.np
+    rng = np.random.default_rng(seed)
+    rate = audio.SAMPLE_RATE
+    pieces = []
+    total = 0
+    while total < seconds * rate:
+        speech = int(rng.uniform(2, 8) * rate)
+        t = np.arange(speech) / rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 5) * t)
+        voice = envelope * (0.2 * np.sin(2 * np.pi * rng.uniform(120, 250) * t) + 0.05 * rng.standard_normal(speech))
+        silence = int(speech * silence_ratio / (1 - silence_ratio))
+        pieces += [voice, 0.002 * rng.standard_normal(silence)]
+        total += speech + silence
+    samples = (np.clip(np.concatenate(pieces), -1, 1) * 32767).astype(np.int16)
+    with open(path, 'wb') as f:
+        f.write(audio.wav_bytes(samples))
+
+
+def transcribe(path, fmt, min_silence):
+    """返回 (上传字节数, 端到端耗时, TranscriptionResult)。"""
+    options = core.TranscriptionOptions(preprocess_format=fmt, vad_min_silence=min_silence)
+    start = time.perf_counter()
+    result = core.transcribe_file("benchmark", "bench", path, options)
+    elapsed = time.perf_counter() - start
+    uploaded = result.uploaded_bytes if result.uploaded_bytes is not None else os.path.getsize(path)
+    return uploaded, elapsed, result
+
+
+def bench_file(path, fmt, min_silence):
+    samples = audio.load_pcm(path)
+    vad_start = time.perf_counter()
+    _, offset_map = vad.strip_silence(samples, min_silence_seconds=min_silence)
+    vad_seconds = time.perf_counter() - vad_start
+    duration = len(samples) / float(audio.SAMPLE_RATE)
+    baseline_bytes, baseline, _ = transcribe(path, fmt, None)
+    vad_bytes, with_vad, result = transcribe(path, fmt, min_silence)
+    uploaded = "原文件" if result.offset_map is None else (fmt or core.VAD_FORMAT).upper()
+
+    print(f"{os.path.basename(path)}: 时长 {duration:.1f}s | 原文件 {os.path.getsize(path) / 1024:.0f} KB"
+          f" | 去除 {offset_map.removed_fraction * 100:.1f}%"
+          f" | VAD 耗时 {vad_seconds * 1000:.1f}ms ({duration / max(vad_seconds, 1e-9):.0f}x 实时)")
+    print(f"  上传: 不使用 VAD {baseline_bytes / 1024:.0f} KB | 使用 VAD {vad_bytes / 1024:.0f} KB（{uploaded}）"
+          f" | 减少 {(1 - vad_bytes / baseline_bytes) * 100:.1f}%")
+    print(f"  端到端: 不使用 VAD {baseline:.3f}s | 使用 VAD {with_vad:.3f}s"
+          f" | 节省 {(1 - with_vad / baseline) * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="要测试的音频文件，留空时使用合成音频")
+    parser.add_argument("--upload-rate", type=float, default=2 * 1024 * 1024, help="模拟上传速率（字节/秒）")
+    parser.add_argument("--min-silence", type=float, default=vad.DEFAULT_MIN_SILENCE_SECONDS)
+    parser.add_argument("--format", choices=sorted(preprocess.FORMATS), help="上传前预处理的格式，默认不预处理")
+    args = parser.parse_args()
+    audio.require_numpy()
+
+    server = start_server(upload_rate=args.upload_rate)
+    transport.set_api_url(server.url)
+    files = args.files
+    with tempfile.TemporaryDirectory() as tmp:
+        if not files:
+            files = [os.path.join(tmp, "synthetic.wav")]
+            synthesize_sample(files[0])
+            if audio.ffmpeg_available():
+                files.append(os.path.join(tmp, "synthetic.mp3"))
+                subprocess.run(["ffmpeg", "-nostdin", "-v", "error", "-i", files[0], "-b:a", "64k", files[1]],
+                               check=True)
+        for path in files:
+            bench_file(path, args.format, args.min_silence)
+    transport.close_session()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""模拟 SiliconFlow /v1/audio/transcriptions 接口的本地服务器，用于离线基准测试。
+
+可以模拟服务端处理耗时（固定部分、按上传大小增加的部分与随机抖动）、每个连接的上传带宽、
+服务端的并发处理能力、按请求速率配额返回的 429，以及随机出现的 429 与 5xx 错误。
+--per-token 使速率配额按 Token（Authorization 头）分别计算，模拟多个账号各自的配额；
+--invalid-tokens 中的 Token 返回 401。--segment-seconds 使响应带上按固定间隔划分的 segments（时长按 16 kHz 16 位单声道 PCM 由请求体大小估算）。
+
+用法：
+    python benchmarks/mock_server.py --port 8765
+    python benchmarks/mock_server.py --delay 0.3 --delay-per-mb 0.2 --rps 20 --error-rate 0.02
+
+然后把图形界面首选项中的“API 地址”、命令行的 --api-url 或环境变量 SILICONFLOW_API_URL
+设为输出的地址即可离线测试。
+"""
+import argparse
+import json
+import random
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+TRANSCRIPTION_PATH = "/v1/audio/transcriptions"
+
+
+class MockServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # 默认的监听队列只有 5，数百个并发连接会因握手被丢弃而重试
+    request_queue_size = 1024
+
+    def __init__(self, address, text="mock transcription", upload_rate=None, delay=0.0, delay_per_mb=0.0,
+                 jitter=0.0, max_concurrent=None, rps=None, retry_after=1.0, throttle_rate=0.0, error_rate=0.0,
+                 seed=None, segment_seconds=None, per_token=False, invalid_tokens=()):
+        super().__init__(address, MockHandler)
+        self.text = text
+        self.segment_seconds = segment_seconds  # 响应中每个时间戳分段的长度（秒），None 时只返回 text
+        self.upload_rate = upload_rate  # 每个连接的上传速率上限（字节/秒），None 为不限速
+        self.delay = delay  # 收完请求体后模拟的服务端处理耗时（秒）
+        self.delay_per_mb = delay_per_mb  # 每 MB 请求体增加的处理耗时（秒）
+        self.jitter = jitter  # 处理耗时额外增加 0 到 jitter 秒的随机值
+        # 同时处理的请求数上限，超出的请求排队等待，模拟服务端的处理能力
+        self.capacity = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        # 请求速率配额（次/秒），超出时返回 429 与 Retry-After
+        self.rps = rps
+        self.per_token = per_token
+        self.invalid_tokens = set(invalid_tokens)
+        self.retry_after = retry_after
+        self.throttle_rate = throttle_rate  # 随机返回 429 的比例
+        self.error_rate = error_rate  # 随机返回 500/503 的比例
+        self.random = random.Random(seed)
+        self.stats_lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.throttled = 0
+        self.failed = 0
+        self.bytes_received = 0
+        self.requests_by_token = {}
+        self._buckets = {}  # Token（不按 Token 计算时为 None）-> [剩余令牌, 上次补充时间]
+
+    def response(self, length):
+        if not self.segment_seconds:
+            return {"text": self.text}
+        duration = length / 32000.0
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.segment_seconds, duration)
+            segments.append({"id": len(segments), "start": round(start, 3), "end": round(end, 3),
+                             "text": f"{self.text} {len(segments) + 1}。"})
+            start = end
+        return {"text": "".join(segment["text"] for segment in segments), "duration": round(duration, 3),
+                "segments": segments}
+
+    def count(self, field, amount=1):
+        with self.stats_lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def admit(self, token=None):
+        """按请求速率配额放行请求，超出时返回建议的等待秒数，放行时返回 None。"""
+        if not self.rps:
+            return None
+        with self.stats_lock:
+            now = time.monotonic()
+            bucket = self._buckets.setdefault(token if self.per_token else None, [float(self.rps), now])
+            bucket[0] = min(float(self.rps), bucket[0] + (now - bucket[1]) * self.rps)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return None
+            return max(self.retry_after, (1 - bucket[0]) / self.rps)
+
+    def roll(self, rate):
+        with self.stats_lock:
+            return rate > 0 and self.random.random() < rate
+
+    def processing_time(self, length):
+        with self.stats_lock:
+            jitter = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.delay + self.delay_per_mb * length / (1024 * 1024) + jitter
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        scheme = "https" if isinstance(self.socket, ssl.SSLSocket) else "http"
+        return f"{scheme}://{host}:{port}{TRANSCRIPTION_PATH}"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 才会保持长连接
+    protocol_version = "HTTP/1.1"
+    # 与真实的 HTTP 服务器一样关闭 Nagle 算法：否则在长连接上响应头与响应体分两次写出时，
+    # 第二次写要等客户端的延迟确认，每个请求凭空多出约 40ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        remaining = length
+        start = time.monotonic()
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1 << 16))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            if self.server.upload_rate:
+                # 模拟较慢的上行带宽
+                delay = (length - remaining) / self.server.upload_rate - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+        server = self.server
+        server.count("requests")
+        server.count("bytes_received", length - remaining)
+
+        if self.path != TRANSCRIPTION_PATH:
+            self.send_json(404, {"message": "not found"})
+            return
+        token = self.headers.get("Authorization", "").replace("Bearer ", "", 1)
+        with server.stats_lock:
+            server.requests_by_token[token] = server.requests_by_token.get(token, 0) + 1
+        if token in server.invalid_tokens:
+            self.send_json(401, {"message": "invalid token"})
+            return
+        wait = server.admit(token)
+        if wait is not None or server.roll(server.throttle_rate):
+            server.count("throttled")
+            self.send_json(429, {"message": "rate limited"}, {"Retry-After": f"{wait or server.retry_after:g}"})
+            return
+        if server.roll(server.error_rate):
+            server.count("failed")
+            self.send_json(server.random.choice((500, 503)), {"message": "simulated failure"})
+            return
+
+        if server.capacity is not None:
+            server.capacity.acquire()
+        try:
+            processing = server.processing_time(length)
+            if processing:
+                time.sleep(processing)
+        finally:
+            if server.capacity is not None:
+                server.capacity.release()
+        self.send_json(200, server.response(length))
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(host="127.0.0.1", port=0, certfile=None, keyfile=None, **kwargs):
+    """在后台线程中启动服务器并返回它，port 为 0 时自动分配端口。"""
+    server = MockServer((host, port), **kwargs)
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟转录服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--certfile", help="启用 HTTPS 时使用的证书")
+    parser.add_argument("--keyfile", help="启用 HTTPS 时使用的私钥")
+    parser.add_argument("--upload-rate", type=float, help="每个连接的上传速率上限（字节/秒）")
+    parser.add_argument("--delay", type=float, default=0.0, help="模拟的服务端处理耗时（秒）")
+    parser.add_argument("--delay-per-mb", type=float, default=0.0, help="每 MB 请求体增加的处理耗时（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="处理耗时的随机增量上限（秒）")
+    parser.add_argument("--max-concurrent", type=int, help="同时处理的请求数上限，超出的请求排队")
+    parser.add_argument("--rps", type=float, help="请求速率配额（次/秒），超出时返回 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="429 响应中的 Retry-After（秒）")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="随机返回 429 的比例")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机返回 500/503 的比例")
+    parser.add_argument("--seed", type=int, help="随机数种子，便于复现")
+    parser.add_argument("--segment-seconds", type=float, help="在响应中返回该间隔的时间戳分段")
+    parser.add_argument("--per-token", action="store_true", help="速率配额按 Token 分别计算")
+    parser.add_argument("--invalid-tokens", nargs="*", default=(), help="这些 Token 返回 401")
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.certfile, args.keyfile, upload_rate=args.upload_rate,
+                          delay=args.delay, delay_per_mb=args.delay_per_mb, jitter=args.jitter,
+                          max_concurrent=args.max_concurrent, rps=args.rps, retry_after=args.retry_after,
+                          throttle_rate=args.throttle_rate, error_rate=args.error_rate, seed=args.seed,
+                          segment_seconds=args.segment_seconds, per_token=args.per_token,
+                          invalid_tokens=args.invalid_tokens)
+    print(f"模拟服务器已启动: {server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import pytest
+import requests
+
+from transcriber import accounts, scheduler, transport
+from transcriber.cancel import CancelToken
+
+
+def responder(outcomes):
+    """返回 send(token, 模型)：outcomes 把 Token 映射为要抛出的异常（或返回值），calls 记录调用顺序。"""
+    def send(token, model):
+        send.calls.append((token, model))
+        outcome = outcomes.get(token, "ok")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    send.calls = []
+    return send
+
+
+def test_invalid_token_is_disabled_and_request_fails_over():
+    pool = accounts.AccountPool(["token-a-000000", "token-b-000000"])
+    stats = scheduler.RetryStats()
+    send = responder({"token-a-000000": transport.TranscriptionError(401, "invalid")})
+    assert pool.call(send, CancelToken(), stats) == "ok"
+    assert [token for token, _ in send.calls] == ["token-a-000000", "token-b-000000"]
+    assert stats.retries == 1 and stats.last_reason == "HTTP 401，换用其他账号"
+    assert pool.accounts[0].disabled == "HTTP 401"
+    # 停用的账号不再参与选择
+    send.calls.clear()
+    pool.call(send, CancelToken())
+    assert [token for token, _ in send.calls] == ["token-b-000000"]
+
+
+def test_throttled_account_cools_down_for_retry_after():
+    pool = accounts.AccountPool(["token-a-000000", "token-b-000000"])
+    send = responder({"token-a-000000": transport.TranscriptionError(429, "slow", retry_after=60)})
+    pool.call(send, CancelToken())
+    account = pool.accounts[0]
+    assert account.throttled == 1
+    assert account.cooldown_until - account._sent[0] == pytest.approx(60, abs=0.5)
+    assert pool.stats()[0]["state"] == "暂停"
+
+
+def test_repeated_server_errors_pause_account_with_growing_cooldown():
+    pool = accounts.AccountPool(["token-a-000000"], cooldown=10)
+    account = pool.accounts[0]
+    error = transport.TranscriptionError(503, "busy")
+
+    def fail():
+        account.cooldown_until = 0.0
+        assert pool.try_acquire()[0] is account
+        assert pool.release(account, 0.1, error)
+        return account.cooldown_until - account._sent[-1]
+
+    for _ in range(accounts.FAILURE_THRESHOLD - 1):
+        assert fail() < 0
+    assert fail() == pytest.approx(10, abs=0.5)
+    assert fail() == pytest.approx(20, abs=0.5)
+    # 成功后连续失败计数与暂停时长复位
+    account.cooldown_until = 0.0
+    pool.try_acquire()
+    pool.release(account, 0.1)
+    assert fail() < 0
+    assert fail() == pytest.approx(10, abs=0.5)
+
+
+def test_request_errors_are_not_retried_on_other_accounts():
+    pool = accounts.AccountPool(["token-a-000000", "token-b-000000"])
+    send = responder({"token-a-000000": transport.TranscriptionError(400, "unsupported format")})
+    with pytest.raises(transport.TranscriptionError):
+        pool.call(send, CancelToken())
+    assert len(send.calls) == 1
+
+
+def test_last_error_is_raised_when_every_account_fails():
+    tokens = ["token-a-000000", "token-b-000000"]
+    pool = accounts.AccountPool(tokens)
+    send = responder({token: requests.ConnectionError(token) for token in tokens})
+    with pytest.raises(requests.ConnectionError, match="token-b-000000"):
+        pool.call(send, CancelToken())
+    assert all(account.in_flight == 0 for account in pool.accounts)
+
+
+def test_all_disabled_pool_raises():
+    pool = accounts.AccountPool(["token-a-000000"])
+    pool.accounts[0].disabled = "HTTP 401"
+    with pytest.raises(RuntimeError):
+        pool.call(responder({}), CancelToken())
+
+
+def test_fallback_model_is_used_only_when_primary_accounts_are_unavailable():
+    pool = accounts.AccountPool(["token-a-000000"], fallback_models=["backup-model"])
+    models_used = set()
+    send = responder({})
+    assert accounts.call(send, "unused", "main-model", pool=pool, cancel_token=CancelToken(),
+                         models_used=models_used) == "ok"
+    assert send.calls == [("token-a-000000", "main-model")] and not models_used
+
+    pool.accounts[0].disabled = "HTTP 401"
+    accounts.call(send, "unused", "main-model", pool=pool, cancel_token=CancelToken(), models_used=models_used)
+    assert send.calls[-1] == ("token-a-000000", "backup-model")
+    assert models_used == {"backup-model"}
+
+
+def test_faster_and_less_loaded_accounts_are_preferred():
+    pool = accounts.AccountPool(["token-a-000000", "token-b-000000"])
+    fast, slow = pool.accounts
+    fast.latency, slow.latency = 0.1, 1.0
+    assert pool.try_acquire()[0] is fast
+    # 快的账号已有多个进行中的请求时，慢的账号预计更早完成
+    fast.in_flight = 20
+    assert pool.try_acquire()[0] is slow
+
+
+def test_quota_exhausted_account_reports_wait_time():
+    pool = accounts.AccountPool(["token-a-000000"], rpm=2)
+    assert pool.try_acquire()[0] is not None
+    assert pool.try_acquire()[0] is not None
+    account, wait = pool.try_acquire()
+    assert account is None and 59 < wait <= 60
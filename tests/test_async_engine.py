@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import accounts, async_engine, core, scheduler  # noqa: E402
+
+
+def run_jobs(server, paths, options, token="test"):
+    """用异步引擎转录 paths，返回各文件的 TranscriptionResult 或异常。"""
+    engine = async_engine.AsyncEngine(max_connections=8, url=server.url)
+    results = {}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def on_done(path):
+        def callback(result, elapsed):
+            with lock:
+                results[path] = result
+                if len(results) == len(paths):
+                    done.set()
+        return callback
+
+    try:
+        for path in paths:
+            engine.submit(token, "test", path, options, done_callback=on_done(path))
+        assert done.wait(30)
+    finally:
+        engine.close()
+    return [results[path] for path in paths]
+
+
+@pytest.fixture
+def audio_files(tmp_path):
+    paths = []
+    for index in range(12):
+        path = tmp_path / f"audio{index}.mp3"
+        path.write_bytes(bytes([index]) * 20000)
+        paths.append(str(path))
+    return paths
+
+
+def test_throttled_requests_are_retried_through_scheduler(audio_files):
+    server = start_server(throttle_rate=0.3, retry_after=0.05, seed=1)
+    try:
+        options = core.TranscriptionOptions(scheduler=scheduler.RequestScheduler(max_retries=20, base_delay=0.01))
+        results = run_jobs(server, audio_files, options)
+    finally:
+        server.shutdown()
+    assert all(isinstance(result, core.TranscriptionResult) for result in results)
+    assert server.throttled > 0
+    assert sum(result.retry_stats.retries for result in results) == server.throttled
+    # 429 使令牌桶从不限速转为限速
+    assert options.scheduler.bucket.rate is not None
+
+
+def test_invalid_token_fails_over_to_other_account(audio_files):
+    server = start_server(invalid_tokens=["bad-token-0000"])
+    pool = accounts.AccountPool(["bad-token-0000", "good-token-0000"])
+    try:
+        results = run_jobs(server, audio_files, core.TranscriptionOptions(accounts=pool))
+    finally:
+        server.shutdown()
+    assert all(isinstance(result, core.TranscriptionResult) for result in results)
+    bad, good = pool.stats()
+    assert bad["state"] == "HTTP 401"
+    assert good["successes"] == len(audio_files)
+    assert server.requests_by_token["good-token-0000"] == len(audio_files)
+
+
+def test_non_retryable_error_is_reported(audio_files):
+    server = start_server(invalid_tokens=["test"])
+    try:
+        options = core.TranscriptionOptions(scheduler=scheduler.RequestScheduler(max_retries=3, base_delay=0.01))
+        results = run_jobs(server, audio_files[:2], options)
+    finally:
+        server.shutdown()
+    assert [result.status_code for result in results] == [401, 401]
+    assert server.requests == 2
@@ -0,0 +1,129 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_server import start_server
+from transcriber import cancel, transport
+
+# 取消后转录线程应在该时间内返回（秒）
+MAX_CANCEL_LATENCY = 0.2
+
+
+def cancel_after(url, payload, wait=0.3):
+    """在后台线程中上传 payload，wait 秒后取消，返回 (取消延迟, 线程结束时的异常)。"""
+    token = cancel.CancelToken()
+    outcome = {}
+
+    def work():
+        try:
+            transport.transcribe("test", "test", ("test.bin", payload, "application/octet-stream"),
+                                 url=url, cancel_token=token)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    time.sleep(wait)
+    start = time.perf_counter()
+    token.cancel()
+    thread.join(5)
+    assert not thread.is_alive()
+    return time.perf_counter() - start, outcome.get("error")
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    yield
+    transport.close_session()
+
+
+@pytest.fixture
+def stalled_listener():
+    """只监听、从不 accept 的端口：积压队列占满后，新的连接停在 TCP 握手中。"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(0)
+    fillers = []
+    for _ in range(4):
+        filler = socket.socket()
+        filler.setblocking(False)
+        filler.connect_ex(server.getsockname())
+        fillers.append(filler)
+    time.sleep(0.1)
+    yield server.getsockname()[1]
+    for sock in fillers + [server]:
+        sock.close()
+
+
+@pytest.fixture
+def silent_tls_server():
+    """接受 TCP 连接但从不回应 TLS 握手的服务器。"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(8)
+    accepted = []
+    stop = threading.Event()
+
+    def accept():
+        server.settimeout(0.1)
+        while not stop.is_set():
+            try:
+                accepted.append(server.accept()[0])
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    yield server.getsockname()[1]
+    stop.set()
+    thread.join()
+    for sock in accepted + [server]:
+        sock.close()
+
+
+def test_cancel_during_upload():
+    server = start_server(upload_rate=256 * 1024)
+    try:
+        latency, error = cancel_after(server.url, os.urandom(8 * 1024 * 1024))
+    finally:
+        server.shutdown()
+    assert isinstance(error, cancel.TranscriptionCancelled)
+    assert latency < MAX_CANCEL_LATENCY
+
+
+def test_cancel_while_waiting_for_response():
+    server = start_server(delay=30.0)
+    try:
+        latency, error = cancel_after(server.url, b"\0" * 1024)
+    finally:
+        server.shutdown()
+    assert isinstance(error, cancel.TranscriptionCancelled)
+    assert latency < MAX_CANCEL_LATENCY
+
+
+def test_cancel_during_tcp_connect(stalled_listener):
+    latency, error = cancel_after(f"http://127.0.0.1:{stalled_listener}/v1/audio/transcriptions", b"\0" * 1024)
+    assert isinstance(error, cancel.TranscriptionCancelled)
+    assert latency < MAX_CANCEL_LATENCY
+
+
+def test_cancel_during_tls_handshake(silent_tls_server):
+    latency, error = cancel_after(f"https://127.0.0.1:{silent_tls_server}/v1/audio/transcriptions", b"\0" * 1024)
+    assert isinstance(error, cancel.TranscriptionCancelled)
+    assert latency < MAX_CANCEL_LATENCY
+
+
+def test_run_returns_result_and_discards_late_result():
+    token = cancel.CancelToken()
+    assert token.run(lambda: 42) == 42
+
+    discarded = threading.Event()
+    release = threading.Event()
+    threading.Timer(0.05, token.cancel).start()
+    with pytest.raises(cancel.TranscriptionCancelled):
+        token.run(lambda: release.wait(5) and "socket", discard=lambda result: discarded.set())
+    release.set()
+    assert discarded.wait(1)
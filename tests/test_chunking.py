@@ -0,0 +1,84 @@
+import pytest
+
+from transcriber import chunking
+
+
+def test_merge_overlap_removes_repeated_text():
+    left = "今天我们讨论一下项目的进度安排和下周的计划"
+    right = "下周的计划主要包括测试和发布"
+    assert chunking.merge_overlap(left, right) == "今天我们讨论一下项目的进度安排和下周的计划主要包括测试和发布"
+
+
+def test_merge_overlap_without_match_adds_space_between_words():
+    assert chunking.merge_overlap("hello world", "good morning") == "hello world good morning"
+    assert chunking.merge_overlap("你好", "世界") == "你好世界"
+    assert chunking.merge_overlap("hello", "，世界") == "hello，世界"
+
+
+def test_merge_overlap_ignores_short_coincidental_match():
+    # 少于 MIN_OVERLAP_MATCH 个字符的相同部分不视为重叠
+    assert chunking.merge_overlap("我们走吧", "吧台很高") == "我们走吧吧台很高"
+
+
+def test_stitch_pieces_concatenate_to_stitched_text():
+    texts = ["the quick brown fox jumps", "fox jumps over the lazy", "", "  ", "the lazy dog sleeps"]
+    pieces = chunking.stitch_pieces(texts)
+    assert len(pieces) == len(texts)
+    assert pieces[2] == pieces[3] == ""
+    assert "".join(pieces) == chunking.stitch_texts(texts) == "the quick brown fox jumps over the lazy dog sleeps"
+
+
+def test_stitch_pieces_trims_earlier_pieces_when_overlap_spans_them():
+    # 第三段与前两段拼接结果的末尾重叠，重叠部分跨越了第二段的全部内容
+    pieces = chunking.stitch_pieces(["一二三四五六", "七八", "五六七八九十"])
+    assert "".join(pieces) == "一二三四五六七八九十"
+    assert pieces == ["一二三四五六", "七八", "九十"]
+
+
+def test_continuation():
+    assert chunking.continuation("hello", "world") == " world"
+    assert chunking.continuation("你好", "世界") == "世界"
+    assert chunking.continuation("", "world") == "world"
+
+
+def test_merge_responses_offsets_timestamps_and_drops_overlap_duplicates():
+    rate = 10
+    # 两段：[0, 100) 与 [80, 200)，重叠 2 秒，以 9 秒为界
+    segments = [(0, 100), (80, 200)]
+    responses = [
+        {"text": "第一句第二句重叠句子", "segments": [{"start": 0, "end": 4, "text": "第一句"},
+                                               {"start": 4, "end": 8, "text": "第二句"},
+                                               {"start": 8, "end": 9.5, "text": "重叠句子"}]},
+        {"text": "重叠句子第三句", "segments": [{"start": 0, "end": 1.5, "text": "重叠句子"},
+                                          {"start": 1.5, "end": 12, "text": "第三句"}]},
+    ]
+    merged = chunking.merge_responses(responses, segments, overlap_seconds=2, sample_rate=rate)
+    assert merged["text"] == "第一句第二句重叠句子第三句"
+    assert merged["duration"] == 20.0
+    assert [(s["start"], s["end"], s["text"]) for s in merged["segments"]] == [
+        (0.0, 4.0, "第一句"), (4.0, 8.0, "第二句"), (8.0, 9.5, "重叠句子"), (9.5, 20.0, "第三句")]
+
+
+def test_merge_responses_without_timestamps_uses_chunk_ranges():
+    merged = chunking.merge_responses([{"text": "前半部分内容"}, {"text": "后半部分"}], [(0, 100), (80, 200)],
+                                      overlap_seconds=2, sample_rate=10)
+    assert [(s["start"], s["end"], s["text"]) for s in merged["segments"]] == [
+        (0.0, 9.0, "前半部分内容"), (9.0, 20.0, "后半部分")]
+
+
+def test_plan_chunks_cuts_at_quiet_points_with_overlap():
+    np = pytest.importorskip("numpy")
+    rate = 1000
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(60 * rate) * 3000).astype(np.int16)
+    # 在 9.5 秒与 19 秒附近放两段静音，切分点应落在静音中
+    for quiet in (9.5, 19.0):
+        samples[int((quiet - 0.3) * rate):int((quiet + 0.3) * rate)] = 0
+    plan = chunking.plan_chunks(samples, rate, chunk_seconds=10, overlap_seconds=1)
+    assert plan[0][0] == 0 and plan[-1][1] == len(samples)
+    cuts = [end for _, end in plan[:-1]]
+    assert abs(cuts[0] / rate - 9.5) < 0.3
+    assert abs(cuts[1] / rate - 19.0) < 0.3
+    for (_, end), (start, _) in zip(plan, plan[1:]):
+        assert end - start == rate
+    assert all(end - start <= 12 * rate for start, end in plan)
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from benchmarks.bench_dedup import synthesize, write_variant, write_wav  # noqa: E402
+from transcriber import dedup  # noqa: E402
+from transcriber.cancel import CancelToken, TranscriptionCancelled  # noqa: E402
+
+SECONDS = 20
+
+
+@pytest.fixture(scope="module")
+def archive(tmp_path_factory):
+    """两段不同的录音及其副本，返回 {名称: 路径}。"""
+    directory = tmp_path_factory.mktemp("dedup")
+    paths = {}
+    for recording in range(2):
+        samples = synthesize(SECONDS, recording)
+        original = str(directory / f"rec{recording}.wav")
+        write_wav(original, samples)
+        paths[f"rec{recording}"] = original
+        for variant in ("copy", "quiet", "stereo", "trim"):
+            path = str(directory / f"rec{recording}_{variant}.wav")
+            write_variant(path, samples, variant, original)
+            paths[f"rec{recording}_{variant}"] = path
+    return paths
+
+
+def group_names(groups, paths):
+    names = {path: name for name, path in paths.items()}
+    return [sorted(names[path] for path in group.paths) for group in groups]
+
+
+def test_variants_are_grouped_with_their_original(archive):
+    order = sorted(archive)
+    groups = dedup.find_groups([archive[name] for name in order], workers=2)
+    assert group_names(groups, archive) == [
+        ["rec0", "rec0_copy", "rec0_quiet", "rec0_stereo", "rec0_trim"],
+        ["rec1", "rec1_copy", "rec1_quiet", "rec1_stereo", "rec1_trim"],
+    ]
+
+
+def test_copies_carry_alignment(archive):
+    groups = dedup.find_groups([archive["rec0"], archive["rec0_copy"], archive["rec0_trim"], archive["rec0_quiet"]])
+    assert len(groups) == 1
+    group = groups[0]
+    # 时长完整的成员中原文件与副本一样小，保留第一个遇到的作为代表文件
+    assert group.representative.path in (archive["rec0"], archive["rec0_copy"])
+    copies = {os.path.basename(duplicate.path): duplicate for duplicate in group.copies}
+    exact = [duplicate for duplicate in copies.values() if duplicate.exact]
+    assert len(exact) == 1 and exact[0].offset == 0.0
+    trim = copies["rec0_trim.wav"]
+    assert trim.trimmed
+    assert trim.offset == pytest.approx(SECONDS / 4, abs=0.1)
+    quiet = copies["rec0_quiet.wav"]
+    assert not quiet.trimmed and not quiet.exact and abs(quiet.offset) < 0.1
+
+
+def test_unreadable_and_undecodable_files_are_kept_apart(archive, tmp_path):
+    garbage = tmp_path / "garbage.wav"
+    garbage.write_bytes(b"not audio" * 1000)
+    twin = tmp_path / "garbage_copy.wav"
+    twin.write_bytes(garbage.read_bytes())
+    missing = str(tmp_path / "missing.wav")
+    paths = [archive["rec1"], str(garbage), missing, str(twin)]
+    groups = dedup.find_groups(paths)
+    assert [group.paths for group in groups] == [[archive["rec1"]], [str(garbage), str(twin)], [missing]]
+    # 无法解码的文件只能与内容完全相同的文件合并
+    assert groups[1].copies[0].exact
+
+
+def test_find_groups_can_be_cancelled(archive):
+    token = CancelToken()
+    token.cancel()
+    with pytest.raises(TranscriptionCancelled):
+        dedup.find_groups(list(archive.values()), cancel_token=token)
+
+
+def test_fan_out_slices_timestamps_for_trimmed_copy():
+    data = {"text": "一二三", "duration": 12.0,
+            "segments": [{"start": 0.0, "end": 4.0, "text": "一"}, {"start": 4.0, "end": 8.0, "text": "二"},
+                         {"start": 8.0, "end": 12.0, "text": "三"}]}
+    fingerprint = dedup.Fingerprint("copy.wav", 1, "digest", duration=4.0)
+    trimmed = dedup.DuplicateCopy(fingerprint, offset=4.0, trimmed=True)
+    assert dedup.fan_out(data, trimmed) == {
+        "text": "二", "duration": 4.0, "segments": [{"start": 0.0, "end": 4.0, "text": "二"}]}
+    # 截取边界落在分段中间时无法确定归属
+    assert dedup.fan_out(data, dedup.DuplicateCopy(fingerprint, offset=2.0, trimmed=True)) is None
+    # 结果没有时间戳时无法截取
+    assert dedup.fan_out({"text": "一二三"}, trimmed) is None
+
+
+def test_fan_out_shifts_full_length_copy():
+    data = {"text": "一二", "duration": 8.0,
+            "segments": [{"start": 0.0, "end": 4.0, "text": "一"}, {"start": 4.0, "end": 8.0, "text": "二"}]}
+    fingerprint = dedup.Fingerprint("copy.wav", 1, "digest", duration=7.5)
+    shifted = dedup.fan_out(data, dedup.DuplicateCopy(fingerprint, offset=0.5))
+    assert [(s["start"], s["end"]) for s in shifted["segments"]] == [(0.0, 3.5), (3.5, 7.5)]
+    assert shifted["duration"] == 7.5
+    assert data["segments"][0]["start"] == 0.0
+    exact = dedup.fan_out(data, dedup.DuplicateCopy(fingerprint, exact=True))
+    assert exact == data and exact is not data
+
+
+def test_plan_summary_counts_saved_requests_and_bytes():
+    representative = dedup.Fingerprint("a.wav", 100, "a")
+    copies = [dedup.DuplicateCopy(dedup.Fingerprint("b.wav", 80, "b")),
+              dedup.DuplicateCopy(dedup.Fingerprint("c.wav", 30, "c"), trimmed=True)]
+    groups = [dedup.DuplicateGroup(representative, copies), dedup.DuplicateGroup(dedup.Fingerprint("d.wav", 5, "d"))]
+    assert dedup.plan_summary(groups) == {"files": 4, "groups": 2, "copies": 2, "trimmed": 1,
+                                          "saved_requests": 2, "saved_bytes": 110}
@@ -0,0 +1,78 @@
+import os
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from transcriber import audio, live, vad  # noqa: E402
+
+RATE = audio.SAMPLE_RATE
+
+
+def utterances_wav(path, count, speech=0.5, gap=1.5, lead=1.0, seed=0):
+    """写入 lead 秒噪声后接 count 次（speech 秒正弦音 + gap 秒噪声）的 WAV，返回各段语音的 (起点, 终点) 采样。"""
+    rng = np.random.default_rng(seed)
+    parts = [rng.standard_normal(int(lead * RATE)) * 30]
+    spans = []
+    position = len(parts[0])
+    for i in range(count):
+        t = np.arange(int(speech * RATE)) / float(RATE)
+        parts.append(np.sin(2 * np.pi * (200 + 20 * i) * t) * 8000)
+        spans.append((position, position + len(t)))
+        position += len(t)
+        parts.append(rng.standard_normal(int(gap * RATE)) * 30)
+        position += len(parts[-1])
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(RATE)
+        f.writeframes(np.concatenate(parts).astype("<i2").tobytes())
+    return spans
+
+
+def detect(samples, detector, block_frames=3):
+    """与 LiveTranscriber 一样按整数帧分块输入。"""
+    block = block_frames * detector.frame_length
+    usable = len(samples) // detector.frame_length * detector.frame_length
+    chunks = []
+    for offset in range(0, usable, block):
+        chunks.extend(detector.feed(samples[offset:min(offset + block, usable)]))
+    return chunks + detector.flush()
+
+
+def test_separated_utterances_give_one_chunk_each(tmp_path):
+    path = os.path.join(tmp_path, "speech.wav")
+    spans = utterances_wav(path, 12)
+    chunks = detect(audio.load_pcm(path), live.ChunkDetector(min_silence=0.6))
+
+    assert len(chunks) == len(spans)
+    speech_ends = [speech_end for _, _, speech_end in chunks]
+    assert speech_ends == sorted(speech_ends)
+    tolerance = 2 * int(vad.FRAME_SECONDS * RATE)
+    for (start, end, speech_end), (speech_start, speech_stop) in zip(chunks, spans):
+        assert start <= speech_start < speech_end <= end
+        assert abs(speech_end - speech_stop) <= tolerance
+
+
+def test_silence_after_cut_is_not_carried_into_next_chunk(tmp_path):
+    path = os.path.join(tmp_path, "speech.wav")
+    utterances_wav(path, 3)
+    detector = live.ChunkDetector(min_silence=0.6)
+    samples = audio.load_pcm(path)
+    frame = detector.frame_length
+    usable = len(samples) // frame * frame
+    for offset in range(0, usable, frame):
+        detector.feed(samples[offset:offset + frame])
+        if detector._start is None:
+            assert detector._flags == [] and detector._energies == []
+
+
+def test_long_speech_is_split_at_max_chunk():
+    rng = np.random.default_rng(1)
+    t = np.arange(int(40 * RATE)) / float(RATE)
+    samples = np.concatenate([rng.standard_normal(RATE) * 30, np.sin(2 * np.pi * 220 * t) * 8000]).astype(np.int16)
+    chunks = detect(samples, live.ChunkDetector(max_chunk=15.0))
+    assert len(chunks) >= 3
+    assert all((end - start) / float(RATE) <= 15.0 + 0.5 for start, end, _ in chunks)
+    assert all(chunks[i][1] <= chunks[i + 1][0] for i in range(len(chunks) - 1))
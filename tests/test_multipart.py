@@ -0,0 +1,59 @@
+import email.parser
+import email.policy
+import io
+
+import pytest
+
+from transcriber import multipart
+
+# 文件名中的引号、回车与换行
+TRICKY_NAME = 'Interview "final"\r\nX-Evil: 1.wav'
+
+
+def parse(encoder):
+    """用 email 解析 multipart 请求体，返回各部分（email.message.EmailMessage）。"""
+    body = encoder.read()
+    assert len(body) == len(encoder)
+    head = f"Content-Type: {encoder.content_type}\r\n\r\n".encode("ascii")
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(head + body)
+    assert message.is_multipart()
+    return list(message.iter_parts())
+
+
+def test_fields_and_file_round_trip():
+    content = bytes(range(256)) * 100
+    encoder = multipart.MultipartEncoder({"model": "test-model"}, {"file": ("a.wav", content, "audio/wav")},
+                                         chunk_size=1000)
+    field, upload = parse(encoder)
+    assert field.get_param("name", header="content-disposition") == "model"
+    assert field.get_content() == "test-model"
+    assert upload.get_filename() == "a.wav"
+    assert upload.get_content_type() == "audio/wav"
+    assert upload.get_payload(decode=True) == content
+
+
+def test_filename_quotes_and_newlines_are_escaped():
+    encoder = multipart.MultipartEncoder({"model": "m"}, {"file": (TRICKY_NAME, io.BytesIO(b"data"), "audio/wav")})
+    _, upload = parse(encoder)
+    # 不会插入额外的头部，文件名按 urllib3 的方式转义
+    assert upload.keys() == ["Content-Disposition", "Content-Type"]
+    assert upload.get_filename() == "Interview %22final%22%0D%0AX-Evil: 1.wav"
+    assert upload.get_payload(decode=True) == b"data"
+
+
+def test_escaping_matches_requests_files_upload():
+    fields = pytest.importorskip("urllib3.fields")
+    expected = fields.format_multipart_header_param("filename", TRICKY_NAME)
+    encoder = multipart.MultipartEncoder({}, {"file": (TRICKY_NAME, b"", "audio/wav")})
+    assert f"; {expected}\r\n".encode("utf-8") in encoder.read()
+
+
+def test_progress_is_reported_per_chunk():
+    reports = []
+    encoder = multipart.MultipartEncoder({}, {"file": ("a.wav", b"x" * 5000, "audio/wav")}, chunk_size=2048,
+                                         progress_callback=lambda sent, total: reports.append((sent, total)))
+    while encoder.read(4096):
+        pass
+    assert [sent for sent, _ in reports] == sorted(sent for sent, _ in reports)
+    assert reports[-1] == (len(encoder), len(encoder))
+    assert all(total == len(encoder) for _, total in reports)
@@ -0,0 +1,128 @@
+import time
+
+import pytest
+import requests
+
+from transcriber import scheduler, transport
+from transcriber.cancel import CancelToken, TranscriptionCancelled
+
+
+def failing(errors, result="ok"):
+    """依次抛出 errors 中的异常，之后返回 result；calls 记录调用次数。"""
+    errors = list(errors)
+
+    def send():
+        send.calls += 1
+        if errors:
+            raise errors.pop(0)
+        return result
+    send.calls = 0
+    return send
+
+
+def test_backoff_is_bounded_exponential_with_full_jitter():
+    policy = scheduler.RequestScheduler(base_delay=1.0, max_delay=8.0)
+    for attempt in range(6):
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        cap = min(8.0, 2 ** attempt)
+        assert all(0 <= delay <= cap for delay in delays)
+        # 完全随机抖动：延迟分布在整个区间内，而不是集中在上限
+        assert min(delays) < cap / 4 and max(delays) > cap * 3 / 4
+
+
+def test_backoff_respects_retry_after():
+    policy = scheduler.RequestScheduler(base_delay=0.5)
+    delays = [policy.backoff(0, retry_after=3.0) for _ in range(100)]
+    assert all(3.0 <= delay <= 3.5 for delay in delays)
+
+
+def test_call_retries_retryable_errors_and_records_stats():
+    policy = scheduler.RequestScheduler(base_delay=0.001)
+    stats = scheduler.RetryStats()
+    send = failing([transport.TranscriptionError(503, "busy"), requests.ConnectionError("reset")])
+    assert policy.call(send, stats=stats) == "ok"
+    assert send.calls == 3
+    assert stats.retries == 2
+    assert stats.last_reason == "ConnectionError"
+
+
+def test_call_does_not_retry_client_errors():
+    policy = scheduler.RequestScheduler(base_delay=0.001)
+    send = failing([transport.TranscriptionError(400, "bad request")])
+    with pytest.raises(transport.TranscriptionError):
+        policy.call(send)
+    assert send.calls == 1
+
+
+def test_call_gives_up_after_max_retries():
+    policy = scheduler.RequestScheduler(max_retries=2, base_delay=0.001)
+    send = failing([transport.TranscriptionError(500, "error")] * 5)
+    with pytest.raises(transport.TranscriptionError):
+        policy.call(send)
+    assert send.calls == 3
+    assert policy.limiter.active == 0
+
+
+def test_retry_after_pauses_all_requests():
+    policy = scheduler.RequestScheduler(base_delay=0.001)
+    delay = policy.retry_delay(0, transport.TranscriptionError(429, "slow down", retry_after=0.2))
+    assert delay >= 0.2
+    assert 0.1 < policy.pause_remaining() <= 0.2
+    assert policy.before_attempt() > 0.1
+
+
+def test_throttle_halves_limits_once_per_burst():
+    policy = scheduler.RequestScheduler(max_concurrency=16)
+    sent_at = time.monotonic()
+    error = transport.TranscriptionError(429, "slow down")
+    # 同一轮突发中发出的多个请求先后收到 429，只降一次
+    for _ in range(3):
+        policy.on_response(sent_at, error)
+    assert policy.limiter.limit == 8
+    # 降速之后才发出的请求再次被限流时继续降低
+    policy.on_response(time.monotonic() + 1, error)
+    assert policy.limiter.limit == 4
+
+
+def test_success_recovers_concurrency():
+    policy = scheduler.RequestScheduler(max_concurrency=4)
+    policy.on_response(time.monotonic(), transport.TranscriptionError(429, "slow down"))
+    assert policy.limiter.limit == 2
+    for _ in range(10):
+        policy.on_response(time.monotonic())
+    assert policy.limiter.limit == 4
+
+
+def test_should_retry_accepts_custom_network_errors():
+    policy = scheduler.RequestScheduler(max_retries=1)
+    assert policy.should_retry(requests.Timeout(), 0)
+    assert not policy.should_retry(requests.Timeout(), 1)
+    assert not policy.should_retry(TimeoutError(), 0)
+    assert policy.should_retry(TimeoutError(), 0, network_errors=(TimeoutError,))
+
+
+def test_token_bucket_limits_and_recovers_rate():
+    bucket = scheduler.TokenBucket(rate=10)
+    assert bucket.try_acquire() == 0
+    waits = [bucket.try_acquire() for _ in range(20)]
+    assert any(wait > 0 for wait in waits)
+    bucket.throttle()
+    assert bucket.rate == 5
+    for _ in range(100):
+        bucket.recover()
+    assert bucket.rate == 10
+
+
+def test_backoff_wait_can_be_cancelled():
+    policy = scheduler.RequestScheduler(base_delay=30.0)
+    token = CancelToken()
+    send = failing([transport.TranscriptionError(503, "busy")])
+
+    def send_and_cancel():
+        # 请求失败后进入长时间退避，此时取消应立即返回
+        token.cancel()
+        return send()
+    start = time.monotonic()
+    with pytest.raises(TranscriptionCancelled):
+        policy.call(send_and_cancel, token)
+    assert time.monotonic() - start < 1.0
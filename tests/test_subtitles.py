@@ -0,0 +1,72 @@
+import io
+import json
+
+import pytest
+
+from transcriber import subtitles
+
+SEGMENTS = [(0.0, 1.5, "第一句"), (1.5, 3723.25, "第二句")]
+
+
+def test_from_response_uses_segments_and_skips_empty_text():
+    data = {"text": "全文", "segments": [{"start": 0, "end": 1.2, "text": " 你好 "},
+                                          {"start": 1.2, "end": 2, "text": " "},
+                                          {"start": 2, "text": "没有终点"}]}
+    assert subtitles.from_response(data) == [(0.0, 1.2, "你好"), (2.0, 2.0, "没有终点")]
+
+
+def test_from_response_without_timestamps_covers_whole_audio():
+    assert subtitles.from_response({"text": " 全文 ", "duration": 4.0}) == [(0.0, 4.0, "全文")]
+    assert subtitles.from_response({"text": ""}) == []
+    assert subtitles.from_response({}) == []
+
+
+def test_remap_converts_segment_times_in_place():
+    data = {"segments": [{"start": 1.0, "end": 2.0, "text": "a"}, {"start": 3.0, "end": None, "text": "b"}]}
+    subtitles.remap(data, lambda seconds: seconds + 10)
+    assert data["segments"] == [{"start": 11.0, "end": 12.0, "text": "a"}, {"start": 13.0, "end": None, "text": "b"}]
+
+
+def test_format_timestamp():
+    assert subtitles.format_timestamp(3723.25, ",") == "01:02:03,250"
+    assert subtitles.format_timestamp(None, ".") == "00:00:00.000"
+    assert subtitles.format_timestamp(-1, ".") == "00:00:00.000"
+
+
+def test_srt_and_vtt_output():
+    assert "".join(subtitles.iter_srt(SEGMENTS)) == (
+        "1\n00:00:00,000 --> 00:00:01,500\n第一句\n\n"
+        "2\n00:00:01,500 --> 01:02:03,250\n第二句\n\n")
+    assert "".join(subtitles.iter_vtt(SEGMENTS)) == (
+        "WEBVTT\n\n"
+        "00:00:00.000 --> 00:00:01.500\n第一句\n\n"
+        "00:00:01.500 --> 01:02:03.250\n第二句\n\n")
+
+
+@pytest.mark.parametrize("fmt", ["srt", "vtt"])
+def test_blank_lines_and_arrows_in_text_do_not_break_cues(fmt):
+    segments = [(0.0, 1.0, "第一行\n\n\n第二行\n  \n a --> b"), (1.0, 2.0, "下一句")]
+    output = io.StringIO()
+    subtitles.write(output, fmt, segments)
+    blocks = output.getvalue().strip("\n").split("\n\n")
+    if fmt == "vtt":
+        assert blocks.pop(0) == "WEBVTT"
+    assert len(blocks) == len(segments)
+    assert blocks[0].splitlines()[-3:] == ["第一行", "第二行", " a -> b"]
+    assert blocks[0].count("-->") == 1
+
+
+def test_cue_end_never_precedes_start():
+    assert "".join(subtitles.iter_srt([(5.0, None, "a"), (7.0, 6.0, "b")])) == (
+        "1\n00:00:05,000 --> 00:00:05,000\na\n\n"
+        "2\n00:00:07,000 --> 00:00:07,000\nb\n\n")
+
+
+def test_json_output_and_batch_export(tmp_path):
+    files = [("a.wav", SEGMENTS), ("dir/a.mp3", SEGMENTS[:1])]
+    data = json.loads("".join(subtitles.iter_json(files)))
+    assert data[1] == {"file": "dir/a.mp3", "segments": [{"start": 0.0, "end": 1.5, "text": "第一句"}]}
+    paths = subtitles.export_batch(iter(files), str(tmp_path), "srt")
+    assert [path.rsplit("/", 1)[1] for path in paths] == ["a.srt", "a-2.srt"]
+    with pytest.raises(ValueError):
+        subtitles.write(io.StringIO(), "txt", SEGMENTS)
@@ -0,0 +1,94 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from benchmarks.mock_server import start_server  # noqa: E402
+from transcriber import audio, core, preprocess, transport, vad  # noqa: E402
+
+RATE = audio.SAMPLE_RATE
+
+
+def speech_and_silence(pattern, seed=0):
+    """按 [(是否语音, 秒数)] 生成采样：语音为带噪正弦波，静音为极低电平的噪声。"""
+    rng = np.random.default_rng(seed)
+    pieces = []
+    for is_speech, seconds in pattern:
+        length = int(seconds * RATE)
+        if is_speech:
+            t = np.arange(length) / RATE
+            pieces.append(8000 * np.sin(2 * np.pi * 180 * t) + 500 * rng.standard_normal(length))
+        else:
+            pieces.append(5 * rng.standard_normal(length))
+    return np.concatenate(pieces).astype(np.int16)
+
+
+def test_offset_map_maps_kept_time_back_to_original():
+    # 保留原始音频的 [1s, 3s) 与 [5s, 6s)
+    offset_map = vad.OffsetMap([(0, RATE, 2 * RATE), (2 * RATE, 5 * RATE, RATE)], RATE, 8 * RATE)
+    assert offset_map.to_original(0.0) == 1.0
+    assert offset_map.to_original(1.5) == 2.5
+    assert offset_map.to_original(2.0) == 5.0
+    assert offset_map.to_original(2.5) == 5.5
+    # 超出裁剪后音频末尾的时间停在最后一段的终点
+    assert offset_map.to_original(10.0) == 6.0
+    assert offset_map.kept_length == 3 * RATE
+    assert offset_map.removed_fraction == pytest.approx(5 / 8)
+
+
+def test_empty_offset_map_is_identity():
+    offset_map = vad.OffsetMap([], RATE, 0)
+    assert offset_map.to_original(1.25) == 1.25
+    assert offset_map.removed_fraction == 0.0
+
+
+def test_strip_silence_removes_long_gaps_and_keeps_timing():
+    samples = speech_and_silence([(False, 2), (True, 1), (False, 3), (True, 1), (False, 2)])
+    trimmed, offset_map = vad.strip_silence(samples, min_silence_seconds=1.0)
+    assert len(trimmed) == offset_map.kept_length
+    assert 0.5 < offset_map.removed_fraction < 0.8
+    # 第二段语音在原始音频中从 6 秒开始，换算后应落在补白范围内
+    second = offset_map.spans[1]
+    assert offset_map.to_original(second[0] / RATE) == pytest.approx(6.0 - vad.PADDING_SECONDS, abs=0.05)
+
+
+def test_strip_silence_of_pure_silence_is_empty():
+    trimmed, offset_map = vad.strip_silence(speech_and_silence([(False, 3)]), min_silence_seconds=1.0)
+    assert len(trimmed) == 0
+    assert offset_map.removed_fraction == 1.0
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # 固定以 WAV 编码，使结果不依赖 ffmpeg 是否可用
+    monkeypatch.setattr(preprocess, "encoder_for", lambda fmt: None)
+    server = start_server(segment_seconds=1.0)
+    transport.set_api_url(server.url)
+    yield server
+    transport.close_session()
+    server.shutdown()
+
+
+def transcribe_with_vad(path):
+    options = core.TranscriptionOptions(vad_min_silence=1.0)
+    return core.transcribe_file("test", "test", str(path), options)
+
+
+def test_vad_uploads_trimmed_audio_and_remaps_timestamps(server, tmp_path):
+    path = tmp_path / "gaps.wav"
+    path.write_bytes(audio.wav_bytes(speech_and_silence([(True, 2), (False, 4), (True, 2)])))
+    result = transcribe_with_vad(path)
+    assert result.offset_map is not None
+    assert result.uploaded_bytes < path.stat().st_size
+    assert server.bytes_received < path.stat().st_size
+    # 最后一个分段的时间戳换算回原始音频的末尾
+    assert result.segments[-1][1] == pytest.approx(8.0, abs=0.3)
+
+
+def test_vad_uploads_original_when_reencoding_is_not_smaller(server, tmp_path):
+    # 没有可去掉的静音，重新编码的 WAV 与原文件一样大
+    path = tmp_path / "speech.wav"
+    path.write_bytes(audio.wav_bytes(speech_and_silence([(True, 3)])))
+    result = transcribe_with_vad(path)
+    assert result.offset_map is None
+    assert result.uploaded_bytes is None
+    assert server.requests == 1
@@ -0,0 +1 @@
+"""SiliconFlow 语音转录工具的核心模块（不依赖 PyQt5）。"""
@@ -0,0 +1,299 @@
+"""在多个 API 账号（Token）与备用模型之间分配请求。
+
+单个账号的速率配额决定了整批任务的吞吐上限；账号池中的每一项是一个 (Token, 模型) 组合，
+每次请求选择其中预计最快完成的一项：优先使用任务指定的模型，其次按顺序使用备用模型；
+同一模型中按测得的平均延迟 ×（进行中的请求数 + 1）比较，并按剩余配额的比例加权。
+
+被限流（429）的账号按 Retry-After（没有时为 DEFAULT_COOLDOWN 秒）暂停使用；连续失败（5xx、网络错误）
+达到 FAILURE_THRESHOLD 次时暂停，再次失败时暂停时长加倍；Token 无效（401、403）的账号在本批任务中不再使用。
+请求在一个账号上失败后立即换用其他可用账号重试，所有账号都不可用时才交给 RequestScheduler 退避重试。
+"""
+import threading
+import time
+from collections import deque
+
+import requests
+
+from transcriber import transport
+
+DEFAULT_COOLDOWN = 30.0
+MAX_COOLDOWN = 600.0
+FAILURE_THRESHOLD = 2
+# Token 无效或没有权限
+AUTH_STATUS = (401, 403)
+# 平均延迟的平滑系数，以及计算配额的时间窗口（秒）
+LATENCY_SMOOTHING = 0.3
+QUOTA_WINDOW = 60.0
+# 等待账号恢复时检查取消的最长间隔（秒）
+POLL_INTERVAL = 0.5
+
+
+def mask_token(token):
+    """只显示 Token 的首尾几位。"""
+    return f"{token[:4]}…{token[-4:]}" if len(token) > 12 else "…"
+
+
+class Account:
+    """账号池中的一项。model 为 None 时使用任务指定的模型。"""
+
+    def __init__(self, token, model=None, priority=0, rpm=None, cooldown=DEFAULT_COOLDOWN):
+        self.token = token
+        self.model = model
+        self.priority = priority
+        self.rpm = rpm  # 每分钟请求数配额，None 为不限
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttled = 0
+        self.latency = None  # 成功请求耗时的指数移动平均（秒）
+        self.cooldown_until = 0.0
+        self.disabled = None  # 停用原因
+        self.first_request = None
+        self.last_success = None
+        self._consecutive_failures = 0
+        self._cooldown = cooldown
+        self._sent = deque()  # QUOTA_WINDOW 内发出请求的时间
+
+    @property
+    def label(self):
+        return f"{mask_token(self.token)} / {self.model}" if self.model else mask_token(self.token)
+
+    def remaining(self, now):
+        """配额窗口内剩余的请求数，不限配额时返回 None。"""
+        while self._sent and now - self._sent[0] >= QUOTA_WINDOW:
+            self._sent.popleft()
+        return None if self.rpm is None else self.rpm - len(self._sent)
+
+    def wait_time(self, now):
+        """还需等待多久才能使用，可以立即使用时返回 0，停用时返回 None。"""
+        if self.disabled:
+            return None
+        wait = self.cooldown_until - now
+        remaining = self.remaining(now)
+        if remaining is not None and remaining <= 0:
+            wait = max(wait, self._sent[0] + QUOTA_WINDOW - now)
+        return max(0.0, wait)
+
+    def score(self, now):
+        """预计完成一个请求的代价，越小越优先；未测得延迟的账号优先尝试。"""
+        score = (self.latency or 0.0) * (self.in_flight + 1) + self.in_flight * 1e-3
+        remaining = self.remaining(now)
+        if remaining is not None:
+            score /= max(remaining / float(self.rpm), 0.05)
+        return score
+
+    @property
+    def throughput(self):
+        """成功请求数/分钟（从第一次请求到最近一次成功）。"""
+        if not self.successes or self.last_success is None:
+            return 0.0
+        return self.successes * 60.0 / max(self.last_success - self.first_request, 1.0)
+
+
+class AccountPool:
+    """多个 Token（及备用模型）组成的账号池，可在多个任务与线程之间共享。"""
+
+    def __init__(self, tokens, fallback_models=(), rpm=None, cooldown=DEFAULT_COOLDOWN):
+        self.cooldown = cooldown
+        self.accounts = [Account(token, model, priority, rpm, cooldown)
+                         for priority, model in enumerate([None] + list(fallback_models))
+                         for token in tokens]
+        if not self.accounts:
+            raise ValueError("账号池中至少需要一个 Token")
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def _choose(self, now, exclude):
+        """返回 (账号, 0) 或 (None, 需要等待的秒数)；没有可用账号且都已停用或排除时等待时间为 None。"""
+        best = None
+        wait = None
+        for account in self.accounts:
+            if account in exclude:
+                continue
+            account_wait = account.wait_time(now)
+            if account_wait is None:
+                continue
+            if account_wait > 0:
+                wait = account_wait if wait is None else min(wait, account_wait)
+                continue
+            key = (account.priority, account.score(now))
+            if best is None or key < best[0]:
+                best = (key, account)
+        if best is None:
+            return None, wait
+        account = best[1]
+        account.in_flight += 1
+        account.requests += 1
+        account._sent.append(now)
+        if account.first_request is None:
+            account.first_request = now
+        return account, 0.0
+
+    def try_acquire(self, exclude=()):
+        """尝试取得一个账号：返回 (账号, 0)，或 (None, 需要等待的秒数)；所有账号都已停用时抛出 RuntimeError。"""
+        with self._lock:
+            account, wait = self._choose(time.monotonic(), exclude)
+        if account is None and wait is None and not exclude:
+            raise RuntimeError("账号池中的所有 Token 都已停用")
+        return account, wait
+
+    def release(self, account, elapsed, error=None):
+        """报告一次请求的结果。返回 True 表示错误与该账号有关，可以换用其他账号重试。"""
+        with self._lock:
+            now = time.monotonic()
+            account.in_flight -= 1
+            if error is None:
+                account.successes += 1
+                account.last_success = now
+                account._consecutive_failures = 0
+                account._cooldown = self.cooldown
+                account.latency = elapsed if account.latency is None else (
+                    LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * account.latency)
+                return False
+            status = getattr(error, "status_code", None)
+            if status in AUTH_STATUS:
+                account.failures += 1
+                account.disabled = f"HTTP {status}"
+                return True
+            if status == 429:
+                account.throttled += 1
+                retry_after = getattr(error, "retry_after", None)
+                account.cooldown_until = max(account.cooldown_until,
+                                             now + (self.cooldown if retry_after is None else retry_after))
+                return True
+            if status is not None and status < 500:
+                # 请求本身有误（例如音频格式不支持），换账号也无济于事
+                return False
+            account.failures += 1
+            account._consecutive_failures += 1
+            if account._consecutive_failures >= FAILURE_THRESHOLD:
+                account.cooldown_until = now + account._cooldown
+                account._cooldown = min(account._cooldown * 2, MAX_COOLDOWN)
+            return True
+
+    def abandon(self, account):
+        """请求因取消等与账号无关的原因中止，不计入统计。"""
+        with self._lock:
+            account.in_flight -= 1
+
+    def failover(self, stats=None):
+        """开始一次请求：返回记录该请求已尝试账号的 Failover。"""
+        return Failover(self, stats)
+
+    def call(self, send, cancel_token, stats=None):
+        """调用 send(token, 模型或 None) 并返回其结果。
+
+        与账号有关的错误立即换用其他账号重试，每个账号最多尝试一次；都失败时抛出最后一次的异常。
+        stats（RetryStats）记录换用账号的次数，以及等待账号恢复的时长。
+        """
+        failover = self.failover(stats)
+        while True:
+            if stats is not None:
+                stats.begin_wait()
+            try:
+                while True:
+                    account, wait = failover.next_account()
+                    if account is not None:
+                        break
+                    cancel_token.wait(min(wait, POLL_INTERVAL))
+            finally:
+                if stats is not None:
+                    stats.end_wait()
+            start = time.monotonic()
+            try:
+                result = send(account.token, account.model)
+            except (transport.TranscriptionError, requests.ConnectionError, requests.Timeout) as e:
+                if failover.on_response(account, time.monotonic() - start, e):
+                    continue
+                raise
+            except BaseException:
+                self.abandon(account)
+                raise
+            failover.on_response(account, time.monotonic() - start)
+            return result
+
+    def stats(self):
+        """返回每个账号的统计，供界面与命令行显示。"""
+        with self._lock:
+            now = time.monotonic()
+            return [{
+                "account": account.label,
+                "priority": account.priority,
+                "requests": account.requests,
+                "successes": account.successes,
+                "throttled": account.throttled,
+                "failures": account.failures,
+                "latency": account.latency,
+                "throughput": account.throughput,
+                "remaining": account.remaining(now),
+                "state": account.disabled or ("暂停" if account.cooldown_until > now else "可用"),
+            } for account in self.accounts]
+
+
+class Failover:
+    """一次请求在账号池中换用账号的过程，线程与异步引擎共用。
+
+    反复调用 next_account()，返回账号时用它发送请求，返回等待时间时等待后再试；
+    每次发送后调用 on_response()，返回 True 时换用下一个账号，请求因与账号无关的原因中止时调用 pool.abandon()。
+    """
+
+    def __init__(self, pool, stats=None):
+        self.pool = pool
+        self.stats = stats
+        self.tried = set()
+        self.last_error = None
+
+    def next_account(self):
+        """返回 (账号, 0) 或 (None, 需要等待的秒数)；没有可以换用的账号时抛出最后一次的异常。"""
+        account, wait = self.pool.try_acquire(self.tried)
+        if account is not None:
+            self.tried.add(account)
+        elif wait is None:
+            raise self.last_error
+        return account, wait
+
+    def on_response(self, account, elapsed, error=None):
+        """报告在 account 上发送的请求的结果，返回 True 表示错误与该账号有关，应换用其他账号重试。"""
+        if not self.pool.release(account, elapsed, error):
+            return False
+        self.last_error = error
+        if self.stats is not None:
+            self.stats.record_retry(failover_reason(error))
+        return True
+
+
+def failover_reason(error):
+    status = getattr(error, "status_code", None)
+    return f"{f'HTTP {status}' if status else type(error).__name__}，换用其他账号"
+
+
+def call(send, token, model_name, scheduler=None, pool=None, cancel_token=None, stats=None, models_used=None):
+    """发送一次转录请求：send(token, 模型) 每次调用都必须重新构造请求。
+
+    传入 scheduler（RequestScheduler）时失败按其策略重试与限流；传入 pool（AccountPool）时
+    每次发送都从池中选择账号，使用了备用模型时把模型名加入 models_used 集合。
+    """
+    def attempt():
+        if pool is None:
+            return send(token, model_name)
+
+        def send_with(account_token, model):
+            if model and models_used is not None:
+                models_used.add(model)
+            return send(account_token, model or model_name)
+        return pool.call(send_with, cancel_token, stats)
+
+    if scheduler is None:
+        return attempt()
+    return scheduler.call(attempt, cancel_token, stats)
+
+
+def describe_account(stats):
+    """返回一个账号统计的单行说明。"""
+    latency = f"{stats['latency']:.2f}s" if stats["latency"] is not None else "-"
+    return (f"{stats['account']}: 请求 {stats['requests']} | 成功 {stats['successes']} | 限流 {stats['throttled']}"
+            f" | 失败 {stats['failures']} | 平均延迟 {latency} | 吞吐 {stats['throughput']:.1f} 次/分钟"
+            f" | {stats['state']}")
@@ -0,0 +1,308 @@
+"""基于 asyncio 与 aiohttp 的转录引擎（可选，需要安装 aiohttp）。
+
+线程模式下每个进行中的任务都占用一个线程并阻塞在 requests 上；这里在一个工作线程上运行一个事件循环，
+所有上传在同一个循环中复用连接、并发进行，数百个任务也只需要一个线程。
+需要在本地解码的任务（去静音、长音频分段）仍交给一个小线程池，按 core.transcribe_file 的同步流程处理；
+哈希、预处理等阻塞操作在默认线程池中执行，不会阻塞事件循环。
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖
+    aiohttp = None
+
+from transcriber import accounts, core, multipart, preprocess, scheduler, transport
+from transcriber.cancel import CancelToken, TranscriptionCancelled
+
+# 同时进行的上传请求数上限（即连接池大小）
+DEFAULT_MAX_CONNECTIONS = 64
+# 处理需要本地解码的任务的线程数
+DEFAULT_LOCAL_WORKERS = 4
+CONNECT_TIMEOUT = 10
+# 可以重试（或换用其他账号）的网络错误，对应线程模式的 scheduler.NETWORK_ERRORS
+NETWORK_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError) if aiohttp is not None else ()
+
+
+def available():
+    return aiohttp is not None
+
+
+class AsyncJob:
+    """AsyncEngine.submit 返回的任务句柄，可在任意线程调用 cancel()。"""
+
+    def __init__(self, done_callback):
+        self.cancel_token = CancelToken()
+        self.done_callback = done_callback
+        self.future = None
+        self._reported = False
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancel_token.cancel()
+        if self.future is not None:
+            self.future.cancel()
+
+    def report(self, result, elapsed):
+        """调用一次 done_callback(结果、异常或 None（已取消）, 耗时)。"""
+        with self._lock:
+            if self._reported:
+                return
+            self._reported = True
+        if self.done_callback:
+            self.done_callback(result, elapsed)
+
+
+class AsyncEngine:
+    """在后台线程的事件循环中执行转录任务。"""
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, local_workers=DEFAULT_LOCAL_WORKERS, url=None,
+                 timeout=transport.DEFAULT_TIMEOUT):
+        if aiohttp is None:
+            raise RuntimeError("使用异步传输引擎需要先安装 aiohttp")
+        self.max_connections = max_connections
+        self.local_workers = local_workers
+        self.url = url
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=local_workers, thread_name_prefix="AsyncEngineLocal")
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="AsyncEngine", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, token, model_name, path, options=None, progress_callback=None, done_callback=None,
+               retry_callback=None):
+        """提交一个任务并立即返回 AsyncJob，回调均在事件循环线程中调用。"""
+        job = AsyncJob(done_callback)
+        coroutine = self._run(job, token, model_name, path, options or core.TranscriptionOptions(),
+                              progress_callback, retry_callback)
+        loop = self._ensure_loop()
+        job.future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+        def report_cancelled(future):
+            # 任务在开始执行前就被取消时协程不会运行，由这里报告取消；
+            # 该回调可能在调用 cancel() 的线程中执行，转交事件循环线程以保证回调线程一致
+            if future.cancelled():
+                loop.call_soon_threadsafe(job.report, None, 0.0)
+        job.future.add_done_callback(report_cancelled)
+        return job
+
+    async def _run(self, job, token, model_name, path, options, progress_callback, retry_callback):
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            job.cancel_token.raise_if_cancelled()
+            if await loop.run_in_executor(None, core.needs_local_processing, path, options):
+                result = await loop.run_in_executor(
+                    self._executor, core.transcribe_file, token, model_name, path, options, job.cancel_token,
+                    progress_callback, retry_callback)
+            else:
+                result = await self._transcribe_upload(token, model_name, path, options, progress_callback,
+                                                       retry_callback)
+        except (asyncio.CancelledError, TranscriptionCancelled):
+            # 让线程池中仍在进行的本地处理也尽快停止
+            job.cancel_token.cancel()
+            job.report(None, 0.0)
+            return
+        except Exception as e:
+            job.report(e, time.time() - start_time)
+            return
+        job.report(result, time.time() - start_time)
+
+    async def _transcribe_upload(self, token, model_name, path, options, progress_callback, retry_callback):
+        """直接上传原文件（或预处理后的文件），与 core.transcribe_file 的对应分支一致。"""
+        loop = asyncio.get_running_loop()
+        result = core.TranscriptionResult(path, model_name, retry_callback)
+        start_time = time.time()
+        read_start = time.perf_counter()
+        audio_hash, cached = await loop.run_in_executor(None, core.lookup_cache, path, model_name, options)
+        result.timing.record("read", time.perf_counter() - read_start)
+        if cached is not None:
+            result.data = cached
+            result.cache_hit = True
+            await loop.run_in_executor(None, core.build_segments, result)
+            result.elapsed = time.time() - start_time
+            return result
+
+        upload = None
+        if options.preprocess_format:
+            read_start = time.perf_counter()
+            upload = await loop.run_in_executor(None, preprocess.preprocess_file, path, options.preprocess_format)
+            result.timing.record("read", time.perf_counter() - read_start)
+        upload_start = time.time()
+        if upload is not None:
+            result.data = await self._post_with_retry(token, model_name, upload.as_file, options, result,
+                                                      progress_callback)
+            result.record_upload(len(upload.data), time.time() - upload_start)
+        else:
+            with open(path, 'rb') as f:
+                def rewind():
+                    # 重试时从文件开头重新上传
+                    f.seek(0)
+                    return f
+                result.data = await self._post_with_retry(token, model_name, rewind, options, result,
+                                                          progress_callback)
+
+        await loop.run_in_executor(None, core.build_segments, result)
+        if options.cache is not None and not result.models_used:
+            await loop.run_in_executor(None, options.cache.put, audio_hash, model_name, result.data)
+        result.elapsed = time.time() - start_time
+        return result
+
+    async def _post_with_retry(self, token, model_name, make_file, options, result, progress_callback):
+        """按 options.scheduler 的策略发送请求：与线程模式共用全局暂停、令牌桶与退避规则。
+
+        同时进行的请求数由连接池大小限制，不占用调度器的并发名额。
+        """
+        policy = options.scheduler
+        if policy is None:
+            return await self._post_with_accounts(token, model_name, make_file, options, result, progress_callback)
+        attempt = 0
+        while True:
+            result.retry_stats.begin_wait()
+            try:
+                while True:
+                    delay = policy.before_attempt()
+                    if not delay:
+                        break
+                    await asyncio.sleep(delay)
+            finally:
+                result.retry_stats.end_wait()
+            sent_at = time.monotonic()
+            try:
+                data = await self._post_with_accounts(token, model_name, make_file, options, result,
+                                                      progress_callback)
+            except (transport.TranscriptionError,) + NETWORK_ERRORS as e:
+                policy.on_response(sent_at, e)
+                if not policy.should_retry(e, attempt, NETWORK_ERRORS):
+                    raise
+                delay = policy.retry_delay(attempt, e)
+                reason = scheduler.retry_reason(e)
+            else:
+                policy.on_response(sent_at)
+                return data
+
+            attempt += 1
+            result.retry_stats.record_retry(reason)
+            result.retry_stats.begin_wait()
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                result.retry_stats.end_wait()
+
+    async def _post_with_accounts(self, token, model_name, make_file, options, result, progress_callback):
+        """AccountPool.call 的异步版本：从账号池中选择账号，与账号有关的错误换用其他账号重试。"""
+        pool = options.accounts
+        if pool is None:
+            return await self._post(token, model_name, make_file(), progress_callback, result.timing)
+        failover = pool.failover(result.retry_stats)
+        while True:
+            result.retry_stats.begin_wait()
+            try:
+                while True:
+                    account, wait = failover.next_account()
+                    if account is not None:
+                        break
+                    await asyncio.sleep(min(wait, accounts.POLL_INTERVAL))
+            finally:
+                result.retry_stats.end_wait()
+            start = time.monotonic()
+            try:
+                data = await self._post(account.token, account.model or model_name, make_file(), progress_callback,
+                                        result.timing)
+            except (transport.TranscriptionError,) + NETWORK_ERRORS as e:
+                if failover.on_response(account, time.monotonic() - start, e):
+                    continue
+                raise
+            except BaseException:
+                pool.abandon(account)
+                raise
+            failover.on_response(account, time.monotonic() - start)
+            if account.model:
+                result.models_used.add(account.model)
+            return data
+
+    async def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=self.timeout)
+            # 建立连接的耗时通过 trace_request_ctx 记入对应任务的 JobTiming
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_start.append(self._on_connect_start)
+            trace.on_connection_create_end.append(self._on_connect_end)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[trace])
+        return self._session
+
+    @staticmethod
+    async def _on_connect_start(session, context, params):
+        context.connect_start = time.perf_counter()
+
+    @staticmethod
+    async def _on_connect_end(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx.record("connect", time.perf_counter() - context.connect_start)
+
+    async def _post(self, token, model_name, file, progress_callback, job_timing=None):
+        if not isinstance(file, tuple):
+            file = (os.path.basename(getattr(file, 'name', 'audio')), file, "application/octet-stream")
+        body = multipart.MultipartEncoder({'model': model_name}, {'file': file}, progress_callback=progress_callback)
+
+        loop = asyncio.get_running_loop()
+
+        async def stream():
+            # 连接池已满时请求在此之前排队，不会提前读取文件；读文件会阻塞，放到默认线程池中进行
+            while True:
+                chunk = await loop.run_in_executor(None, body.read, body.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": body.content_type,
+            "Content-Length": str(len(body)),
+        }
+        session = await self._get_session()
+        async with session.post(self.url or transport.API_URL, data=stream(), headers=headers,
+                                trace_request_ctx=job_timing) as response:
+            headers_at = time.perf_counter()
+            text = await response.text()
+            if job_timing is not None:
+                job_timing.record_request(body, headers_at, time.perf_counter())
+            if response.status != 200:
+                raise transport.TranscriptionError(response.status, text,
+                                                   transport.parse_retry_after(response.headers.get("Retry-After")))
+            return json.loads(text)
+
+    def close(self):
+        """取消尚未完成的任务，关闭连接并停止事件循环。"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+        self._executor.shutdown(wait=False)
+
+    async def _shutdown(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,122 @@
+"""音频解码、编码等辅助函数。
+
+统一把音频解码为 16 kHz 单声道 int16 PCM（numpy 数组）处理：
+PCM 格式的 WAV 文件直接用标准库 wave 读取，其他格式需要系统中安装 ffmpeg。
+"""
+import io
+import shutil
+import subprocess
+import wave
+
+try:
+    import numpy as np
+except ImportError:  # 分段、静音检测等功能需要 numpy，缺失时这些功能自动停用
+    np = None
+
+SAMPLE_RATE = 16000
+
+
+class AudioError(Exception):
+    """音频无法读取或处理。"""
+
+
+def numpy_available():
+    return np is not None
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def require_numpy():
+    if np is None:
+        raise AudioError("该功能需要安装 numpy：pip install numpy")
+
+
+def probe_duration(path):
+    """返回音频时长（秒），无法获取时返回 None。"""
+    try:
+        with wave.open(path, 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError):
+        pass
+    except OSError:
+        return None
+
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        output = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", path],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        ).stdout
+        return float(output.strip())
+    except (subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def load_pcm(path, sample_rate=SAMPLE_RATE):
+    """将音频文件解码为单声道 int16 PCM，并重采样到 sample_rate。"""
+    require_numpy()
+    try:
+        return _load_wav(path, sample_rate)
+    except (wave.Error, EOFError):
+        pass
+    return _load_with_ffmpeg(path, sample_rate)
+
+
+def _load_wav(path, sample_rate):
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise wave.Error("仅直接支持16位PCM")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return resample(samples, rate, sample_rate)
+
+
+def _load_with_ffmpeg(path, sample_rate):
+    if not ffmpeg_available():
+        raise AudioError("无法解码该音频格式，请安装 ffmpeg。")
+    process = subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", path,
+         "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if process.returncode != 0:
+        raise AudioError(f"ffmpeg 解码失败：{process.stderr.decode('utf-8', 'replace').strip()}")
+    return np.frombuffer(process.stdout, dtype='<i2')
+
+
+def resample(samples, rate, target_rate):
+    """线性插值重采样，返回 int16 数组。"""
+    if rate != target_rate and len(samples):
+        duration = len(samples) / float(rate)
+        target_length = int(round(duration * target_rate))
+        positions = np.arange(target_length) * (rate / float(target_rate))
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return np.asarray(samples).astype(np.int16)
+
+
+def wav_bytes(samples, sample_rate=SAMPLE_RATE):
+    """把单声道 int16 PCM 编码为 WAV 文件内容。"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.asarray(samples, dtype='<i2').tobytes())
+    return buffer.getvalue()
+
+
+def frame_energy(samples, frame_length):
+    """按帧计算均方根能量，末尾不足一帧的部分被忽略。"""
+    frames = len(samples) // frame_length
+    if frames == 0:
+        return np.zeros(0)
+    framed = samples[:frames * frame_length].astype(np.float32).reshape(frames, frame_length)
+    return np.sqrt(np.mean(framed * framed, axis=1))
@@ -0,0 +1,128 @@
+"""以音频内容哈希和模型名为键的本地转录结果缓存。
+
+每条缓存是一个 JSON 文件，文件的修改时间即最近使用时间，
+总大小超过上限时按最近最少使用（LRU）顺序淘汰。
+多个进程（或共享目录的多台机器）可以同时使用同一个缓存目录。
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def default_cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "SiliconFlowSpeechTranscriber", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "siliconflow-speech-transcriber")
+
+
+def hash_file(path):
+    """分块读取文件计算 SHA-256，大文件不会整个读入内存。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None  # 缓存总大小的估计值，首次写入时统计
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio_hash, model_name):
+        return hashlib.sha256(f"{audio_hash}:{model_name}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, audio_hash, model_name):
+        """返回缓存的转录结果，未命中时返回 None。"""
+        path = self._path(self.make_key(audio_hash, model_name))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)  # 记录最近使用时间
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, audio_hash, model_name, result):
+        path = self._path(self.make_key(audio_hash, model_name))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先写临时文件再替换，其他进程不会读到写了一半的缓存
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """返回所有缓存条目的 (最近使用时间, 大小, 路径)。"""
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self._size = total
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
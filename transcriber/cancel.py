@@ -0,0 +1,136 @@
+"""可真正中断网络传输的取消机制。
+
+CancelToken 记录受其管理的请求正在使用的连接，cancel() 时直接关闭这些连接的套接字，
+阻塞在发送请求体或等待响应上的线程会立即收到连接错误，而不必等到请求超时。
+DNS 解析与 TCP 连接无法从其他线程中断，由 CancelToken.run() 放到辅助线程中执行，取消时调用方立即返回。
+"""
+import socket
+import threading
+
+_local = threading.local()
+# run() 检查取消的间隔（秒）
+POLL_INTERVAL = 0.02
+
+
+class TranscriptionCancelled(Exception):
+    """转录被用户取消。"""
+
+
+class CancelToken:
+    """取消标记，parent 被取消时随之取消。"""
+
+    def __init__(self, parent=None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._children = []
+        if parent is not None:
+            parent._add_child(self)
+
+    def _add_child(self, child):
+        with self._lock:
+            self._children.append(child)
+        if self._event.is_set():
+            child.cancel()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TranscriptionCancelled()
+
+    def wait(self, timeout):
+        """等待至多 timeout 秒，期间被取消时立即抛出 TranscriptionCancelled。"""
+        if self._event.wait(timeout):
+            raise TranscriptionCancelled()
+
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            connections = list(self._connections)
+            children = list(self._children)
+        for connection in connections:
+            _shutdown(connection)
+        for child in children:
+            child.cancel()
+
+    def run(self, function, discard=None):
+        """在辅助线程中执行无法中断的阻塞调用（例如 DNS 解析与建立 TCP 连接）并返回其结果。
+
+        取消时立即抛出 TranscriptionCancelled，不等待调用结束；调用之后完成时，其结果交给 discard 释放。
+        """
+        self.raise_if_cancelled()
+        outcome = {}
+        done = threading.Event()
+        lock = threading.Lock()
+
+        def target():
+            try:
+                result = function()
+            except BaseException as e:
+                outcome["error"] = e
+            else:
+                with lock:
+                    abandoned = outcome.get("abandoned", False)
+                    outcome["result"] = result
+                if abandoned and discard is not None:
+                    discard(result)
+            done.set()
+
+        threading.Thread(target=target, name="CancelToken.run", daemon=True).start()
+        while not done.wait(POLL_INTERVAL):
+            if self._event.is_set():
+                with lock:
+                    outcome["abandoned"] = True
+                    finished = "result" in outcome
+                if finished and discard is not None:
+                    discard(outcome["result"])
+                raise TranscriptionCancelled()
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+    def attach(self, connection):
+        """登记当前请求使用的连接，已取消时立即关闭。"""
+        with self._lock:
+            self._connections.add(connection)
+        if self._event.is_set():
+            _shutdown(connection)
+
+    def detach(self, connection):
+        with self._lock:
+            self._connections.discard(connection)
+
+
+def _shutdown(connection):
+    # TLS 握手期间 connection.sock 是已交出文件描述符的原套接字，需改用握手前另存的 connecting_sock
+    sock = getattr(connection, "connecting_sock", None) or getattr(connection, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def current_token():
+    """返回当前线程正在执行的请求所属的 CancelToken。"""
+    return getattr(_local, "token", None)
+
+
+class active:
+    """在 with 块内把 token 设为当前线程的 CancelToken。"""
+
+    def __init__(self, token):
+        self.token = token
+
+    def __enter__(self):
+        self.previous = current_token()
+        _local.token = self.token
+        return self.token
+
+    def __exit__(self, *exc_info):
+        _local.token = self.previous
+        return False
@@ -0,0 +1,244 @@
+"""长音频分段转录。
+
+在目标长度附近能量最低的位置（静音处）切分音频，相邻分段之间保留一小段重叠，
+各分段并发上传，最后按顺序拼接文本并去掉重叠部分重复识别出的文字。
+模型返回带时间戳的分段时，各分段的时间加上所在分段的起点，重叠部分以重叠区的中点为界只保留一次；
+否则每个分段的文本作为一个覆盖该分段时间范围的条目。
+"""
+import difflib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from transcriber import accounts, audio, cancel, multipart, subtitles, transport
+
+DEFAULT_CHUNK_SECONDS = 300
+DEFAULT_OVERLAP_SECONDS = 2
+DEFAULT_PARALLELISM = 4
+
+FRAME_SECONDS = 0.02
+# 约200ms的能量平滑，避免切在单词中间的短暂停顿上
+SMOOTH_FRAMES = 10
+# 在目标切分点之前的这段范围内寻找静音
+SEARCH_FRACTION = 0.2
+MAX_SEARCH_SECONDS = 30
+
+# 拼接时在前一段末尾与后一段开头的这些字符内查找重叠文字
+STITCH_WINDOW = 200
+MIN_OVERLAP_MATCH = 4
+
+
+class ChunkSettings:
+    """分段长度、重叠时长（秒）与并发数。"""
+
+    def __init__(self, chunk_seconds=DEFAULT_CHUNK_SECONDS, overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+                 parallelism=DEFAULT_PARALLELISM):
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.parallelism = parallelism
+
+    def needs_chunking(self, duration):
+        return duration is not None and duration > self.chunk_seconds + self.overlap_seconds
+
+
+def should_chunk(path, settings):
+    """音频长度超过分段长度且具备解码条件时返回 True。"""
+    if not audio.numpy_available():
+        return False
+    return settings.needs_chunking(audio.probe_duration(path))
+
+
+def plan_chunks(samples, sample_rate, chunk_seconds, overlap_seconds):
+    """返回各分段的 (起始, 结束) 采样位置，分段起点向前延伸 overlap_seconds。"""
+    np = audio.np
+    total = len(samples)
+    chunk = int(chunk_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    frame = int(FRAME_SECONDS * sample_rate)
+    search = int(min(MAX_SEARCH_SECONDS, chunk_seconds * SEARCH_FRACTION) * sample_rate)
+
+    energy = audio.frame_energy(samples, frame)
+    if len(energy) >= SMOOTH_FRAMES:
+        energy = np.convolve(energy, np.ones(SMOOTH_FRAMES) / SMOOTH_FRAMES, mode='same')
+
+    cuts = []
+    position = 0
+    while total - position > chunk + overlap:
+        target = position + chunk
+        low, high = (target - search) // frame, min(target // frame, len(energy))
+        if high > low:
+            cut = (low + int(np.argmin(energy[low:high]))) * frame + frame // 2
+        else:
+            cut = target
+        cuts.append(cut)
+        position = cut
+
+    boundaries = [0] + cuts + [total]
+    return [(max(0, boundaries[i] - overlap) if i else 0, boundaries[i + 1])
+            for i in range(len(boundaries) - 1)]
+
+
+def encode_wav(samples, sample_rate=audio.SAMPLE_RATE):
+    return "wav", audio.wav_bytes(samples, sample_rate), "audio/wav"
+
+
+def transcribe_segments(token, model_name, samples, segments, parallelism,
+                        sample_rate=audio.SAMPLE_RATE, cancel_token=None, encoder=None, stats=None,
+                        progress_callback=None, scheduler=None, retry_stats=None, job_timing=None, account_pool=None,
+                        models_used=None):
+    """并发转录各分段，按分段顺序返回各分段的接口响应。
+
+    cancel_token 被取消时所有正在上传的分段立即中断，抛出 TranscriptionCancelled；
+    encoder(samples, sample_rate) 返回 (扩展名, 内容, 类型)，默认编码为 WAV；
+    传入 stats 字典时写入上传字节数 stats["uploaded_bytes"] 与各分段请求耗时之和 stats["upload_seconds"]；
+    progress_callback(已发送字节数, 估计总字节数) 汇总所有分段的上传进度；
+    传入 scheduler（RequestScheduler）时各分段请求经其重试与限流，重试统计记入 retry_stats；
+    传入 job_timing（timing.JobTiming）时记录各分段的编码与请求各阶段耗时；
+    传入 account_pool（AccountPool）时各分段请求从账号池中选择账号，用到的备用模型加入 models_used。
+    """
+    encoder = encoder or encode_wav
+    # 一个分段失败时只取消本文件的其余分段，不影响调用方的 cancel_token
+    cancel_token = cancel.CancelToken(cancel_token)
+    progress = multipart.UploadProgress(progress_callback, len(segments)) if progress_callback else None
+    uploaded = [0] * len(segments)
+    upload_seconds = [0.0] * len(segments)
+
+    def work(index):
+        cancel_token.raise_if_cancelled()
+        start, end = segments[index]
+        # 在工作线程中编码，内存中最多同时存在 parallelism 个分段
+        encode_start = time.perf_counter()
+        extension, payload, content_type = encoder(samples[start:end], sample_rate)
+        if job_timing is not None:
+            job_timing.record("read", time.perf_counter() - encode_start)
+        uploaded[index] = len(payload)
+        request_start = time.time()
+
+        def send(token, model):
+            return transport.transcribe(token, model, (f"segment_{index:04d}.{extension}", payload, content_type),
+                                        progress_callback=progress.tracker(index) if progress else None,
+                                        cancel_token=cancel_token, job_timing=job_timing)
+        result = accounts.call(send, token, model_name, scheduler, account_pool, cancel_token, retry_stats, models_used)
+        upload_seconds[index] = time.time() - request_start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, parallelism)) as executor:
+        futures = [executor.submit(work, index) for index in range(len(segments))]
+        try:
+            responses = [future.result() for future in futures]
+        except BaseException:
+            cancel_token.cancel()
+            for future in futures:
+                future.cancel()
+            raise
+    if stats is not None:
+        stats["uploaded_bytes"] = sum(uploaded)
+        stats["upload_seconds"] = sum(upload_seconds)
+    return responses
+
+
+def _is_word_char(char):
+    return char.isalnum() and ord(char) < 128
+
+
+def _separator(left, right):
+    # 英文等以空格分词的文本拼接时补一个空格，中文直接相连
+    if left and right and _is_word_char(left[-1]) and _is_word_char(right[0]):
+        return " "
+    return ""
+
+
+def continuation(previous, text):
+    """在 previous 之后接着显示 text 时追加的片段（需要时以空格开头），用于没有重叠的相邻分段。"""
+    return _separator(previous, text) + text
+
+
+def _overlap(left, right):
+    """返回 (left 保留的长度, 连接符, right 的起始位置)。"""
+    tail = left[-STITCH_WINDOW:]
+    head = right[:STITCH_WINDOW]
+    match = difflib.SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(
+        0, len(tail), 0, len(head))
+    if match.size < MIN_OVERLAP_MATCH:
+        return len(left), _separator(left, right), 0
+    return len(left) - len(tail) + match.a + match.size, "", match.b + match.size
+
+
+def merge_overlap(left, right):
+    """拼接相邻两段文本，去掉重叠音频被重复识别的部分。"""
+    cut, separator, start = _overlap(left, right)
+    return left[:cut] + separator + right[start:]
+
+
+def stitch_pieces(texts):
+    """按顺序拼接各分段文本，返回每个分段贡献的片段（已去掉重叠），片段直接相连即为拼接结果。"""
+    pieces = []
+    result = ""
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            pieces.append("")
+            continue
+        if not result:
+            pieces.append(text)
+            result = text
+            continue
+        cut, separator, start = _overlap(result, text)
+        # 重叠只会截掉前面片段末尾 STITCH_WINDOW 个字符以内的部分
+        excess = len(result) - cut
+        for i in range(len(pieces) - 1, -1, -1):
+            if not excess:
+                break
+            removed = min(excess, len(pieces[i]))
+            pieces[i] = pieces[i][:len(pieces[i]) - removed]
+            excess -= removed
+        pieces.append(separator + text[start:])
+        result = result[:cut] + pieces[-1]
+    return pieces
+
+
+def stitch_texts(texts):
+    """按顺序拼接各分段文本。"""
+    return "".join(stitch_pieces(texts))
+
+
+def merge_responses(responses, segments, overlap_seconds, sample_rate=audio.SAMPLE_RATE):
+    """把各分段的接口响应合并为整个音频的响应：拼接文本，并把时间戳换算到整个音频上。"""
+    pieces = stitch_pieces([response.get("text", "") for response in responses])
+    duration = segments[-1][1] / float(sample_rate) if segments else 0.0
+    # 相邻分段在 [切分点 - 重叠, 切分点] 内重叠，以其中点为界划分各分段负责的时间范围
+    bounds = [0.0] + [segments[i][1] / float(sample_rate) - overlap_seconds / 2.0
+                      for i in range(len(segments) - 1)] + [duration]
+    merged = []
+    for i, (response, piece) in enumerate(zip(responses, pieces)):
+        keep_from, keep_until = bounds[i], bounds[i + 1]
+        if subtitles.has_timestamps(response):
+            offset = segments[i][0] / float(sample_rate)
+            last = i == len(responses) - 1
+            for start, end, text in subtitles.from_response(response):
+                middle = offset + (start + end) / 2.0
+                if middle >= keep_from and (middle < keep_until or last):
+                    merged.append((start + offset, end + offset, text))
+        elif piece.strip():
+            merged.append((keep_from, keep_until, piece.strip()))
+    return {"text": "".join(pieces), "duration": duration, "segments": subtitles.to_response(merged)}
+
+
+def transcribe_long_audio(token, model_name, path, settings, cancel_token=None, encoder=None, stats=None,
+                          progress_callback=None, scheduler=None, retry_stats=None, job_timing=None, account_pool=None,
+                          models_used=None):
+    """分段转录长音频文件，返回与接口响应相同结构的字典。"""
+    return transcribe_pcm(token, model_name, audio.load_pcm(path), settings, cancel_token, encoder, stats,
+                          progress_callback, scheduler, retry_stats, job_timing, account_pool, models_used)
+
+
+def transcribe_pcm(token, model_name, samples, settings, cancel_token=None, encoder=None, stats=None,
+                   progress_callback=None, scheduler=None, retry_stats=None, job_timing=None, account_pool=None,
+                   models_used=None):
+    """分段转录已解码的 16 kHz 单声道 PCM。"""
+    segments = plan_chunks(samples, audio.SAMPLE_RATE, settings.chunk_seconds, settings.overlap_seconds)
+    responses = transcribe_segments(token, model_name, samples, segments, settings.parallelism,
+                                    cancel_token=cancel_token, encoder=encoder, stats=stats,
+                                    progress_callback=progress_callback, scheduler=scheduler,
+                                    retry_stats=retry_stats, job_timing=job_timing, account_pool=account_pool,
+                                    models_used=models_used)
+    return merge_responses(responses, segments, settings.overlap_seconds)
@@ -0,0 +1,421 @@
+"""命令行批量转录入口，不导入 PyQt5，适合在服务器或定时任务中使用。
+
+用法：
+    python -m transcriber recordings/ "meetings/**/*.mp3" -j 4
+    python -m transcriber a.wav b.wav --format jsonl -o results.jsonl
+    python -m transcriber lecture.mp3 --format srt
+    python -m transcriber --watch /srv/recordings -j 4
+    python -m transcriber --live
+    python -m transcriber archive/ --dedup -j 4
+
+Token 可通过 --token 或环境变量 SILICONFLOW_API_TOKEN 提供；多次指定 --token（或在环境变量中用逗号分隔）时
+请求在这些账号之间按延迟与剩余配额分配，--fallback-model 指定所有账号都不可用时改用的模型。
+接口地址可通过 --api-url 或环境变量 SILICONFLOW_API_URL 改为其他兼容接口。
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
+
+from transcriber import (accounts, audio, cache, chunking, core, dedup, live, preprocess, scheduler, subtitles,
+                         transport, vad, watch)
+
+TOKEN_ENV = "SILICONFLOW_API_TOKEN"
+DEFAULT_WORKERS = 3
+# 每个音频写一个输出文件的格式
+FILE_FORMATS = ("txt",) + subtitles.FORMATS
+
+
+def expand_inputs(patterns):
+    """展开文件、通配符与目录，返回去重后的音频文件列表。"""
+    files = []
+    seen = set()
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        if not paths or not all(os.path.exists(path) for path in paths):
+            print(f"警告: 找不到 {pattern}", file=sys.stderr)
+        for path in core.collect_audio_files(paths):
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m transcriber", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", help="音频文件、通配符或目录")
+    parser.add_argument("--token", action="append",
+                        help=f"Bearer Token，可重复指定多个组成账号池，默认读取环境变量 {TOKEN_ENV}（逗号分隔）")
+    parser.add_argument("--model", default=core.DEFAULT_MODEL, help="模型名称")
+    parser.add_argument("--api-url", help=f"转录接口地址，默认读取环境变量 {transport.API_URL_ENV}，"
+                                           f"未设置时为 {transport.DEFAULT_API_URL}")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS, help="同时转录的文件数")
+    parser.add_argument("--format", choices=FILE_FORMATS + ("jsonl",), default="txt",
+                        help="txt/srt/vtt/json: 每个音频写一个同名文件（字幕与 json 带分段时间戳）；"
+                             "jsonl: 所有结果写入一个 JSON Lines 文件")
+    parser.add_argument("-o", "--output",
+                        help="jsonl 格式时为输出文件（默认标准输出），其他格式时为输出目录（默认写在音频旁边）")
+
+    group = parser.add_argument_group("监视文件夹")
+    group.add_argument("--watch", action="store_true",
+                       help="转录输入目录中尚未转录的文件后继续监视，新文件写完后自动转录，按 Ctrl+C 退出"
+                            "（需要 watchdog，不支持 jsonl 格式）")
+    group.add_argument("--settle", type=float, default=watch.DEFAULT_SETTLE_SECONDS, metavar="SECONDS",
+                       help="文件在最后一次写入后静默多久视为写完")
+
+    group = parser.add_argument_group("实时转录")
+    group.add_argument("--live", action="store_true",
+                       help="从麦克风边录音边转录（需要 sounddevice），文本按顺序输出到标准输出，按 Ctrl+C 结束；"
+                            "给出一个音频文件时把它按实时速度作为模拟输入")
+    group.add_argument("--live-speed", type=float, default=1.0, metavar="SPEED", help="模拟输入的速度（倍速）")
+    group.add_argument("--live-silence", type=float, default=live.DEFAULT_MIN_SILENCE_SECONDS, metavar="SECONDS",
+                       help="语音之后静音多久切出一个分段")
+    group.add_argument("--live-parallelism", type=int, default=live.DEFAULT_PARALLELISM, metavar="N",
+                       help="同时上传的分段数")
+
+    group = parser.add_argument_group("处理选项")
+    group.add_argument("--no-chunking", action="store_true", help="不对长音频分段")
+    group.add_argument("--chunk-seconds", type=int, default=chunking.DEFAULT_CHUNK_SECONDS)
+    group.add_argument("--chunk-overlap", type=int, default=chunking.DEFAULT_OVERLAP_SECONDS)
+    group.add_argument("--chunk-parallelism", type=int, default=chunking.DEFAULT_PARALLELISM)
+    group.add_argument("--preprocess", choices=sorted(preprocess.FORMATS), help="上传前重新编码为该格式")
+    group.add_argument("--vad", nargs="?", type=float, const=vad.DEFAULT_MIN_SILENCE_SECONDS, metavar="SECONDS",
+                       help="上传前去除长于 SECONDS 秒的静音")
+    group.add_argument("--no-cache", action="store_true", help="不使用转录缓存")
+    group.add_argument("--cache-dir", help="缓存目录，默认与图形界面共用")
+
+    group = parser.add_argument_group("去重")
+    group.add_argument("--dedup", action="store_true",
+                       help="提交前比较音频指纹，内容相同或近似（重新导出、换格式、截取）的文件只转录一次，"
+                            "结果分发给其他文件（近似检测需要 numpy）")
+    group.add_argument("--dedup-threshold", type=float, default=dedup.DEFAULT_MAX_BIT_ERROR, metavar="RATE",
+                       help="指纹位错误率不超过该值时视为重复，越小越严格")
+
+    group = parser.add_argument_group("账号池")
+    group.add_argument("--fallback-model", action="append", default=[], metavar="MODEL",
+                       help="所有账号都无法使用 --model 时改用的模型，可重复指定（结果不写入缓存）")
+    group.add_argument("--account-rpm", type=int, help="每个账号每分钟的请求配额，默认不限")
+
+    group = parser.add_argument_group("重试与限流")
+    group.add_argument("--max-retries", type=int, default=scheduler.DEFAULT_MAX_RETRIES,
+                       help="遇到 429、5xx 或网络错误时的最大重试次数")
+    group.add_argument("--rate-limit", type=float, help="请求速率上限（次/秒），默认不限，被限流时自动降速")
+    return parser
+
+
+def parse_tokens(args):
+    tokens = []
+    for value in args.token or [os.environ.get(TOKEN_ENV, "")]:
+        for token in value.split(","):
+            token = token.strip()
+            if token and token not in tokens:
+                tokens.append(token)
+    return tokens
+
+
+def build_account_pool(tokens, args):
+    """多个 Token 或指定了备用模型时返回 AccountPool，否则返回 None。"""
+    if len(tokens) == 1 and not args.fallback_model:
+        return None
+    return accounts.AccountPool(tokens, args.fallback_model, args.account_rpm)
+
+
+def report_accounts(options):
+    if options.accounts is not None:
+        print("账号统计：", file=sys.stderr)
+        for stats in options.accounts.stats():
+            print(f"  {accounts.describe_account(stats)}", file=sys.stderr)
+
+
+def build_options(args, account_pool=None):
+    chunk_settings = None
+    if not args.no_chunking:
+        chunk_settings = chunking.ChunkSettings(args.chunk_seconds, args.chunk_overlap, args.chunk_parallelism)
+    transcription_cache = None if args.no_cache else cache.TranscriptionCache(args.cache_dir)
+    request_scheduler = scheduler.RequestScheduler(max_retries=args.max_retries, rate=args.rate_limit)
+    return core.TranscriptionOptions(chunk_settings, transcription_cache, args.preprocess, args.vad,
+                                     request_scheduler, account_pool)
+
+
+class ResultWriter:
+    """按输出格式写出结果。"""
+
+    def __init__(self, fmt, output):
+        self.fmt = fmt
+        self.output = output
+        self.stream = None
+        self._lock = threading.Lock()
+        if fmt == "jsonl":
+            self.stream = open(output, 'w', encoding='utf-8') if output else sys.stdout
+        elif output:
+            os.makedirs(output, exist_ok=True)
+
+    def write(self, path, result=None, error=None):
+        if self.fmt == "jsonl":
+            record = {"file": path, "text": result.text if result else None,
+                      "elapsed": round(result.elapsed, 3) if result else None,
+                      "cached": result.cache_hit if result else False,
+                      "retries": result.retry_stats.retries if result else None,
+                      "throttle_seconds": round(result.retry_stats.throttle_seconds, 3) if result else None,
+                      "timing": result.timing.as_dict() if result else None,
+                      "fallback_models": sorted(result.models_used) if result else None,
+                      "duplicate_of": result.duplicate_of if result else None,
+                      "segments": subtitles.to_response(result.segments) if result else None,
+                      "error": str(error) if error else None}
+            with self._lock:
+                self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.stream.flush()
+        elif result is not None:
+            output_path = self.output_path(path)
+            # 先写临时文件再改名，中途退出不会留下不完整、却被当作已转录的输出
+            with open(output_path + ".part", 'w', encoding='utf-8') as f:
+                if self.fmt == "txt":
+                    f.write(result.text)
+                else:
+                    subtitles.write(f, self.fmt, result.segments, path)
+            os.replace(output_path + ".part", output_path)
+
+    def output_path(self, path):
+        """每个音频一个文件的格式下 path 对应的输出文件。"""
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.output or os.path.dirname(path), f"{stem}.{self.fmt}")
+
+    def is_done(self, path):
+        """输出文件已存在且不早于音频时，视为已经转录过。"""
+        if self.fmt not in FILE_FORMATS:
+            return False
+        try:
+            return os.path.getmtime(self.output_path(path)) >= os.path.getmtime(path)
+        except OSError:
+            return False
+
+    def close(self):
+        if self.stream is not None and self.stream is not sys.stdout:
+            self.stream.close()
+
+
+def describe_result(result):
+    note = "（缓存）" if result.cache_hit else ""
+    if result.duplicate_of:
+        note += f"（与 {os.path.basename(result.duplicate_of)} 重复，未上传）"
+    retry_detail = result.retry_stats.describe()
+    if retry_detail:
+        note += f"（{retry_detail}）"
+    if result.models_used:
+        note += f"（备用模型 {', '.join(sorted(result.models_used))}）"
+    return f"完成{note} {result.elapsed:.2f}s"
+
+
+def watch_folders(directories, files, token, args, options, writer):
+    """转录 files 中尚未转录的文件，然后监视 directories，新文件写完后自动转录，直到按下 Ctrl+C。
+
+    转录线程数固定为 --workers，大量文件同时到达时在线程池的队列中排队。
+    """
+    cancel_token = core.CancelToken()
+    executor = ThreadPoolExecutor(max_workers=max(1, args.workers))
+    lock = threading.Lock()
+    queued = set()  # 排队或正在转录的文件
+    counts = {"done": 0, "failed": 0}
+
+    def finished(path, future):
+        with lock:
+            queued.discard(path)
+            waiting = len(queued)
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            writer.write(path, error=e)
+            with lock:
+                counts["failed"] += 1
+            print(f"[等待 {waiting}] {path} 失败: {e}", file=sys.stderr)
+            return
+        writer.write(path, result)
+        with lock:
+            counts["done"] += 1
+        print(f"[等待 {waiting}] {path} {describe_result(result)}", file=sys.stderr)
+
+    def enqueue(path):
+        path = os.path.abspath(path)
+        if writer.is_done(path):
+            return
+        with lock:
+            if path in queued:
+                return
+            queued.add(path)
+        future = executor.submit(core.transcribe_file, token, args.model, path, options, cancel_token)
+        future.add_done_callback(lambda future: finished(path, future))
+
+    watcher = watch.FolderWatcher(directories, enqueue, settle_seconds=args.settle)
+    # 先开始监视再处理已有文件，扫描期间新增的文件不会遗漏（重复的由 queued 与 is_done 排除）
+    watcher.start()
+    for path in files:
+        enqueue(path)
+    print(f"正在监视 {', '.join(directories)}，按 Ctrl+C 退出", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        cancel_token.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
+    print(f"已停止：完成 {counts['done']} 个，失败 {counts['failed']} 个", file=sys.stderr)
+    return 0
+
+
+def find_duplicates(files, args, cancel_token):
+    """计算指纹并把 files 分组，打印分组与预计的节省。"""
+    if not dedup.available():
+        print("警告: 没有安装 numpy，只合并内容完全相同的文件", file=sys.stderr)
+    start = time.perf_counter()
+    try:
+        groups = dedup.find_groups(files, args.dedup_threshold, max(args.workers, dedup.DEFAULT_WORKERS), cancel_token)
+    except KeyboardInterrupt:
+        cancel_token.cancel()
+        raise
+    for group in groups:
+        for duplicate in group.copies:
+            kind = "相同" if duplicate.exact else "截取自" if duplicate.trimmed else "近似"
+            print(f"  {duplicate.path} {kind} {group.representative.path}"
+                  f"（偏移 {duplicate.offset:.2f}s，位错误率 {duplicate.bit_error:.2f}）", file=sys.stderr)
+    print(f"去重：{dedup.describe_summary(dedup.plan_summary(groups), time.perf_counter() - start)}", file=sys.stderr)
+    return groups
+
+
+def transcribe_live(token, args, options):
+    """实时转录：每个分段的文本按顺序输出到标准输出，延迟输出到标准错误，按 Ctrl+C 停止录音。"""
+    if args.inputs:
+        source = live.WavSource(args.inputs[0], args.live_speed)
+    else:
+        source = live.MicrophoneSource()
+
+    def on_chunk(chunk):
+        if chunk.error is None and chunk.text.strip():
+            print(chunk.text.strip(), flush=True)
+        print(f"  {live.describe_chunk(chunk)}", file=sys.stderr)
+
+    transcriber = live.LiveTranscriber(token, args.model, source, options, on_chunk=on_chunk,
+                                       parallelism=args.live_parallelism, min_silence=args.live_silence)
+    transcriber.start()
+    print(f"实时转录中：{source.label}，按 Ctrl+C 结束", file=sys.stderr)
+    try:
+        while not transcriber.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        # 停止录音后等待已录下的语音转录完，再按一次 Ctrl+C 立即退出
+        transcriber.stop()
+        try:
+            transcriber.wait()
+        except KeyboardInterrupt:
+            transcriber.cancel()
+            transcriber.wait()
+    summary = transcriber.latency_summary()
+    print(f"实时转录结束：{live.describe_summary(summary)}", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    tokens = parse_tokens(args)
+    if not tokens:
+        parser.error(f"请通过 --token 或环境变量 {TOKEN_ENV} 提供 Bearer Token")
+    token = tokens[0]
+    if args.live:
+        if args.watch:
+            parser.error("--live 与 --watch 不能同时使用")
+        if len(args.inputs) > 1:
+            parser.error("--live 最多接受一个作为模拟输入的音频文件")
+        if not args.inputs and not live.available():
+            parser.error("从麦克风录音需要先安装 sounddevice，或给出一个音频文件作为模拟输入")
+        if not audio.numpy_available():
+            parser.error("--live 需要先安装 numpy")
+        if args.api_url:
+            transport.set_api_url(args.api_url)
+        options = build_options(args, build_account_pool(tokens, args))
+        try:
+            return transcribe_live(token, args, options)
+        finally:
+            transport.close_session()
+            report_accounts(options)
+    if not args.inputs:
+        parser.error("需要至少一个音频文件、通配符或目录")
+    if args.dedup and args.watch:
+        parser.error("--dedup 不能与 --watch 同时使用")
+    directories = [path for path in args.inputs if os.path.isdir(path)]
+    if args.watch:
+        if not watch.available():
+            parser.error("--watch 需要先安装 watchdog")
+        if args.format not in FILE_FORMATS:
+            parser.error("--watch 不支持 jsonl 格式")
+        if not directories:
+            parser.error("--watch 需要至少一个目录")
+    files = expand_inputs(args.inputs)
+    if not files and not args.watch:
+        parser.error("没有找到音频文件")
+
+    if args.api_url:
+        transport.set_api_url(args.api_url)
+    options = build_options(args, build_account_pool(tokens, args))
+    writer = ResultWriter(args.format, args.output)
+    if args.watch:
+        try:
+            return watch_folders(directories, files, token, args, options, writer)
+        finally:
+            writer.close()
+            transport.close_session()
+            report_accounts(options)
+
+    cancel_token = core.CancelToken()
+    groups = find_duplicates(files, args, cancel_token) if args.dedup else dedup.singletons(files)
+    failed = 0
+    done = 0
+    shared = []  # 由代表文件分发结果、没有上传的副本
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            futures = {executor.submit(core.transcribe_group, token, args.model, group, options, cancel_token): group
+                       for group in groups}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        outcomes = future.result()
+                    except Exception as e:
+                        outcomes = [(path, e) for path in futures[future].paths]
+                    for path, result in outcomes:
+                        done += 1
+                        if isinstance(result, Exception):
+                            failed += 1
+                            writer.write(path, error=result)
+                            print(f"[{done}/{len(files)}] {path} 失败: {result}", file=sys.stderr)
+                            continue
+                        if result.duplicate_of:
+                            shared.append(path)
+                        writer.write(path, result)
+                        print(f"[{done}/{len(files)}] {path} {describe_result(result)}", file=sys.stderr)
+            except KeyboardInterrupt:
+                # 立即中断所有正在上传的请求，不必等到超时
+                cancel_token.cancel()
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        writer.close()
+        transport.close_session()
+    if args.dedup:
+        saved_bytes = sum(os.path.getsize(path) for path in shared)
+        print(f"去重：实际少转录 {len(shared)} 个文件，少上传 {saved_bytes / 1024 / 1024:.1f} MB", file=sys.stderr)
+    report_accounts(options)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
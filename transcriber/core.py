@@ -0,0 +1,280 @@
+"""转录流程：缓存查询、去静音、预处理、长音频分段与上传。
+
+本模块及其依赖都不导入 PyQt5，图形界面、命令行与其他工具共用这里的逻辑。
+"""
+import os
+import time
+
+from transcriber import (accounts, audio, cache, chunking, dedup, preprocess, scheduler, subtitles, timing, transport,
+                         vad)
+from transcriber.cancel import CancelToken, TranscriptionCancelled
+from transcriber.defaults import AUDIO_EXTENSIONS, DEFAULT_MODEL
+
+# 未开启预处理时，去静音后的音频以无损的 FLAC 上传（需要 ffmpeg，否则为 WAV）
+VAD_FORMAT = "flac"
+
+
+class TranscriptionOptions:
+    """一次转录使用的可选处理步骤，均为 None 时直接上传原文件。
+
+    scheduler 为多个任务共享的 RequestScheduler，负责失败重试与限流；为 None 时请求失败直接报错。
+    accounts 为 accounts.AccountPool 时每个请求从池中选择 Token（及备用模型），不使用传入的 token。
+    """
+
+    def __init__(self, chunk_settings=None, cache=None, preprocess_format=None, vad_min_silence=None,
+                 scheduler=None, accounts=None):
+        self.chunk_settings = chunk_settings
+        self.cache = cache
+        self.preprocess_format = preprocess_format
+        self.vad_min_silence = vad_min_silence
+        self.scheduler = scheduler
+        self.accounts = accounts
+
+
+class TranscriptionResult:
+    """一个文件的转录结果及处理过程中的统计信息。"""
+
+    def __init__(self, path, model_name, retry_callback=None):
+        self.path = path
+        self.model_name = model_name
+        self.data = {}
+        # [(起点秒, 终点秒, 文本)]，由 build_segments() 根据 data 生成
+        self.segments = []
+        self.elapsed = 0.0
+        self.cache_hit = False
+        # 结果由同组的代表文件分发而来时为代表文件的路径，本文件没有上传
+        self.duplicate_of = None
+        self.offset_map = None
+        self.retry_stats = scheduler.RetryStats(retry_callback)
+        self.timing = timing.JobTiming(path, model_name)
+        # 使用账号池时实际用到的备用模型
+        self.models_used = set()
+        # 上传统计：原始大小、实际上传字节数与上传请求耗时，直接上传原文件时为 None
+        self.original_bytes = None
+        self.uploaded_bytes = None
+        self.upload_seconds = None
+
+    @property
+    def text(self):
+        return self.data.get("text", "")
+
+    def record_upload(self, uploaded_bytes, upload_seconds):
+        self.original_bytes = os.path.getsize(self.path)
+        self.uploaded_bytes = uploaded_bytes
+        self.upload_seconds = upload_seconds
+
+
+def collect_audio_files(paths):
+    """展开文件与文件夹路径，返回其中的音频文件列表（文件夹按名称排序递归查找）。"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        files.append(os.path.join(root, name))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+def transcribe_file(token, model_name, path, options=None, cancel_token=None, progress_callback=None,
+                    retry_callback=None):
+    """转录单个音频文件，返回 TranscriptionResult。
+
+    progress_callback(已上传字节数, 总字节数) 报告上传进度，分段上传时为所有分段的汇总；
+    retry_callback(RetryStats) 在请求重试或因限流等待时调用。
+    cancel_token 被取消时会立即中断正在进行的上传与等待，抛出 TranscriptionCancelled；
+    接口返回错误时抛出 transport.TranscriptionError。
+    """
+    options = options or TranscriptionOptions()
+    result = TranscriptionResult(path, model_name, retry_callback)
+    start_time = time.time()
+    cancel_token = cancel_token or CancelToken()
+    check_cancelled = cancel_token.raise_if_cancelled
+
+    with result.timing.measure("read"):
+        audio_hash, cached = lookup_cache(path, model_name, options)
+    if cached is not None:
+        result.data = cached
+        result.cache_hit = True
+        build_segments(result)
+        result.elapsed = time.time() - start_time
+        return result
+
+    check_cancelled()
+    duration = None
+    if options.vad_min_silence is not None and audio.numpy_available():
+        # 去掉长静音后再上传，保留时间对应关系
+        with result.timing.measure("read"):
+            samples = audio.load_pcm(path)
+            duration = len(samples) / float(audio.SAMPLE_RATE)
+            samples, result.offset_map = vad.strip_silence(samples, min_silence_seconds=options.vad_min_silence)
+        result.data = _transcribe_pcm(token, model_name, samples, options, result, cancel_token, progress_callback,
+                                      source_path=path)
+        # 时间戳换算回原始音频；改为上传原文件时 offset_map 为 None，无需换算
+        if result.offset_map is not None:
+            subtitles.remap(result.data, result.offset_map.to_original)
+    elif options.chunk_settings and chunking.should_chunk(path, options.chunk_settings):
+        with result.timing.measure("read"):
+            samples = audio.load_pcm(path)
+        duration = len(samples) / float(audio.SAMPLE_RATE)
+        result.data = _transcribe_pcm(token, model_name, samples, options, result, cancel_token, progress_callback)
+    else:
+        upload = None
+        if options.preprocess_format:
+            with result.timing.measure("read"):
+                upload = preprocess.preprocess_file(path, options.preprocess_format)
+        check_cancelled()
+        upload_start = time.time()
+        if upload is not None:
+            result.data = _send(token, model_name, options, result, cancel_token,
+                                lambda token, model: transport.transcribe(
+                                    token, model, upload.as_file(), progress_callback=progress_callback,
+                                    cancel_token=cancel_token, job_timing=result.timing))
+            result.record_upload(len(upload.data), time.time() - upload_start)
+        else:
+            result.data = _send_file(token, model_name, path, options, result, cancel_token, progress_callback)
+
+    check_cancelled()
+    build_segments(result, duration)
+    # 由备用模型转录的结果不写入按原模型索引的缓存
+    if options.cache is not None and not result.models_used:
+        options.cache.put(audio_hash, model_name, result.data)
+    result.elapsed = time.time() - start_time
+    return result
+
+
+def transcribe_group(token, model_name, group, options=None, cancel_token=None):
+    """转录一组重复的音频（dedup.DuplicateGroup），返回 [(路径, TranscriptionResult 或异常)]。
+
+    只转录代表文件，结果分发给其他副本；代表文件转录失败，或截取的副本无法从其分段中准确截出时，副本单独转录。
+    取消时抛出 TranscriptionCancelled。
+    """
+    outcomes = []
+    try:
+        result = transcribe_file(token, model_name, group.representative.path, options, cancel_token)
+    except TranscriptionCancelled:
+        raise
+    except Exception as e:
+        result = e
+    outcomes.append((group.representative.path, result))
+    for duplicate in group.copies:
+        derived = None if isinstance(result, Exception) else duplicate_result(result, duplicate, options)
+        if derived is None:
+            try:
+                derived = transcribe_file(token, model_name, duplicate.path, options, cancel_token)
+            except TranscriptionCancelled:
+                raise
+            except Exception as e:
+                derived = e
+        outcomes.append((duplicate.path, derived))
+    return outcomes
+
+
+def duplicate_result(result, duplicate, options=None):
+    """由代表文件的 TranscriptionResult 生成副本（dedup.DuplicateCopy）的结果，无法准确截取时返回 None。
+
+    启用缓存时结果同时以副本的内容哈希写入缓存，之后单独转录该文件也能命中。
+    """
+    data = dedup.fan_out(result.data, duplicate)
+    if data is None:
+        return None
+    derived = TranscriptionResult(duplicate.path, result.model_name)
+    derived.data = data
+    derived.duplicate_of = result.path
+    derived.models_used = set(result.models_used)
+    derived.record_upload(0, 0.0)
+    build_segments(derived, duplicate.fingerprint.duration)
+    if options is not None and options.cache is not None and not result.models_used:
+        options.cache.put(duplicate.fingerprint.digest, result.model_name, derived.data)
+    return derived
+
+
+def build_segments(result, duration=None):
+    """根据 result.data 生成 result.segments。
+
+    响应不带时间戳时整段文本作为一个分段，音频时长记入 data["duration"]（与接口 verbose_json 的字段相同），
+    缓存与任务数据库中的结果因此也能直接导出字幕。
+    """
+    data = result.data
+    if not subtitles.has_timestamps(data) and data.get("duration") is None and data.get("text"):
+        data["duration"] = duration if duration is not None else audio.probe_duration(result.path)
+    result.segments = subtitles.from_response(data)
+
+
+def lookup_cache(path, model_name, options):
+    """返回 (音频哈希, 缓存的结果)；未启用缓存时哈希为 None，未命中时结果为 None。"""
+    if options.cache is None:
+        return None, None
+    # 哈希分块计算，大文件不会整个读入内存
+    audio_hash = cache.hash_file(path)
+    return audio_hash, options.cache.get(audio_hash, model_name)
+
+
+def needs_local_processing(path, options):
+    """是否需要先在本地解码（去静音或长音频分段），与 transcribe_file 中的判断一致。
+
+    为 False 时只需上传原文件（或预处理后的文件）。
+    """
+    if options.vad_min_silence is not None and audio.numpy_available():
+        return True
+    return bool(options.chunk_settings and chunking.should_chunk(path, options.chunk_settings))
+
+
+def _transcribe_pcm(token, model_name, samples, options, result, cancel_token, progress_callback, source_path=None):
+    """上传已解码的PCM：长音频在静音处分段并发上传，否则编码后整段上传。
+
+    source_path 为去静音前的原文件：未开启预处理时以无损的 VAD_FORMAT 编码，
+    整段上传且编码结果不比原文件小时改为上传原文件，并把 result.offset_map 置为 None。
+    """
+    if not len(samples):
+        # 整段都是静音，无需请求
+        result.record_upload(0, 0.0)
+        return {"text": ""}
+    fmt = options.preprocess_format or (VAD_FORMAT if source_path is not None else None)
+    encoder = preprocess.encoder_for(fmt) if fmt else None
+    encoder = encoder or chunking.encode_wav
+    chunk_settings = options.chunk_settings
+    if chunk_settings and chunk_settings.needs_chunking(len(samples) / float(audio.SAMPLE_RATE)):
+        stats = {}
+        data = chunking.transcribe_pcm(token, model_name, samples, chunk_settings,
+                                       cancel_token, encoder=encoder, stats=stats,
+                                       progress_callback=progress_callback, scheduler=options.scheduler,
+                                       retry_stats=result.retry_stats, job_timing=result.timing,
+                                       account_pool=options.accounts, models_used=result.models_used)
+        result.record_upload(stats.get("uploaded_bytes", 0), stats.get("upload_seconds", 0.0))
+        return data
+
+    with result.timing.measure("read"):
+        extension, payload, content_type = encoder(samples)
+    if source_path is not None and len(payload) >= os.path.getsize(source_path):
+        # 原文件是压缩格式时，去掉的静音可能抵不过重新编码增加的体积
+        result.offset_map = None
+        return _send_file(token, model_name, source_path, options, result, cancel_token, progress_callback)
+    stem = os.path.splitext(os.path.basename(result.path))[0]
+    upload_start = time.time()
+    data = _send(token, model_name, options, result, cancel_token, lambda token, model: transport.transcribe(
+        token, model, (f"{stem}.{extension}", payload, content_type),
+        progress_callback=progress_callback, cancel_token=cancel_token, job_timing=result.timing))
+    result.record_upload(len(payload), time.time() - upload_start)
+    return data
+
+
+def _send_file(token, model_name, path, options, result, cancel_token, progress_callback):
+    """直接上传原文件。"""
+    with open(path, 'rb') as f:
+        def send(token, model):
+            # 重试时从文件开头重新上传
+            f.seek(0)
+            # 所有线程共享同一个长连接Session，文件分块流式上传
+            return transport.transcribe(token, model, f, progress_callback=progress_callback,
+                                        cancel_token=cancel_token, job_timing=result.timing)
+        return _send(token, model_name, options, result, cancel_token, send)
+
+
+def _send(token, model_name, options, result, cancel_token, send):
+    """经由共享的调度器（失败重试、限流）与账号池发送请求，send(token, 模型) 每次调用都重新构造请求。"""
+    return accounts.call(send, token, model_name, options.scheduler, options.accounts, cancel_token,
+                         result.retry_stats, result.models_used)
@@ -0,0 +1,348 @@
+"""检测批量任务中相同与近似相同的音频，每组只转录一次。
+
+同一段录音经常以多个文件出现：重新导出、换了封装格式或码率、截取了其中一段。提交前为每个文件计算：
+
+- 文件内容的 SHA-256（与转录缓存的键相同），内容完全相同的文件不必解码；
+- 音频指纹：解码为 8 kHz 单声道，每 64 ms 一帧，在 300～2000 Hz 内 33 个对数间隔频带上取能量，
+  相邻频带的能量差在相邻两帧之间增大记为 1、否则为 0，每帧得到一个 32 位的子指纹（Haitsma–Kalker 方法）。
+  重新编码、改变音量或采样率后子指纹基本不变，不同录音之间约有一半的位不同。
+
+分组时按时长从长到短处理文件：用子指纹的高、低 16 位在已有代表文件的索引中查找相同的帧，按 (代表文件, 帧偏移)
+计票，对票数最多的几个对齐位置逐帧比较，位错误率不超过阈值且覆盖整个文件时视为该代表文件的副本，
+否则成为新的代表文件。每组选时长完整的文件中最小的一个转录，结果按对齐偏移分发给其他文件；
+截取的副本从带时间戳的分段中截出对应的部分，分段跨越截取边界、无法准确截出时仍需单独转录。
+"""
+import copy
+import os
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from transcriber import audio, cache, chunking, subtitles
+
+FINGERPRINT_RATE = 8000
+FRAME_LENGTH = 2048  # 256 ms
+HOP_LENGTH = 512  # 64 ms
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 2000.0
+BAND_COUNT = 33
+# 每次做 FFT 的帧数，长音频分块计算，内存占用与时长无关
+BLOCK_FRAMES = 4096
+# 均方根能量低于该值（int16）的帧视为静音，不参与索引与比较
+SILENCE_RMS = 50.0
+
+DEFAULT_MAX_BIT_ERROR = 0.35
+DEFAULT_WORKERS = 4
+# 逐帧比较的候选对齐位置数，以及候选位置至少需要的票数
+CANDIDATES = 3
+MIN_VOTES = 2
+# 至少比较的有声帧数（约 2 秒），以及副本中至少需要参与比较的有声帧比例
+MIN_COMPARED_FRAMES = 30
+MIN_COMPARED_FRACTION = 0.5
+# 时长与起点相差不超过该秒数时视为完整的副本，超出时为截取的副本
+TRIM_TOLERANCE = 1.0
+# 截取副本时，分段超出截取范围不超过该秒数仍可使用
+SLICE_TOLERANCE = 0.5
+
+
+def available():
+    return audio.numpy_available()
+
+
+class Fingerprint:
+    """一个文件的内容哈希与音频指纹；无法解码或没有 numpy 时只有哈希，只能与内容相同的文件合并。"""
+
+    def __init__(self, path, size, digest, duration=None, bits=None, voiced=None, error=None):
+        self.path = path
+        self.size = size
+        self.digest = digest
+        self.duration = duration
+        self.bits = bits  # 每帧的 32 位子指纹（uint32 数组）
+        self.voiced = voiced  # 每帧是否有声（bool 数组）
+        self.error = error  # 无法计算音频指纹的原因
+
+    @property
+    def frames(self):
+        return 0 if self.bits is None else len(self.bits)
+
+
+class DuplicateCopy:
+    """组内的一个副本：其 0 秒对应代表文件的 offset 秒。"""
+
+    def __init__(self, fingerprint, offset=0.0, exact=False, bit_error=0.0, trimmed=False):
+        self.fingerprint = fingerprint
+        self.offset = offset
+        self.exact = exact  # 文件内容与代表文件完全相同
+        self.bit_error = bit_error
+        self.trimmed = trimmed  # 只截取了代表文件的一部分
+
+    @property
+    def path(self):
+        return self.fingerprint.path
+
+
+class DuplicateGroup:
+    """内容相同或近似的一组文件，只转录 representative。"""
+
+    def __init__(self, representative, copies=None):
+        self.representative = representative
+        self.copies = copies or []
+
+    @property
+    def paths(self):
+        return [self.representative.path] + [duplicate.path for duplicate in self.copies]
+
+
+def band_edges():
+    """各频带在 FFT 结果中的起止下标。"""
+    np = audio.np
+    frequencies = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, BAND_COUNT + 1)
+    return np.round(frequencies * FRAME_LENGTH / FINGERPRINT_RATE).astype(int)
+
+
+def signature(samples):
+    """返回 (子指纹, 是否有声)，每 HOP_LENGTH 个采样一帧；音频短于一帧时均为空数组。"""
+    np = audio.np
+    frames = 1 + (len(samples) - FRAME_LENGTH) // HOP_LENGTH if len(samples) >= FRAME_LENGTH else 0
+    if frames < 2:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=bool)
+    edges = band_edges()
+    window = np.hanning(FRAME_LENGTH).astype(np.float32)
+    windows = np.lib.stride_tricks.sliding_window_view(samples, FRAME_LENGTH)[::HOP_LENGTH]
+    energy = np.empty((frames, BAND_COUNT), dtype=np.float32)
+    rms = np.empty(frames, dtype=np.float32)
+    for start in range(0, frames, BLOCK_FRAMES):
+        block = windows[start:start + BLOCK_FRAMES].astype(np.float32)
+        rms[start:start + len(block)] = np.sqrt(np.mean(block * block, axis=1))
+        power = np.abs(np.fft.rfft(block * window, axis=1)[:, edges[0]:edges[-1]]) ** 2
+        bands = np.add.reduceat(power, edges[:-1] - edges[0], axis=1)
+        energy[start:start + len(block)] = np.log(bands + 1e-3)
+    difference = energy[:, :-1] - energy[:, 1:]
+    bits = np.packbits(difference[1:] > difference[:-1], axis=1, bitorder="little").view("<u4").ravel()
+    voiced = (rms[1:] > SILENCE_RMS) & (rms[:-1] > SILENCE_RMS)
+    return bits.astype(np.uint32), voiced
+
+
+def fingerprint(path, digest=None):
+    """计算一个文件的 Fingerprint，digest 为已算好的内容哈希。"""
+    fingerprint = Fingerprint(path, os.path.getsize(path), digest or cache.hash_file(path))
+    if not available():
+        fingerprint.error = "需要 numpy"
+        return fingerprint
+    try:
+        samples = audio.load_pcm(path, FINGERPRINT_RATE)
+    except (audio.AudioError, OSError) as e:
+        fingerprint.error = str(e)
+        return fingerprint
+    fingerprint.duration = len(samples) / float(FINGERPRINT_RATE)
+    fingerprint.bits, fingerprint.voiced = signature(samples)
+    return fingerprint
+
+
+def bit_error(reference, candidate, offset):
+    """candidate 的第 i 帧对齐 reference 的第 i + offset 帧时，重叠的有声帧中不同位的比例与比较的帧数。"""
+    np = audio.np
+    start = max(0, -offset)
+    end = min(candidate.frames, reference.frames - offset)
+    if end <= start:
+        return 1.0, 0
+    voiced = candidate.voiced[start:end] & reference.voiced[start + offset:end + offset]
+    compared = int(voiced.sum())
+    if not compared:
+        return 1.0, 0
+    different = candidate.bits[start:end][voiced] ^ reference.bits[start + offset:end + offset][voiced]
+    return np.unpackbits(different.view(np.uint8)).sum() / (32.0 * compared), compared
+
+
+class FingerprintIndex:
+    """代表文件子指纹的索引：子指纹的高、低 16 位分别作为键，值为 (代表文件序号, 帧号) 列表。"""
+
+    def __init__(self):
+        self.fingerprints = []
+        self._entries = defaultdict(list)
+
+    @staticmethod
+    def _keys(bits):
+        return ((bits >> 16) | 0x10000, bits & 0xFFFF)
+
+    def add(self, fingerprint):
+        number = len(self.fingerprints)
+        self.fingerprints.append(fingerprint)
+        frames = audio.np.flatnonzero(fingerprint.voiced)
+        for keys in self._keys(fingerprint.bits[frames]):
+            for frame, key in zip(frames.tolist(), keys.tolist()):
+                self._entries[key].append((number, frame))
+
+    def candidates(self, fingerprint):
+        """按票数从多到少返回 (代表文件, 帧偏移)。"""
+        votes = Counter()
+        frames = audio.np.flatnonzero(fingerprint.voiced)
+        for keys in self._keys(fingerprint.bits[frames]):
+            for frame, key in zip(frames.tolist(), keys.tolist()):
+                for number, reference_frame in self._entries.get(key, ()):
+                    votes[number, reference_frame - frame] += 1
+        return [(self.fingerprints[number], offset)
+                for (number, offset), count in votes.most_common(CANDIDATES) if count >= MIN_VOTES]
+
+
+def match(index, fingerprint, max_bit_error=DEFAULT_MAX_BIT_ERROR):
+    """在代表文件中查找 fingerprint 的原始录音，返回 DuplicateCopy 与对应的代表文件，找不到时返回 None。"""
+    if not fingerprint.frames:
+        return None
+    slack = int(TRIM_TOLERANCE * FINGERPRINT_RATE / HOP_LENGTH)
+    needed = max(MIN_COMPARED_FRAMES, int(MIN_COMPARED_FRACTION * fingerprint.voiced.sum()))
+    best = None
+    for reference, offset in index.candidates(fingerprint):
+        # 副本必须整个落在代表文件之内
+        if offset < -slack or offset + fingerprint.frames > reference.frames + slack:
+            continue
+        error, compared = bit_error(reference, fingerprint, offset)
+        if compared >= needed and error <= max_bit_error and (best is None or error < best[0]):
+            best = (error, reference, offset)
+    if best is None:
+        return None
+    error, reference, offset = best
+    seconds = offset * HOP_LENGTH / float(FINGERPRINT_RATE)
+    trimmed = abs(seconds) > TRIM_TOLERANCE or reference.duration - fingerprint.duration > TRIM_TOLERANCE
+    return reference, DuplicateCopy(fingerprint, seconds, bit_error=float(error), trimmed=trimmed)
+
+
+def choose_representative(group):
+    """在时长完整的成员中选文件最小的作为代表文件，上传的字节最少；其余成员的偏移换算到新的代表文件上。"""
+    candidates = [duplicate for duplicate in group.copies if not duplicate.trimmed]
+    smallest = min(candidates, key=lambda duplicate: duplicate.fingerprint.size, default=None)
+    if smallest is None or smallest.fingerprint.size >= group.representative.size:
+        return group
+    copies = [DuplicateCopy(group.representative, -smallest.offset, bit_error=smallest.bit_error)]
+    for duplicate in group.copies:
+        if duplicate is not smallest:
+            duplicate.offset -= smallest.offset
+            duplicate.exact = duplicate.fingerprint.digest == smallest.fingerprint.digest
+            copies.append(duplicate)
+    return DuplicateGroup(smallest.fingerprint, copies)
+
+
+def find_groups(paths, max_bit_error=DEFAULT_MAX_BIT_ERROR, workers=DEFAULT_WORKERS, cancel_token=None):
+    """把 paths 分为若干 DuplicateGroup（没有重复的文件单独一组），组按各自第一个文件在 paths 中的顺序排列。
+
+    无法读取的文件单独一组，留给转录时报错。cancel_token 被取消时抛出 TranscriptionCancelled。
+    """
+    by_digest = {}
+    unreadable = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for path, digest in zip(paths, executor.map(_hash, paths)):
+            if digest is None:
+                unreadable.append(path)
+            else:
+                by_digest.setdefault(digest, []).append(path)
+        # 内容相同的文件只解码一个
+        futures = [executor.submit(_fingerprint, same[0], digest, cancel_token) for digest, same in by_digest.items()]
+        fingerprints = [future.result() for future in futures]
+
+    # 先处理长的文件，截取的副本总能在其原始录音之后遇到
+    index = FingerprintIndex()
+    groups = {}
+    for fingerprint in sorted(fingerprints, key=lambda item: (-(item.duration or 0.0), item.size)):
+        found = match(index, fingerprint, max_bit_error) if index.fingerprints else None
+        if found is None:
+            groups[fingerprint.path] = DuplicateGroup(fingerprint)
+            if fingerprint.frames:
+                index.add(fingerprint)
+        else:
+            reference, duplicate = found
+            groups[reference.path].copies.append(duplicate)
+
+    result = [DuplicateGroup(Fingerprint(path, None, None)) for path in unreadable]
+    for group in groups.values():
+        # 内容完全相同的文件与其中已计算指纹的文件对齐方式相同
+        representative = group.representative
+        twins = [DuplicateCopy(_twin(representative, path), exact=True)
+                 for path in by_digest[representative.digest][1:]]
+        for duplicate in group.copies:
+            twins.extend(DuplicateCopy(_twin(duplicate.fingerprint, path), duplicate.offset,
+                                       bit_error=duplicate.bit_error, trimmed=duplicate.trimmed)
+                         for path in by_digest[duplicate.fingerprint.digest][1:])
+        group.copies.extend(twins)
+        result.append(choose_representative(group))
+    position = {path: i for i, path in enumerate(paths)}
+    result.sort(key=lambda group: min(position[path] for path in group.paths))
+    return result
+
+
+def _hash(path):
+    try:
+        return cache.hash_file(path)
+    except OSError:
+        return None
+
+
+def _fingerprint(path, digest, cancel_token):
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    return fingerprint(path, digest)
+
+
+def _twin(fingerprint, path):
+    twin = copy.copy(fingerprint)
+    twin.path = path
+    return twin
+
+
+def singletons(paths):
+    """不检测重复时每个文件单独一组（不计算哈希与指纹）。"""
+    return [DuplicateGroup(Fingerprint(path, None, None)) for path in paths]
+
+
+def fan_out(data, duplicate):
+    """由代表文件的转录结果 data 生成副本的结果；截取的副本无法从分段中准确截出时返回 None。"""
+    if duplicate.exact:
+        return copy.deepcopy(data)
+    duration = duplicate.fingerprint.duration
+    if not duplicate.trimmed:
+        data = copy.deepcopy(data)
+        subtitles.remap(data, lambda seconds: min(max(seconds - duplicate.offset, 0.0), duration))
+        if data.get("duration") is not None:
+            data["duration"] = duration
+        return data
+    if not subtitles.has_timestamps(data):
+        return None
+    if data.get("duration") is not None and data["duration"] + TRIM_TOLERANCE < duplicate.offset + duration:
+        # 转录结果的时长与指纹对不上，截取的部分可能不在结果之内
+        return None
+    segments = []
+    for start, end, text in subtitles.from_response(data):
+        start -= duplicate.offset
+        end -= duplicate.offset
+        if end <= SLICE_TOLERANCE or start >= duration - SLICE_TOLERANCE:
+            continue
+        if start < -SLICE_TOLERANCE or end > duration + SLICE_TOLERANCE:
+            # 分段跨越截取边界，无法确定其中哪些文字属于副本
+            return None
+        segments.append((max(start, 0.0), min(end, duration), text))
+    text = ""
+    for _, _, piece in segments:
+        text += chunking.continuation(text, piece)
+    return {"text": text, "duration": duration, "segments": subtitles.to_response(segments)}
+
+
+def plan_summary(groups):
+    """按分组预计节省的转录次数与上传字节数（按副本的原文件大小计）。"""
+    copies = [duplicate for group in groups for duplicate in group.copies]
+    return {
+        "files": sum(1 + len(group.copies) for group in groups),
+        "groups": len(groups),
+        "copies": len(copies),
+        "trimmed": sum(1 for duplicate in copies if duplicate.trimmed),
+        "saved_requests": len(copies),
+        "saved_bytes": sum(duplicate.fingerprint.size or 0 for duplicate in copies),
+    }
+
+
+def describe_summary(summary, seconds=None):
+    """返回去重统计的单行说明；seconds 为检测耗时。"""
+    description = (f"{summary['files']} 个文件分为 {summary['groups']} 组，{summary['copies']} 个是重复的"
+                   f"（其中截取 {summary['trimmed']} 个）| 少转录 {summary['saved_requests']} 个文件"
+                   f" | 少上传 {summary['saved_bytes'] / 1024 / 1024:.1f} MB")
+    if seconds is not None:
+        description += f" | 检测耗时 {seconds:.2f}s"
+    return description
+
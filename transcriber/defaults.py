@@ -0,0 +1,7 @@
+"""不依赖其他模块的默认值。
+
+图形界面在主窗口显示前只需要这些值，读取它们不会加载转录流程及其依赖（requests、numpy 等）。
+"""
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg")
+DEFAULT_MODEL = "FunAudioLLM/SenseVoiceSmall"
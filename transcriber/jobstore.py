@@ -0,0 +1,227 @@
+"""持久化的任务数据库（SQLite，WAL 模式）。
+
+记录每个文件的状态、转录结果、耗时与错误，程序崩溃或中途关闭后可以在下次启动时继续未完成的任务，
+已完成的文件不会重新上传。状态更新先放入内存队列，由后台线程每隔 FLUSH_INTERVAL 秒
+在一个事务中批量写入，上千个文件的批量任务不会因逐条提交而被磁盘 I/O 拖慢。
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+UNFINISHED = (PENDING, RUNNING)
+
+FLUSH_INTERVAL = 0.5
+# 队列中积压的更新超过该数量时立即写入
+FLUSH_THRESHOLD = 200
+# 已全部结束的批次保留的天数
+RETENTION_DAYS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    model TEXT NOT NULL,
+    status TEXT NOT NULL,
+    text TEXT,
+    result TEXT,
+    error TEXT,
+    elapsed REAL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    throttle_seconds REAL NOT NULL DEFAULT 0,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    timing TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, batch_id);
+"""
+
+# 旧版本数据库中没有的列：列名 -> 定义
+ADDED_COLUMNS = {"timing": "TEXT"}
+
+# 允许通过 update() 修改的字段
+FIELDS = ("status", "text", "result", "error", "elapsed", "retries", "throttle_seconds", "cache_hit", "timing")
+# 以 JSON 保存的字段
+JSON_FIELDS = ("result", "timing")
+COLUMNS = ("id, batch_id, path, model, status, text, result, error, elapsed, retries, throttle_seconds, cache_hit,"
+           " timing, updated_at")
+
+
+def default_database_path():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "SiliconFlowSpeechTranscriber", "jobs.sqlite3")
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "siliconflow-speech-transcriber", "jobs.sqlite3")
+
+
+class Job:
+    """数据库中的一条任务记录。"""
+
+    def __init__(self, row):
+        (self.id, self.batch_id, self.path, self.model, self.status, self.text, result, self.error,
+         self.elapsed, self.retries, self.throttle_seconds, cache_hit, timing, self.updated_at) = row
+        self.result = json.loads(result) if result else None
+        self.cache_hit = bool(cache_hit)
+        self.timing = json.loads(timing) if timing else None
+
+    @property
+    def finished(self):
+        return self.status not in UNFINISHED
+
+    def to_record(self):
+        """不含转录内容的统计记录，供 timing.summarize() 与导出使用。"""
+        return {
+            "id": self.id, "batch_id": self.batch_id, "path": self.path, "model": self.model,
+            "status": self.status, "cache_hit": self.cache_hit, "elapsed": self.elapsed, "retries": self.retries,
+            "throttle_seconds": self.throttle_seconds, "timing": self.timing, "updated_at": self.updated_at,
+        }
+
+
+class JobStore:
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL):
+        self.path = path or default_database_path()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.flush_interval = flush_interval
+        # 连接在界面线程与写入线程之间共享，所有访问都在 _lock 内进行
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 仍能保证崩溃后数据库一致，只可能丢失最近的几次提交
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+        self._pending = {}  # 任务 ID -> 待写入的字段
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="JobStoreWriter", daemon=True)
+        self._writer.start()
+
+    def _migrate(self):
+        """为旧版本创建的数据库补充新增的列。"""
+        existing = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+        with self._connection:
+            for name, definition in ADDED_COLUMNS.items():
+                if name not in existing:
+                    self._connection.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+
+    def create_batch(self, paths, model):
+        """新建一批任务并立即写入，返回各文件对应的任务 ID。"""
+        now = time.time()
+        with self._lock, self._connection:
+            batch_id = (self._connection.execute("SELECT COALESCE(MAX(batch_id), 0) + 1 FROM jobs")
+                        .fetchone()[0])
+            ids = []
+            for path in paths:
+                cursor = self._connection.execute(
+                    "INSERT INTO jobs (batch_id, path, model, status, created_at, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", (batch_id, path, model, PENDING, now, now))
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def update(self, job_id, **fields):
+        """记录任务状态的变化，由后台线程批量写入。result 与 timing 可以是字典。"""
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+        for name in JSON_FIELDS:
+            if isinstance(fields.get(name), dict):
+                fields[name] = json.dumps(fields[name], ensure_ascii=False)
+        with self._pending_lock:
+            self._pending.setdefault(job_id, {}).update(fields, updated_at=time.time())
+            backlog = len(self._pending)
+        if backlog >= FLUSH_THRESHOLD:
+            self._wakeup.set()
+
+    def flush(self):
+        """把队列中的更新写入数据库。"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        with self._lock, self._connection:
+            for job_id, fields in pending.items():
+                columns = ", ".join(f"{name} = ?" for name in fields)
+                self._connection.execute(f"UPDATE jobs SET {columns} WHERE id = ?",
+                                         list(fields.values()) + [job_id])
+
+    def _write_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"写入任务数据库失败: {e}", file=sys.stderr)
+
+    def jobs(self, batch_ids=None):
+        """返回任务记录，按 ID 排序；batch_ids 为 None 时返回全部。"""
+        self.flush()
+        query = f"SELECT {COLUMNS} FROM jobs"
+        params = []
+        if batch_ids is not None:
+            batch_ids = list(batch_ids)
+            if not batch_ids:
+                return []
+            query += f" WHERE batch_id IN ({', '.join('?' * len(batch_ids))})"
+            params = batch_ids
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY id", params).fetchall()
+        return [Job(row) for row in rows]
+
+    def records(self):
+        """返回全部已结束任务的统计记录（不读取转录内容），按 ID 排序。"""
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, batch_id, path, model, status, NULL, NULL, error, elapsed, retries, throttle_seconds,"
+                " cache_hit, timing, updated_at FROM jobs WHERE status IN (?, ?) ORDER BY id", (DONE, FAILED)
+            ).fetchall()
+        return [Job(row).to_record() for row in rows]
+
+    def unfinished_batches(self):
+        """返回含有未完成任务的批次 ID。"""
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT batch_id FROM jobs WHERE status IN (?, ?) ORDER BY batch_id", UNFINISHED
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def resumable_jobs(self):
+        """返回未完成批次中的全部任务。上次运行中断时仍在进行的任务重置为等待状态。"""
+        batch_ids = self.unfinished_batches()
+        jobs = self.jobs(batch_ids)
+        for job in jobs:
+            if job.status == RUNNING:
+                job.status = PENDING
+                self.update(job.id, status=PENDING)
+        return jobs
+
+    def prune(self, retention_days=RETENTION_DAYS):
+        """删除最后更新早于 retention_days 天且已全部结束的批次。"""
+        self.flush()
+        cutoff = time.time() - retention_days * 86400
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM jobs WHERE batch_id IN (SELECT batch_id FROM jobs GROUP BY batch_id"
+                " HAVING MAX(updated_at) < ? AND SUM(status IN (?, ?)) = 0)", (cutoff,) + UNFINISHED)
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        self.flush()
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,488 @@
+"""实时录音转录：边录音边分段转录，结果按录音顺序交付。
+
+采集线程（麦克风回调或模拟输入线程）把 16 kHz 单声道 PCM 写入固定容量的环形缓冲区 RingBuffer；
+分段线程逐帧做语音活动检测（判据与 vad 相同，底噪取最近 NOISE_WINDOW_SECONDS 秒的估计），
+语音之后的静音达到 min_silence 秒、或分段达到 max_chunk 秒（在最后 CUT_SEARCH_SECONDS 秒内能量最低处切开）时
+切出一个分段，交给线程池经由与文件转录相同的请求路径（调度器重试限流、账号池）并发上传。
+先完成的分段等待前面的分段，on_chunk 按分段顺序依次调用。
+
+每个分段记录语音结束（最后一个语音帧被采集）、切出、开始发送、收到响应与按顺序交付的时间，
+LiveChunk.latency 为从语音结束到文本交付的端到端延迟。
+
+麦克风输入需要 sounddevice（可选依赖）；没有录音设备时可用 WavSource 把音频文件按实时速度作为输入。
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import sounddevice
+except ImportError:  # 麦克风输入为可选功能
+    sounddevice = None
+
+from transcriber import accounts, audio, chunking, core, preprocess, scheduler, subtitles, timing, transport, vad
+
+DEFAULT_MIN_SILENCE_SECONDS = 0.6
+DEFAULT_MAX_CHUNK_SECONDS = 15.0
+DEFAULT_PARALLELISM = 4
+BUFFER_SECONDS = 120.0
+BLOCK_SECONDS = 0.1
+# 语音帧总长短于该时长的分段（咳嗽、按键声）不上传
+MIN_SPEECH_SECONDS = 0.3
+# 估计底噪使用的最近时长
+NOISE_WINDOW_SECONDS = 10.0
+# 分段过长被强制切开时，在最后这段时间内找能量最低的帧
+CUT_SEARCH_SECONDS = 1.0
+# 等待新音频时检查是否结束的最长间隔（秒）
+POLL_INTERVAL = 0.2
+
+# 端到端延迟的组成：切分等待（语音结束到切出分段）、排队（等待空闲的上传线程）、请求、等待前面的分段
+LATENCY_STAGES = ("detect", "queue", "request", "order")
+LATENCY_LABELS = {
+    "detect": "切分",
+    "queue": "排队",
+    "request": "请求",
+    "order": "等待前序",
+}
+
+
+def available():
+    """是否可以从麦克风录音（需要 sounddevice）。"""
+    return sounddevice is not None
+
+
+class RingBuffer:
+    """固定容量的 int16 环形缓冲区，按累计写入的采样位置读取最近 capacity 个采样。
+
+    采集线程写入、分段线程读取；要读取的数据已被覆盖时从仍保留的最早位置开始，并计入 overruns。
+    """
+
+    def __init__(self, seconds=BUFFER_SECONDS, sample_rate=audio.SAMPLE_RATE):
+        audio.require_numpy()
+        self.sample_rate = sample_rate
+        self.capacity = int(seconds * sample_rate)
+        self.written = 0
+        self.closed = False
+        self.overruns = 0
+        self._data = audio.np.zeros(self.capacity, dtype=audio.np.int16)
+        # 每次写入的结束位置与采集时间（time.monotonic()），用于换算某个采样被采集的时间
+        self._block_ends = deque()
+        self._block_times = deque()
+        self._condition = threading.Condition()
+
+    def write(self, samples, captured_at=None):
+        """写入一块采样，captured_at 为这块采样的最后一个采样被采集的时间，默认为当前时间。"""
+        samples = audio.np.asarray(samples, dtype=audio.np.int16).reshape(-1)
+        captured_at = time.monotonic() if captured_at is None else captured_at
+        with self._condition:
+            count = len(samples)
+            kept = samples[-self.capacity:]
+            offset = (self.written + count - len(kept)) % self.capacity
+            first = min(len(kept), self.capacity - offset)
+            self._data[offset:offset + first] = kept[:first]
+            self._data[:len(kept) - first] = kept[first:]
+            self.written += count
+            self._block_ends.append(self.written)
+            self._block_times.append(captured_at)
+            while len(self._block_ends) > 1 and self._block_ends[0] <= self.written - self.capacity:
+                self._block_ends.popleft()
+                self._block_times.popleft()
+            self._condition.notify_all()
+
+    def read(self, start, end):
+        """返回 (实际起点, 采样)，采样为 [start, end) 的副本。"""
+        with self._condition:
+            oldest = max(0, self.written - self.capacity)
+            if start < oldest:
+                self.overruns += 1
+                start = oldest
+            end = min(end, self.written)
+            indices = audio.np.arange(start, max(start, end)) % self.capacity
+            return start, self._data[indices]
+
+    def capture_time(self, position):
+        """位置 position 之前的最后一个采样被采集的时间。"""
+        with self._condition:
+            if not self._block_ends:
+                return time.monotonic()
+            i = min(bisect.bisect_left(self._block_ends, position), len(self._block_ends) - 1)
+            return self._block_times[i] - (self._block_ends[i] - position) / float(self.sample_rate)
+
+    def wait(self, position, timeout):
+        """等待写入位置超过 position 或缓冲区关闭，返回当前的写入位置。"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.written > position or self.closed, timeout)
+            return self.written
+
+    def close(self):
+        """输入结束，不再写入。"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class MicrophoneSource:
+    """从麦克风录音，音频驱动的线程每 block_seconds 秒把一块采样写入缓冲区。"""
+
+    def __init__(self, device=None, block_seconds=BLOCK_SECONDS):
+        if sounddevice is None:
+            raise RuntimeError("从麦克风录音需要先安装 sounddevice")
+        self.device = device
+        self.block_seconds = block_seconds
+        self._stream = None
+        self._ring = None
+
+    @property
+    def label(self):
+        return "麦克风"
+
+    def start(self, ring):
+        self._ring = ring
+        self._stream = sounddevice.InputStream(samplerate=ring.sample_rate, channels=1, dtype="int16",
+                                               blocksize=int(self.block_seconds * ring.sample_rate),
+                                               device=self.device, callback=self._callback)
+        self._stream.start()
+
+    def _callback(self, indata, frames, time_info, status):
+        # 在音频驱动的线程中调用，只复制数据，不做其他处理
+        self._ring.write(indata[:, 0])
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if self._ring is not None:
+            self._ring.close()
+
+
+class WavSource:
+    """把音频文件按 speed 倍的实时速度分块写入缓冲区，模拟麦克风输入，用于没有录音设备时测试。
+
+    每块采样在它“录完”的时刻才写入，记录的采集时间与麦克风输入一致。
+    """
+
+    def __init__(self, path, speed=1.0, block_seconds=BLOCK_SECONDS):
+        self.path = path
+        self.speed = speed
+        self.block_seconds = block_seconds
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def label(self):
+        return f"模拟输入 {self.path}"
+
+    def start(self, ring):
+        samples = audio.load_pcm(self.path, ring.sample_rate)
+        self._thread = threading.Thread(target=self._run, args=(ring, samples), name="WavSource", daemon=True)
+        self._thread.start()
+
+    def _run(self, ring, samples):
+        block = max(1, int(self.block_seconds * ring.sample_rate))
+        start = time.monotonic()
+        try:
+            for offset in range(0, len(samples), block):
+                end = min(offset + block, len(samples))
+                due = start + end / float(ring.sample_rate) / self.speed
+                if self._stopped.wait(max(0.0, due - time.monotonic())):
+                    break
+                ring.write(samples[offset:end], due)
+        finally:
+            ring.close()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+
+class ChunkDetector:
+    """流式语音活动检测：按帧输入采样，返回切出的分段 (起点, 终点, 语音结束位置)，单位为采样点。
+
+    分段前后各保留 vad.PADDING_SECONDS 的静音，相邻分段不重叠。
+    """
+
+    def __init__(self, sample_rate=audio.SAMPLE_RATE, min_silence=DEFAULT_MIN_SILENCE_SECONDS,
+                 max_chunk=DEFAULT_MAX_CHUNK_SECONDS, min_speech=MIN_SPEECH_SECONDS):
+        self.frame_length = int(vad.FRAME_SECONDS * sample_rate)
+        self.min_silence_frames = max(1, int(round(min_silence / vad.FRAME_SECONDS)))
+        self.max_chunk_frames = max(2, int(round(max_chunk / vad.FRAME_SECONDS)))
+        self.min_speech_frames = int(round(min_speech / vad.FRAME_SECONDS))
+        self.padding_frames = int(round(vad.PADDING_SECONDS / vad.FRAME_SECONDS))
+        self.cut_search_frames = max(1, min(int(round(CUT_SEARCH_SECONDS / vad.FRAME_SECONDS)),
+                                            self.max_chunk_frames - 1))
+        self._noise = deque(maxlen=int(NOISE_WINDOW_SECONDS / vad.FRAME_SECONDS))
+        self._frames = 0  # 已处理的帧数
+        self._start = None  # 当前分段的起始帧，不在语音中时为 None
+        self._last_speech = 0
+        self._floor = 0  # 上一个分段的结束帧，下一个分段向前保留的静音不超过这里
+        # 当前分段各帧的能量与是否为语音
+        self._energies = []
+        self._flags = []
+
+    def feed(self, samples):
+        """输入长度为整数帧的采样，返回本次切出的分段列表。"""
+        np = audio.np
+        energy_db, zcr = vad.frame_features(samples, self.frame_length)
+        if not len(energy_db):
+            return []
+        self._noise.extend(energy_db.tolist())
+        speech = vad.classify_frames(energy_db, zcr, np.percentile(self._noise, vad.NOISE_PERCENTILE))
+        chunks = []
+        for energy, is_speech in zip(energy_db.tolist(), speech.tolist()):
+            frame = self._frames
+            self._frames += 1
+            if self._start is None:
+                if not is_speech:
+                    continue
+                self._start = frame
+            self._energies.append(energy)
+            self._flags.append(is_speech)
+            if is_speech:
+                self._last_speech = frame
+            elif frame - self._last_speech >= self.min_silence_frames:
+                chunks.extend(self._cut(min(self._last_speech + 1 + self.padding_frames, frame + 1)))
+                self._reset()
+                continue
+            if frame + 1 - self._start >= self.max_chunk_frames:
+                # 一直在说话：在最后一段时间内能量最低处切开，之后的部分留给下一个分段
+                search = self._energies[-self.cut_search_frames:]
+                chunks.extend(self._cut(frame + 1 - len(search) + int(np.argmin(search)) + 1))
+        return chunks
+
+    def flush(self):
+        """输入结束，返回最后一个未完成的分段。"""
+        if self._start is None:
+            return []
+        chunks = self._cut(min(self._last_speech + 1 + self.padding_frames, self._frames))
+        self._reset()
+        return chunks
+
+    def _reset(self):
+        """回到语音之外：丢弃切点之后剩下的静音帧，下一个分段从新的语音帧开始记录。"""
+        self._start = None
+        self._energies = []
+        self._flags = []
+
+    def _cut(self, end):
+        """切出 [当前分段起点, end) 帧，语音太少时返回空列表。"""
+        end = max(end, self._start)
+        count = end - self._start
+        flags = self._flags[:count]
+        self._flags = self._flags[count:]
+        self._energies = self._energies[count:]
+        start = max(self._start - self.padding_frames, self._floor)
+        first = self._start
+        self._start = self._floor = end
+        if sum(flags) < max(1, self.min_speech_frames):
+            return []
+        speech_end = first + max(i for i, flag in enumerate(flags) if flag) + 1
+        return [(start * self.frame_length, end * self.frame_length, speech_end * self.frame_length)]
+
+
+class LiveChunk:
+    """一个实时分段：采样范围、转录结果与各阶段的时间（time.monotonic()）。"""
+
+    def __init__(self, index, start, end, speech_end, sample_rate=audio.SAMPLE_RATE):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.speech_end = speech_end
+        self.sample_rate = sample_rate
+        self.speech_end_time = None  # 最后一个语音帧被采集的时间
+        self.cut_time = None
+        self.sent_time = None
+        self.received_time = None
+        self.delivered_time = None
+        self.data = {}
+        # [(起点秒, 终点秒, 文本)]，时间从录音开始算起
+        self.segments = []
+        # 接在前面的文本之后显示的片段，依次相连即为完整文本
+        self.piece = ""
+        self.error = None
+
+    @property
+    def text(self):
+        return self.data.get("text", "")
+
+    @property
+    def start_seconds(self):
+        return self.start / float(self.sample_rate)
+
+    @property
+    def end_seconds(self):
+        return self.end / float(self.sample_rate)
+
+    @property
+    def latency(self):
+        """从语音结束到文本按顺序交付的秒数。"""
+        return self.delivered_time - self.speech_end_time
+
+    def stages(self):
+        """端到端延迟按 LATENCY_STAGES 的分解（秒）。"""
+        return {
+            "detect": self.cut_time - self.speech_end_time,
+            "queue": self.sent_time - self.cut_time,
+            "request": self.received_time - self.sent_time,
+            "order": self.delivered_time - self.received_time,
+        }
+
+
+class LiveTranscriber:
+    """把 source（MicrophoneSource 或 WavSource）的音频实时分段转录。
+
+    options 为 core.TranscriptionOptions，使用其中的调度器、账号池与预处理格式（不使用缓存与长音频分段）。
+    on_chunk(LiveChunk) 按分段顺序在上传线程中调用，失败的分段 error 为异常；全部分段交付后调用 on_finished()。
+    """
+
+    def __init__(self, token, model_name, source, options=None, on_chunk=None, on_finished=None,
+                 parallelism=DEFAULT_PARALLELISM, min_silence=DEFAULT_MIN_SILENCE_SECONDS,
+                 max_chunk=DEFAULT_MAX_CHUNK_SECONDS, buffer_seconds=BUFFER_SECONDS):
+        self.token = token
+        self.model_name = model_name
+        self.source = source
+        self.options = options or core.TranscriptionOptions()
+        self.on_chunk = on_chunk
+        self.on_finished = on_finished
+        self.ring = RingBuffer(buffer_seconds)
+        self.detector = ChunkDetector(self.ring.sample_rate, min_silence, max_chunk)
+        self.cancel_token = core.CancelToken()
+        self.retry_stats = scheduler.RetryStats()
+        self.models_used = set()
+        self.chunks = []  # 已按顺序交付的分段
+        encoder = None
+        if self.options.preprocess_format:
+            encoder = preprocess.encoder_for(self.options.preprocess_format)
+        self._encoder = encoder or chunking.encode_wav
+        self._executor = ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="LiveChunk")
+        self._completed = {}
+        self._next_index = 0
+        self._last_text = ""
+        self._deliver_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="LiveTranscriber", daemon=True)
+
+    def start(self):
+        self.source.start(self.ring)
+        self._thread.start()
+
+    def stop(self):
+        """停止录音，已录下的语音转录完后结束。"""
+        self.source.stop()
+
+    def cancel(self):
+        """停止录音并中断进行中的请求，不再交付后续分段。"""
+        self.cancel_token.cancel()
+        self.source.stop()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        frame = self.detector.frame_length
+        position = 0
+        index = 0
+        try:
+            while not self.cancel_token.cancelled:
+                written = self.ring.wait(position, POLL_INTERVAL)
+                count = (written - position) // frame * frame
+                if count:
+                    position, samples = self.ring.read(position, position + count)
+                    position += len(samples)
+                    for start, end, speech_end in self.detector.feed(samples):
+                        index = self._submit(index, start, end, speech_end)
+                elif self.ring.closed:
+                    break
+            if not self.cancel_token.cancelled:
+                for start, end, speech_end in self.detector.flush():
+                    index = self._submit(index, start, end, speech_end)
+        finally:
+            self._executor.shutdown(wait=True)
+            if self.on_finished:
+                self.on_finished()
+
+    def _submit(self, index, start, end, speech_end):
+        chunk = LiveChunk(index, start, end, speech_end, self.ring.sample_rate)
+        chunk.speech_end_time = self.ring.capture_time(speech_end)
+        chunk.cut_time = time.monotonic()
+        _, samples = self.ring.read(start, end)
+        self._executor.submit(self._transcribe, chunk, samples)
+        return index + 1
+
+    def _transcribe(self, chunk, samples):
+        chunk.sent_time = time.monotonic()
+        try:
+            extension, payload, content_type = self._encoder(samples, chunk.sample_rate)
+
+            def send(token, model):
+                return transport.transcribe(token, model, (f"live_{chunk.index:05d}.{extension}", payload,
+                                                           content_type), cancel_token=self.cancel_token)
+            chunk.data = accounts.call(send, self.token, self.model_name, self.options.scheduler,
+                                       self.options.accounts, self.cancel_token, self.retry_stats, self.models_used)
+            duration = (chunk.end - chunk.start) / float(chunk.sample_rate)
+            offset = chunk.start_seconds
+            chunk.segments = [(start + offset, (duration if end is None else end) + offset, text)
+                              for start, end, text in subtitles.from_response(chunk.data)]
+        except core.TranscriptionCancelled:
+            return
+        except Exception as e:
+            if self.cancel_token.cancelled:
+                return
+            chunk.error = e
+        chunk.received_time = time.monotonic()
+        self._complete(chunk)
+
+    def _complete(self, chunk):
+        """记录完成的分段，并按顺序交付所有前序分段都已完成的分段。"""
+        with self._deliver_lock:
+            self._completed[chunk.index] = chunk
+            while self._next_index in self._completed:
+                ready = self._completed.pop(self._next_index)
+                self._next_index += 1
+                ready.delivered_time = time.monotonic()
+                text = ready.text.strip()
+                if ready.error is None and text:
+                    ready.piece = chunking.continuation(self._last_text, text)
+                    self._last_text = text
+                self.chunks.append(ready)
+                if self.on_chunk:
+                    self.on_chunk(ready)
+
+    def latency_summary(self):
+        """返回已交付分段的数量、失败数与端到端延迟的 p50/p95/最大值（秒）。"""
+        latencies = [chunk.latency for chunk in self.chunks if chunk.error is None]
+        return {
+            "chunks": len(self.chunks),
+            "failed": sum(1 for chunk in self.chunks if chunk.error is not None),
+            "p50": timing.percentile(latencies, 0.5),
+            "p95": timing.percentile(latencies, 0.95),
+            "max": max(latencies) if latencies else None,
+        }
+
+
+def describe_chunk(chunk):
+    """返回一个分段的位置与延迟的单行说明。"""
+    position = (f"第 {chunk.index + 1} 段 {subtitles.format_timestamp(chunk.start_seconds, '.')}"
+                f"–{subtitles.format_timestamp(chunk.end_seconds, '.')}")
+    if chunk.error is not None:
+        return f"{position} | 转录失败：{chunk.error}"
+    stages = chunk.stages()
+    breakdown = " / ".join(f"{LATENCY_LABELS[stage]} {stages[stage]:.2f}s" for stage in LATENCY_STAGES)
+    return f"{position} | 延迟 {chunk.latency:.2f}s（{breakdown}）"
+
+
+def describe_summary(summary):
+    """返回 latency_summary() 的单行说明。"""
+    text = f"{summary['chunks']} 段"
+    if summary["failed"]:
+        text += f"（失败 {summary['failed']}）"
+    if summary["p50"] is not None:
+        text += f" | 延迟 p50 {summary['p50']:.2f}s / p95 {summary['p95']:.2f}s / 最大 {summary['max']:.2f}s"
+    return text
@@ -0,0 +1,134 @@
+"""流式 multipart/form-data 请求体。
+
+requests 的 files= 参数会先把整个文件拼进内存中的请求体；这里改为按固定大小分块读取文件，
+内存占用与文件大小无关，并在每次被读取时回报已发送的字节数，用于显示真实的上传进度。
+"""
+import io
+import os
+import threading
+import time
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+# Content-Disposition 中 name 与 filename 的转义，与 urllib3（requests 的 files= 参数）及浏览器提交表单时相同：
+# 引号会提前结束参数，换行会插入额外的头部
+_HEADER_PARAM_ESCAPES = {ord('"'): "%22", ord("\r"): "%0D", ord("\n"): "%0A"}
+
+
+def _stream_size(stream):
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell() - position
+    stream.seek(position)
+    return size
+
+
+def _escape_param(value):
+    return str(value).translate(_HEADER_PARAM_ESCAPES)
+
+
+class MultipartEncoder:
+    """可被 requests 当作文件对象上传的 multipart 请求体。
+
+    fields 为普通表单字段 {名称: 值}；files 为 {名称: (文件名, 文件对象或bytes, Content-Type)}。
+    progress_callback(已发送字节数, 总字节数) 在每次读取后调用；
+    cancel_token 被取消后再读取会抛出 TranscriptionCancelled，中断上传。
+    started_at/finished_at 为第一次读取与读完全部内容的时间（time.perf_counter()），用于统计上传耗时。
+    """
+
+    def __init__(self, fields, files, chunk_size=CHUNK_SIZE, progress_callback=None, cancel_token=None):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.cancel_token = cancel_token
+        self._parts = []  # bytes 或文件对象，按顺序拼接成请求体
+        self._length = 0
+
+        for name, value in fields.items():
+            self._add_bytes(self._part_header(name) + b"\r\n" + str(value).encode("utf-8") + b"\r\n")
+        for name, (filename, content, content_type) in files.items():
+            header = self._part_header(name, filename) + f"Content-Type: {content_type}\r\n\r\n".encode("utf-8")
+            self._add_bytes(header)
+            stream = io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+            self._parts.append(stream)
+            self._length += _stream_size(stream)
+            self._add_bytes(b"\r\n")
+        self._add_bytes(f"--{self.boundary}--\r\n".encode("utf-8"))
+
+        self._index = 0
+        self._sent = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def _part_header(self, name, filename=None):
+        disposition = f'form-data; name="{_escape_param(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{_escape_param(filename)}"'
+        return f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n".encode("utf-8")
+
+    def _add_bytes(self, data):
+        self._parts.append(io.BytesIO(data))
+        self._length += len(data)
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        """读取至多 min(size, chunk_size) 字节；size 为负数时读取剩余全部内容。"""
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        if size is None or size < 0:
+            size = self._length - self._sent
+        else:
+            size = min(size, self.chunk_size)
+        chunks = []
+        remaining = size
+        while remaining > 0 and self._index < len(self._parts):
+            data = self._parts[self._index].read(remaining)
+            if not data:
+                self._index += 1
+                continue
+            chunks.append(data)
+            remaining -= len(data)
+        data = b"".join(chunks)
+        self._sent += len(data)
+        if self.finished_at is None and self._sent >= self._length:
+            self.finished_at = time.perf_counter()
+        if data and self.progress_callback:
+            self.progress_callback(self._sent, self._length)
+        return data
+
+
+class UploadProgress:
+    """汇总一个任务内（可能并发的）多个上传请求的进度。
+
+    request_count 为预计的请求数，尚未开始的请求按已知请求的平均大小估算总量。
+    callback(已发送字节数, 估计总字节数) 在任意请求有进度时调用。
+    """
+
+    def __init__(self, callback, request_count=1):
+        self.callback = callback
+        self.request_count = request_count
+        self._lock = threading.Lock()
+        self._sent = {}
+        self._totals = {}
+
+    def tracker(self, key):
+        """返回某个请求使用的 progress_callback。"""
+        def update(sent, total):
+            with self._lock:
+                self._sent[key] = sent
+                self._totals[key] = total
+                known = len(self._totals)
+                total_bytes = sum(self._totals.values())
+                if known < self.request_count:
+                    total_bytes += total_bytes / known * (self.request_count - known)
+                sent_bytes = sum(self._sent.values())
+            self.callback(sent_bytes, int(total_bytes))
+        return update
@@ -0,0 +1,88 @@
+"""上传前的音频预处理。
+
+把音频下混为单声道、重采样到语音模型实际使用的 16 kHz，并重新编码为体积更小的格式，
+减少上传耗时。重新编码依赖 ffmpeg；没有 ffmpeg 时只能把 WAV 转为 16 kHz 单声道 WAV。
+"""
+import os
+import subprocess
+
+from transcriber import audio
+
+# 格式名 -> (文件扩展名, ffmpeg 编码参数, Content-Type)
+FORMATS = {
+    "mp3": ("mp3", ["-c:a", "libmp3lame", "-b:a", "48k", "-f", "mp3"], "audio/mpeg"),
+    "ogg": ("ogg", ["-c:a", "libopus", "-b:a", "32k", "-f", "ogg"], "audio/ogg"),
+    "flac": ("flac", ["-c:a", "flac", "-f", "flac"], "audio/flac"),
+    "wav": ("wav", ["-c:a", "pcm_s16le", "-f", "wav"], "audio/wav"),
+}
+DEFAULT_FORMAT = "mp3"
+
+
+class PreparedUpload:
+    """预处理后待上传的音频内容。"""
+
+    def __init__(self, filename, data, content_type, original_bytes):
+        self.filename = filename
+        self.data = data
+        self.content_type = content_type
+        self.original_bytes = original_bytes
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - len(self.data)
+
+    def as_file(self):
+        """返回 requests 上传所需的 (文件名, 内容, 类型) 元组。"""
+        return (self.filename, self.data, self.content_type)
+
+
+def _run_ffmpeg(input_args, fmt, stdin_data=None):
+    command = ["ffmpeg", "-hide_banner", "-v", "error"]
+    if stdin_data is None:
+        command.append("-nostdin")
+    codec_args = FORMATS[fmt][1]
+    process = subprocess.run(
+        command + input_args + ["-vn", "-ac", "1", "-ar", str(audio.SAMPLE_RATE)] + codec_args + ["-"],
+        input=stdin_data, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if process.returncode != 0:
+        raise audio.AudioError(f"ffmpeg 编码失败：{process.stderr.decode('utf-8', 'replace').strip()}")
+    return process.stdout
+
+
+def preprocess_file(path, fmt=DEFAULT_FORMAT):
+    """预处理音频文件，结果不比原文件小（或无法处理）时返回 None，直接上传原文件。"""
+    original_bytes = os.path.getsize(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if audio.ffmpeg_available():
+        data = _run_ffmpeg(["-i", path], fmt)
+        extension, _, content_type = FORMATS[fmt]
+    elif audio.numpy_available():
+        try:
+            samples = audio.load_pcm(path)
+        except audio.AudioError:
+            return None
+        data = audio.wav_bytes(samples)
+        extension, content_type = "wav", "audio/wav"
+    else:
+        return None
+
+    if len(data) >= original_bytes:
+        return None
+    return PreparedUpload(f"{stem}.{extension}", data, content_type, original_bytes)
+
+
+def encoder_for(fmt):
+    """返回把 16 kHz 单声道 PCM 编码为 fmt 格式的函数，供分段上传使用。
+
+    没有 ffmpeg 时返回 None，由调用方回退为 WAV。
+    """
+    if not audio.ffmpeg_available():
+        return None
+    extension, _, content_type = FORMATS[fmt]
+
+    def encode(samples, sample_rate=audio.SAMPLE_RATE):
+        input_args = ["-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "-i", "pipe:0"]
+        data = _run_ffmpeg(input_args, fmt, stdin_data=audio.np.asarray(samples, dtype='<i2').tobytes())
+        return extension, data, content_type
+    return encode
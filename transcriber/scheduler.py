@@ -0,0 +1,331 @@
+"""请求调度：失败重试、指数退避与自适应限流。
+
+遇到 429、5xx 或网络错误时按带随机抖动的指数退避重试，并遵守服务器返回的 Retry-After；
+令牌桶限制请求速率，并发上限在成功时缓慢增加、被限流时减半（AIMD），
+大批量任务能在配额允许的范围内尽快完成，而不是一起撞上限流后集体失败。
+"""
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+
+from transcriber import transport
+from transcriber.cancel import CancelToken
+
+DEFAULT_MAX_RETRIES = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+# 可以重试的状态码：超时、限流与服务端临时错误
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+# 表示需要降低请求速率的状态码
+THROTTLE_STATUS = (429,)
+DEFAULT_MAX_CONCURRENCY = 32
+# 被限流后令牌桶速率的下限（请求/秒），以及估计实际请求速率的时间窗口（秒）
+MIN_RATE = 0.2
+RATE_WINDOW = 10.0
+RATE_INCREASE = 1.05
+# 等待并发名额时检查取消的间隔（秒）
+POLL_INTERVAL = 0.05
+# 线程模式下可以重试的网络错误，异步引擎传入 aiohttp 的对应异常
+NETWORK_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+
+class RetryStats:
+    """一个任务的重试次数与因限流、退避而等待的时长。
+
+    同一任务的多个分段同时等待时只计一次，throttle_seconds 不会超过任务的实际耗时。
+    callback(stats) 在每次统计变化后调用，可用于实时显示任务状态。
+    """
+
+    def __init__(self, callback=None):
+        self.retries = 0
+        self.throttle_seconds = 0.0
+        self.last_reason = None
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._wait_start = 0.0
+
+    def record_retry(self, reason):
+        with self._lock:
+            self.retries += 1
+            self.last_reason = reason
+        if self.callback:
+            self.callback(self)
+
+    def begin_wait(self):
+        with self._lock:
+            if self._waiting == 0:
+                self._wait_start = time.monotonic()
+            self._waiting += 1
+
+    def end_wait(self):
+        with self._lock:
+            self._waiting -= 1
+            if self._waiting:
+                return
+            waited = time.monotonic() - self._wait_start
+            self.throttle_seconds += waited
+        if self.callback and waited >= 0.01:
+            self.callback(self)
+
+    def describe(self):
+        return describe_retries(self.retries, self.throttle_seconds)
+
+
+def retry_reason(error):
+    """重试原因的简短说明，例如“HTTP 429”或网络错误的类型名。"""
+    status = getattr(error, "status_code", None)
+    return f"HTTP {status}" if status else type(error).__name__
+
+
+def describe_retries(retries, throttle_seconds):
+    """返回“重试2次，限流等待3.5s”形式的说明，没有重试与等待时返回空字符串。"""
+    parts = []
+    if retries:
+        parts.append(f"重试{retries}次")
+    if throttle_seconds >= 0.1:
+        parts.append(f"限流等待{throttle_seconds:.1f}s")
+    return "，".join(parts)
+
+
+class TokenBucket:
+    """令牌桶，rate 为每秒补充的令牌数（None 表示不限速）。
+
+    收到限流信号时速率减半，此前不限速时以最近的实际请求速率为起点；
+    之后每次成功按 RATE_INCREASE 逐步恢复，超过 max_rate（或原本不限速时超过实际需求）后回到初始状态。
+    """
+
+    def __init__(self, rate=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._recent = deque()  # 最近发出请求的时间
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _recent_rate(self, now):
+        while self._recent and now - self._recent[0] > RATE_WINDOW:
+            self._recent.popleft()
+        if not self._recent:
+            return 0.0
+        return len(self._recent) / max(1.0, now - self._recent[0])
+
+    def try_acquire(self):
+        """尝试取得一个令牌：成功返回 0，否则返回还需等待的秒数。
+
+        不预支令牌：等待中的请求每次醒来都按当前速率重新计算，降速立即对它们生效。
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.rate:
+                self._refill(now)
+            if not self.rate or self.tokens >= 1:
+                if self.rate:
+                    self.tokens -= 1
+                self._recent.append(now)
+                self._recent_rate(now)
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, cancel_token):
+        """取得一个令牌，等待期间可被取消。"""
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return
+            cancel_token.wait(delay)
+
+    def throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            current = self.rate or self._recent_rate(now)
+            self.rate = max(MIN_RATE, current / 2)
+            self.capacity = max(1.0, self.rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def recover(self):
+        with self._lock:
+            if not self.rate or self.rate == self.max_rate:
+                return
+            now = time.monotonic()
+            self._refill(now)
+            self.rate *= RATE_INCREASE
+            if self.max_rate is not None:
+                self.rate = min(self.rate, self.max_rate)
+            elif self.rate > 2 * self._recent_rate(now):
+                # 速率已远高于实际需求，恢复为不限速
+                self.rate = None
+            self.capacity = max(1.0, self.rate or 1.0)
+
+
+class AdaptiveLimiter:
+    """同时进行的请求数上限：每次成功加 1/上限，被限流时减半，最少为 1。"""
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, cancel_token):
+        with self._condition:
+            while self.active >= int(self.limit):
+                cancel_token.raise_if_cancelled()
+                self._condition.wait(POLL_INTERVAL)
+            self.active += 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._condition.notify()
+
+    def on_throttle(self):
+        with self._condition:
+            self.limit = max(1.0, self.limit / 2)
+
+
+class RequestScheduler:
+    """在多个任务（及同一任务的多个分段）之间共享的请求调度器。
+
+    call() 在线程中完成整个重试循环；其他发送方式（例如异步引擎）按同样的顺序调用各个步骤：
+    before_attempt() 返回 0 后发送，每次发送后调用 on_response()，失败时由 should_retry() 判断是否重试，
+    并在 retry_delay() 返回的时长之后再次从 before_attempt() 开始。
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, rate=None, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(rate)
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self._paused_until = 0.0
+        self._last_throttle = 0.0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt, retry_after=None):
+        """第 attempt 次重试前的等待时间：完全随机抖动的指数退避，有 Retry-After 时至少等待该时长。"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            # 在 Retry-After 之后再错开一点，避免所有请求同时重试
+            delay = retry_after + random.uniform(0, self.base_delay)
+        return delay
+
+    def _throttle(self, sent_at, retry_after):
+        """收到限流信号时降低速率与并发数。
+
+        同一轮突发中的多个请求会先后收到 429，只有在上次降速（及其 Retry-After）之后才发出的请求
+        才会再次降速，避免一次限流被重复计算而把速率降到过低。
+        """
+        with self._lock:
+            if sent_at < self._last_throttle:
+                return
+            self._last_throttle = time.monotonic() + (retry_after or 0.0)
+        self.limiter.on_throttle()
+        self.bucket.throttle()
+
+    def _pause(self, seconds):
+        """服务器给出 Retry-After 时，所有请求都暂停到该时间之后。"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def pause_remaining(self):
+        """全局暂停还剩的秒数，没有暂停时返回 0 或负数。"""
+        with self._lock:
+            return self._paused_until - time.monotonic()
+
+    def before_attempt(self):
+        """发送前调用：返回还需等待的秒数（全局暂停或令牌桶），返回 0 时已取得令牌，可以发送。"""
+        pause = self.pause_remaining()
+        if pause > 0:
+            return pause
+        return self.bucket.try_acquire()
+
+    def on_response(self, sent_at, error=None):
+        """报告在 sent_at（time.monotonic()）发出的请求的结果：成功时逐步恢复速率与并发数，被限流时降低。"""
+        if error is None:
+            self.limiter.on_success()
+            self.bucket.recover()
+        elif getattr(error, "status_code", None) in THROTTLE_STATUS:
+            self._throttle(sent_at, error.retry_after)
+
+    def should_retry(self, error, attempt, network_errors=NETWORK_ERRORS):
+        """第 attempt 次重试（从 0 开始）之前的请求因 error 失败后，是否还应重试。"""
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(error, transport.TranscriptionError):
+            return error.status_code in RETRY_STATUS
+        return isinstance(error, network_errors)
+
+    def retry_delay(self, attempt, error):
+        """返回第 attempt 次重试前的等待时间；服务器给出 Retry-After 时所有请求都暂停到该时间之后。"""
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            self._pause(retry_after)
+        return self.backoff(attempt, retry_after)
+
+    def _wait_turn(self, cancel_token):
+        """等待全局暂停结束、令牌桶放行并取得并发名额。"""
+        while True:
+            delay = self.before_attempt()
+            if not delay:
+                break
+            cancel_token.wait(delay)
+        self.limiter.acquire(cancel_token)
+
+    def call(self, send, cancel_token=None, stats=None):
+        """调用 send() 发送请求并返回其结果，可重试的错误按退避策略重试。
+
+        send 每次调用都必须重新构造请求（例如把文件指针移回开头）。
+        超过最大重试次数或遇到不可重试的错误时抛出最后一次的异常。
+        """
+        cancel_token = cancel_token or CancelToken()
+        attempt = 0
+        while True:
+            if stats is not None:
+                stats.begin_wait()
+            try:
+                self._wait_turn(cancel_token)
+            finally:
+                if stats is not None:
+                    stats.end_wait()
+            sent_at = time.monotonic()
+            try:
+                result = send()
+            except (transport.TranscriptionError,) + NETWORK_ERRORS as e:
+                self.on_response(sent_at, e)
+                if not self.should_retry(e, attempt):
+                    raise
+                delay = self.retry_delay(attempt, e)
+                reason = retry_reason(e)
+            else:
+                self.on_response(sent_at)
+                return result
+            finally:
+                self.limiter.release()
+
+            attempt += 1
+            if stats is None:
+                cancel_token.wait(delay)
+                continue
+            stats.record_retry(reason)
+            stats.begin_wait()
+            try:
+                cancel_token.wait(delay)
+            finally:
+                stats.end_wait()
@@ -0,0 +1,126 @@
+"""带时间戳的分段结果与 SRT、WebVTT、JSON 导出。
+
+接口响应中的 segments（模型提供时）转换为 (起点秒, 终点秒, 文本) 元组的列表，每段只占一个元组；
+只有整段文本时为一个覆盖整个音频（data["duration"]）的分段。
+导出函数逐段生成字符串交给 f.writelines()，不在内存中拼接整个文件。
+"""
+import json
+import os
+
+FORMATS = ("srt", "vtt", "json")
+FORMAT_LABELS = {
+    "srt": "SRT 字幕",
+    "vtt": "WebVTT 字幕",
+    "json": "JSON",
+}
+
+
+def has_timestamps(data):
+    return bool(data) and any("start" in segment for segment in data.get("segments") or ())
+
+
+def from_response(data):
+    """把接口响应转换为 [(起点, 终点, 文本)]，时间单位为秒，终点未知时为 None。"""
+    if not data:
+        return []
+    if has_timestamps(data):
+        segments = []
+        for segment in data["segments"]:
+            text = (segment.get("text") or "").strip()
+            if text:
+                start = float(segment["start"])
+                end = segment.get("end")
+                segments.append((start, start if end is None else float(end), text))
+        return segments
+    text = (data.get("text") or "").strip()
+    return [(0.0, data.get("duration"), text)] if text else []
+
+
+def to_response(segments):
+    """把分段转换回与接口响应相同的 [{"start", "end", "text"}] 结构。"""
+    return [{"start": start, "end": end, "text": text} for start, end, text in segments]
+
+
+def remap(data, to_original):
+    """用 to_original(秒) 换算 data 中各分段的时间（例如去静音后的时间换算回原始音频），原地修改。"""
+    if not has_timestamps(data):
+        return
+    for segment in data["segments"]:
+        for key in ("start", "end"):
+            if segment.get(key) is not None:
+                segment[key] = to_original(float(segment[key]))
+
+
+def format_timestamp(seconds, decimal_marker):
+    milliseconds = int(round(max(seconds or 0.0, 0.0) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def _cue_times(start, end, decimal_marker):
+    end = start if end is None else max(end, start)
+    return f"{format_timestamp(start, decimal_marker)} --> {format_timestamp(end, decimal_marker)}"
+
+
+def _cue_text(text):
+    """字幕块中的文本：空行会结束字幕块，因此去掉所有空行；"-->" 会被当作时间行。"""
+    return "\n".join(line for line in text.splitlines() if line.strip()).replace("-->", "->")
+
+
+def iter_srt(segments):
+    for index, (start, end, text) in enumerate(segments, 1):
+        yield f"{index}\n{_cue_times(start, end, ',')}\n{_cue_text(text)}\n\n"
+
+
+def iter_vtt(segments):
+    yield "WEBVTT\n\n"
+    for start, end, text in segments:
+        yield f"{_cue_times(start, end, '.')}\n{_cue_text(text)}\n\n"
+
+
+def iter_json(files):
+    """files 为 (文件名, 分段) 的可迭代对象，生成一个 JSON 数组，每个文件一项。"""
+    yield "["
+    for i, (name, segments) in enumerate(files):
+        yield ",\n" if i else "\n"
+        yield f'  {{"file": {json.dumps(name, ensure_ascii=False)}, "segments": ['
+        for j, (start, end, text) in enumerate(segments):
+            yield ", " if j else ""
+            yield json.dumps({"start": start, "end": end, "text": text}, ensure_ascii=False)
+        yield "]}"
+    yield "\n]\n"
+
+
+def write(f, fmt, segments, name=None):
+    """把一个文件的分段以 fmt 格式写入文本文件对象 f。"""
+    if fmt == "srt":
+        f.writelines(iter_srt(segments))
+    elif fmt == "vtt":
+        f.writelines(iter_vtt(segments))
+    elif fmt == "json":
+        f.writelines(iter_json([(name, segments)]))
+    else:
+        raise ValueError(f"不支持的导出格式：{fmt}")
+
+
+def export_batch(files, directory, fmt):
+    """把多个文件的分段一次写入 directory，每个音频一个 <文件名>.<fmt>，返回写入的路径列表。
+
+    files 为 (文件名, 分段) 的可迭代对象，可以是生成器；同名文件依次加上 -2、-3 等后缀。
+    """
+    paths = []
+    used = set()
+    for name, segments in files:
+        stem = os.path.splitext(os.path.basename(name or "transcript"))[0]
+        candidate, n = stem, 1
+        while candidate in used:
+            n += 1
+            candidate = f"{stem}-{n}"
+        used.add(candidate)
+        path = os.path.join(directory, f"{candidate}.{fmt}")
+        with open(path, 'w', encoding='utf-8') as f:
+            write(f, fmt, segments, name)
+        paths.append(path)
+    return paths
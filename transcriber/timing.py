@@ -0,0 +1,201 @@
+"""转录请求各阶段的耗时统计。
+
+一个任务的耗时分为五个阶段：读取与预处理（哈希、解码、去静音、重新编码）、建立连接（DNS 解析、TCP 与 TLS 握手）、
+上传请求体、服务端处理（请求体发完到收到响应头）与下载响应。
+core 与 transport 在每个阶段结束时调用 JobTiming.record()；通过 add_hook() 注册的函数会收到每一次记录，
+可用于接入外部的监控系统。summarize() 按模型汇总 p50/p95，export_json()/export_csv() 导出逐个任务的记录，
+便于长期跟踪接口性能的变化。
+
+上传阶段在请求体全部交给操作系统时结束，仍在套接字发送缓冲区中的数据计入服务端处理；
+小文件（不超过发送缓冲区大小）的上传耗时因此偏小。
+"""
+import csv
+import json
+import math
+import threading
+import time
+
+STAGES = ("read", "connect", "upload", "server", "download")
+STAGE_LABELS = {
+    "read": "读取与预处理",
+    "connect": "建立连接",
+    "upload": "上传",
+    "server": "服务端处理",
+    "download": "下载",
+}
+
+# 导出 CSV 时的列，阶段耗时以 stage 名称为列名
+CSV_FIELDS = ("id", "batch_id", "path", "model", "status", "cache_hit", "elapsed", "retries", "throttle_seconds",
+              "requests", "bytes_sent") + STAGES + ("updated_at",)
+
+_hooks = []
+_local = threading.local()
+
+
+def add_hook(hook):
+    """注册 hook(job_timing, 阶段, 秒数)，每次记录阶段耗时后在记录所在的线程中调用。"""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+class JobTiming:
+    """一个任务各阶段的累计耗时（秒）。
+
+    重试与分段上传的多次请求累加在一起，分段并发上传时各阶段之和可能超过任务的总耗时。
+    """
+
+    def __init__(self, path=None, model=None):
+        self.path = path
+        self.model = model
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] += seconds
+        for hook in list(_hooks):
+            hook(self, stage, seconds)
+
+    def measure(self, stage):
+        """在 with 块内计时，结束时记入 stage。"""
+        return _Measure(self, stage)
+
+    def record_request(self, body, headers_at, done_at):
+        """记录一次请求的上传、服务端处理与下载耗时。
+
+        body 为 MultipartEncoder，其 started_at/finished_at 是请求体开始与读完的时间；
+        headers_at 与 done_at 是收到响应头与读完响应的时间，均为 time.perf_counter() 的值。
+        """
+        if body.started_at is not None and body.finished_at is not None:
+            self.record("upload", body.finished_at - body.started_at)
+            self.record("server", max(0.0, headers_at - body.finished_at))
+        self.record("download", max(0.0, done_at - headers_at))
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(body)
+
+    def as_dict(self):
+        with self._lock:
+            return {"stages": dict(self.stages), "requests": self.requests, "bytes_sent": self.bytes_sent}
+
+
+class _Measure:
+    def __init__(self, job_timing, stage):
+        self.job_timing = job_timing
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.job_timing.record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def current():
+    """返回当前线程正在执行的请求所属的 JobTiming。"""
+    return getattr(_local, "timing", None)
+
+
+class active:
+    """在 with 块内把 job_timing 设为当前线程的 JobTiming，供连接池记录建立连接的耗时。"""
+
+    def __init__(self, job_timing):
+        self.job_timing = job_timing
+
+    def __enter__(self):
+        self.previous = current()
+        _local.timing = self.job_timing
+        return self.job_timing
+
+    def __exit__(self, *exc_info):
+        _local.timing = self.previous
+        return False
+
+
+def percentile(values, fraction):
+    """最近秩法计算百分位数，values 为空时返回 None。"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class ModelSummary:
+    """一个模型（或全部模型）的任务统计。命中缓存的任务不计入耗时与上传速率。"""
+
+    def __init__(self, model):
+        self.model = model
+        self.jobs = 0
+        self.failed = 0
+        self.cache_hits = 0
+        self.elapsed = []
+        self.stages = {stage: [] for stage in STAGES}
+        self.bytes_sent = 0
+        self.upload_seconds = 0.0
+
+    def add(self, record):
+        self.jobs += 1
+        if record.get("status") == "failed":
+            self.failed += 1
+        if record.get("cache_hit"):
+            self.cache_hits += 1
+            return
+        if record.get("elapsed") is not None:
+            self.elapsed.append(record["elapsed"])
+        job_timing = record.get("timing")
+        if job_timing:
+            for stage in STAGES:
+                self.stages[stage].append(job_timing["stages"].get(stage, 0.0))
+            self.bytes_sent += job_timing.get("bytes_sent", 0)
+            self.upload_seconds += job_timing["stages"].get("upload", 0.0)
+
+    def latency(self, fraction):
+        return percentile(self.elapsed, fraction)
+
+    def stage_latency(self, stage, fraction):
+        return percentile(self.stages[stage], fraction)
+
+    @property
+    def upload_rate(self):
+        """平均上传速率（字节/秒），没有上传记录时返回 None。"""
+        return self.bytes_sent / self.upload_seconds if self.upload_seconds > 0 else None
+
+
+def summarize(records):
+    """按模型汇总已结束的任务记录，返回 ModelSummary 列表，第一项（model 为 None）为全部模型的汇总。"""
+    overall = ModelSummary(None)
+    by_model = {}
+    for record in records:
+        if record.get("status") not in ("done", "failed"):
+            continue
+        overall.add(record)
+        model = record.get("model")
+        if model not in by_model:
+            by_model[model] = ModelSummary(model)
+        by_model[model].add(record)
+    return [overall] + [by_model[model] for model in sorted(by_model)]
+
+
+def export_json(records, f):
+    json.dump(list(records), f, ensure_ascii=False, indent=2)
+
+
+def export_csv(records, f):
+    """每个任务一行，阶段耗时展开为单独的列。"""
+    writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for record in records:
+        row = dict(record)
+        job_timing = record.get("timing") or {}
+        row["requests"] = job_timing.get("requests")
+        row["bytes_sent"] = job_timing.get("bytes_sent")
+        for stage in STAGES:
+            row[stage] = job_timing.get("stages", {}).get(stage)
+        writer.writerow(row)
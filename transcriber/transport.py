@@ -0,0 +1,232 @@
+"""与 SiliconFlow 转录 API 通信的传输层。
+
+进程内所有请求共享同一个长连接的 requests.Session，
+复用 TCP/TLS 连接，避免每次请求都重新握手。
+"""
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from transcriber import cancel, timing
+from transcriber.multipart import MultipartEncoder
+
+DEFAULT_API_URL = "https://api.siliconflow.cn/v1/audio/transcriptions"
+# 可通过环境变量或 set_api_url() 改为其他兼容接口（例如 benchmarks/mock_server.py）
+API_URL_ENV = "SILICONFLOW_API_URL"
+API_URL = os.environ.get(API_URL_ENV) or DEFAULT_API_URL
+DEFAULT_TIMEOUT = 60
+
+# 连接池大小需不小于最大并发数，否则多出的连接用完即被丢弃
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+# 仅重试建立连接阶段的错误：此时请求体尚未发送，对POST也是安全的
+CONNECT_RETRIES = 3
+RETRY_BACKOFF = 0.3
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TranscriptionError(Exception):
+    """转录接口返回了非 200 的响应。"""
+
+    def __init__(self, status_code, text, retry_after=None):
+        super().__init__(f"请求失败，状态码: {status_code}\n响应内容: {text}")
+        self.status_code = status_code
+        self.text = text
+        self.retry_after = retry_after  # 服务器通过 Retry-After 要求等待的秒数
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），返回需要等待的秒数，无法解析时返回 None。"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class _CancellablePoolMixin:
+    """从连接池取出连接时登记到当前线程的 CancelToken，取消时可直接关闭该连接。"""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        token = cancel.current_token()
+        if token is not None:
+            token.attach(conn)
+        return conn
+
+    def _put_conn(self, conn):
+        token = cancel.current_token()
+        if token is not None:
+            token.detach(conn)
+        super()._put_conn(conn)
+
+
+class _CancellableConnectionMixin:
+    """建立连接时可被当前线程的 CancelToken 取消。
+
+    DNS 解析与 TCP 连接在 CancelToken.run() 的辅助线程中进行，取消时立即返回；
+    TLS 握手会把原套接字的文件描述符转交给 SSLSocket，因此握手期间另存一份 dup() 为 connecting_sock，
+    取消时对它 shutdown 即可唤醒阻塞的握手，连接建立后关闭。
+    """
+    connecting_sock = None
+
+    def _new_conn(self):
+        token = cancel.current_token()
+        if token is None:
+            return super()._new_conn()
+        sock = token.run(super()._new_conn, discard=lambda sock: sock.close())
+        self.connecting_sock = sock.dup()
+        if token.cancelled:
+            sock.close()
+            self._close_connecting_sock()
+            raise cancel.TranscriptionCancelled()
+        return sock
+
+    def connect(self):
+        try:
+            super().connect()
+        finally:
+            self._close_connecting_sock()
+
+    def _close_connecting_sock(self):
+        sock, self.connecting_sock = self.connecting_sock, None
+        if sock is not None:
+            sock.close()
+
+
+class _TimedConnectionMixin:
+    """建立连接（DNS 解析、TCP 与 TLS 握手）的耗时记入当前线程的 JobTiming。"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            job_timing = timing.current()
+            if job_timing is not None:
+                job_timing.record("connect", time.perf_counter() - start)
+
+
+class TimedHTTPConnection(_CancellableConnectionMixin, _TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_CancellableConnectionMixin, _TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class CancellableHTTPConnectionPool(_CancellablePoolMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class CancellableHTTPSConnectionPool(_CancellablePoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CancellableHTTPConnectionPool,
+            "https": CancellableHTTPSConnectionPool,
+        }
+
+
+def set_api_url(url):
+    """设置未显式传入 url 的请求使用的接口地址，url 为空时恢复环境变量或默认地址。"""
+    global API_URL
+    API_URL = url or os.environ.get(API_URL_ENV) or DEFAULT_API_URL
+
+
+def create_session(pool_maxsize=POOL_MAXSIZE, connect_retries=CONNECT_RETRIES):
+    """创建带连接池、长连接与连接重试的Session。"""
+    retry = Retry(total=connect_retries, connect=connect_retries, read=0, status=0,
+                  backoff_factor=RETRY_BACKOFF, raise_on_status=False)
+    adapter = CancellableHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize,
+                                     max_retries=retry)
+    session = requests.Session()
+    session.headers["Connection"] = "keep-alive"
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """返回进程内共享的Session，首次调用时创建。"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def close_session():
+    """关闭共享Session及其连接池。"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def post_transcription(token, model_name, file, url=None, timeout=DEFAULT_TIMEOUT, session=None,
+                       progress_callback=None, cancel_token=None, job_timing=None):
+    """向转录接口提交一个音频文件，返回 requests.Response。
+
+    file 可以是已打开的文件对象，也可以是 (文件名, 内容, 类型) 元组。
+    请求体以流的方式分块发送，progress_callback(已发送字节数, 总字节数) 用于报告上传进度。
+    cancel_token 被取消时立即中断上传或等待响应，并抛出 TranscriptionCancelled。
+    传入 job_timing（timing.JobTiming）时记录建立连接、上传、服务端处理与下载的耗时。
+    """
+    session = session or get_session()
+    if not isinstance(file, tuple):
+        file = (os.path.basename(getattr(file, 'name', 'audio')), file, "application/octet-stream")
+    body = MultipartEncoder({'model': model_name}, {'file': file}, progress_callback=progress_callback,
+                            cancel_token=cancel_token)
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": body.content_type
+    }
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+    start = time.perf_counter()
+    try:
+        with cancel.active(cancel_token), timing.active(job_timing):
+            response = session.post(url or API_URL, headers=headers, data=body, timeout=timeout)
+    except requests.RequestException:
+        # 连接被取消操作关闭时会表现为连接错误
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
+        raise
+    if job_timing is not None:
+        # response.elapsed 为发出请求到收到响应头的时间，之后才读取响应内容
+        job_timing.record_request(body, start + response.elapsed.total_seconds(), time.perf_counter())
+    return response
+
+
+def transcribe(token, model_name, file, url=None, timeout=DEFAULT_TIMEOUT, session=None, progress_callback=None,
+               cancel_token=None, job_timing=None):
+    """提交转录请求并返回解析后的 JSON，非 200 响应抛出 TranscriptionError。"""
+    response = post_transcription(token, model_name, file, url=url, timeout=timeout, session=session,
+                                  progress_callback=progress_callback, cancel_token=cancel_token,
+                                  job_timing=job_timing)
+    if response.status_code != 200:
+        raise TranscriptionError(response.status_code, response.text,
+                                 parse_retry_after(response.headers.get("Retry-After")))
+    return response.json()
@@ -0,0 +1,140 @@
+"""基于短时能量与过零率的语音活动检测（VAD），用 NumPy 向量化实现，仅使用 CPU。
+
+去掉较长的静音段后再上传，并记录裁剪后音频与原始音频之间的时间对应关系，
+以便把识别结果的时间戳换算回原始音频。
+"""
+import bisect
+
+from transcriber import audio
+
+FRAME_SECONDS = 0.03
+DEFAULT_MIN_SILENCE_SECONDS = 1.0
+# 语音段前后保留的静音，避免截掉字头字尾
+PADDING_SECONDS = 0.2
+# 以能量的第10百分位作为底噪，高出底噪这么多分贝的帧视为语音
+NOISE_PERCENTILE = 10
+ENERGY_MARGIN_DB = 10.0
+# 能量略低但过零率较高的帧（清辅音）也视为语音
+WEAK_ENERGY_MARGIN_DB = 4.0
+ZCR_THRESHOLD = 0.15
+# 低于该电平（dBFS）的帧一律视为静音，高于 ABSOLUTE_SPEECH_DB 的帧一律视为语音，
+# 后者避免整段持续有声时底噪被估计得过高
+ABSOLUTE_FLOOR_DB = -60.0
+ABSOLUTE_SPEECH_DB = -35.0
+
+
+class OffsetMap:
+    """裁剪后音频与原始音频的时间对应关系。
+
+    spans 中每一项为 (裁剪后起点, 原始起点, 长度)，单位为采样点。
+    """
+
+    def __init__(self, spans, sample_rate, original_length):
+        self.spans = spans
+        self.sample_rate = sample_rate
+        self.original_length = original_length
+        self._starts = [span[0] for span in spans]
+
+    @property
+    def kept_length(self):
+        return sum(span[2] for span in self.spans)
+
+    @property
+    def removed_fraction(self):
+        if not self.original_length:
+            return 0.0
+        return 1.0 - self.kept_length / float(self.original_length)
+
+    def to_original(self, seconds):
+        """把裁剪后音频中的时间（秒）换算为原始音频中的时间。"""
+        position = seconds * self.sample_rate
+        index = max(0, bisect.bisect_right(self._starts, position) - 1)
+        if not self.spans:
+            return seconds
+        kept_start, original_start, length = self.spans[index]
+        offset = min(max(position - kept_start, 0), length)
+        return (original_start + offset) / float(self.sample_rate)
+
+    def to_dict(self):
+        return {"sample_rate": self.sample_rate, "original_length": self.original_length,
+                "spans": [list(span) for span in self.spans]}
+
+
+def _runs(mask):
+    """返回布尔数组中连续为 True 的区间 [(起点, 终点)]。"""
+    np = audio.np
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return [(int(start), int(end)) for start, end in zip(changes[::2], changes[1::2])]
+
+
+def frame_features(samples, frame_length):
+    """逐帧计算能量（dBFS）与过零率，末尾不足一帧的部分被忽略。"""
+    np = audio.np
+    frames = len(samples) // frame_length
+    if frames == 0:
+        return np.zeros(0), np.zeros(0)
+    framed = samples[:frames * frame_length].astype(np.float32).reshape(frames, frame_length) / 32768.0
+    energy_db = 10 * np.log10(np.mean(framed * framed, axis=1) + 1e-10)
+    signs = np.signbit(framed)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy_db, zcr
+
+
+def classify_frames(energy_db, zcr, noise_db):
+    """根据底噪 noise_db 判断各帧是否为语音，返回布尔数组。"""
+    strong = energy_db > min(max(noise_db + ENERGY_MARGIN_DB, ABSOLUTE_FLOOR_DB), ABSOLUTE_SPEECH_DB)
+    weak = (energy_db > max(noise_db + WEAK_ENERGY_MARGIN_DB, ABSOLUTE_FLOOR_DB)) & (zcr > ZCR_THRESHOLD)
+    return strong | weak
+
+
+def speech_frames(samples, frame_length):
+    """逐帧判断是否为语音，返回布尔数组。"""
+    np = audio.np
+    energy_db, zcr = frame_features(samples, frame_length)
+    if not len(energy_db):
+        return np.zeros(0, dtype=bool)
+    return classify_frames(energy_db, zcr, np.percentile(energy_db, NOISE_PERCENTILE))
+
+
+def detect_speech(samples, sample_rate=audio.SAMPLE_RATE, min_silence_seconds=DEFAULT_MIN_SILENCE_SECONDS):
+    """返回需要保留的语音区间 [(起点, 终点)]（采样点），短于 min_silence_seconds 的静音不会被去掉。"""
+    np = audio.np
+    frame_length = int(FRAME_SECONDS * sample_rate)
+    mask = speech_frames(samples, frame_length)
+    if not mask.any():
+        return []
+
+    # 填平短静音
+    min_silence_frames = int(round(min_silence_seconds / FRAME_SECONDS))
+    for start, end in _runs(~mask):
+        if end - start < min_silence_frames and start > 0 and end < len(mask):
+            mask[start:end] = True
+
+    # 语音段前后各扩展 PADDING_SECONDS
+    padding = int(round(PADDING_SECONDS / FRAME_SECONDS))
+    if padding:
+        kernel = np.ones(2 * padding + 1)
+        mask = np.convolve(mask.astype(np.float32), kernel, mode='same') > 0
+
+    regions = [(start * frame_length, min(end * frame_length, len(samples))) for start, end in _runs(mask)]
+    # 最后一帧之后不足一帧的尾部随最后的语音段一起保留
+    if regions and regions[-1][1] == (len(mask) * frame_length):
+        regions[-1] = (regions[-1][0], len(samples))
+    return regions
+
+
+def strip_silence(samples, sample_rate=audio.SAMPLE_RATE, min_silence_seconds=DEFAULT_MIN_SILENCE_SECONDS):
+    """去掉长静音，返回 (裁剪后的采样, OffsetMap)。整段都是静音时返回空数组。"""
+    np = audio.np
+    regions = detect_speech(samples, sample_rate, min_silence_seconds)
+    spans = []
+    kept = 0
+    for start, end in regions:
+        spans.append((kept, start, end - start))
+        kept += end - start
+    if regions:
+        trimmed = np.concatenate([samples[start:end] for start, end in regions])
+    else:
+        trimmed = samples[:0]
+    return trimmed, OffsetMap(spans, sample_rate, len(samples))
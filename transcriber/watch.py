@@ -0,0 +1,134 @@
+"""监视文件夹：新的音频文件写完后自动交给转录流程（可选，需要安装 watchdog）。
+
+通过 watchdog 接收文件系统事件（Linux 上为 inotify，macOS 为 FSEvents，Windows 为 ReadDirectoryChangesW），
+不轮询目录。文件在最后一次事件之后静默 settle_seconds 秒、且相隔 CHECK_INTERVAL 的两次检查大小不变，
+才视为已经写完；收到“写入后关闭”事件（inotify 的 IN_CLOSE_WRITE）时不必等待静默期。
+所有待定文件由一个检查线程统一处理，短时间内涌入数百个文件也不会为每个文件创建线程。
+"""
+import os
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog 为可选依赖
+    FileSystemEventHandler = object
+    Observer = None
+
+from transcriber import core
+
+DEFAULT_SETTLE_SECONDS = 2.0
+CHECK_INTERVAL = 0.5
+
+
+def available():
+    return Observer is not None
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.touch(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.touch(event.src_path)
+
+    def on_moved(self, event):
+        # 录音软件常先写临时文件再改名
+        if not event.is_directory:
+            self.watcher.touch(event.dest_path)
+
+    def on_closed(self, event):
+        if not event.is_directory:
+            self.watcher.touch(event.src_path, closed=True)
+
+
+class _PendingFile:
+    def __init__(self):
+        self.last_event = 0.0
+        self.size = None
+        self.closed = False
+
+
+class FolderWatcher:
+    """监视 directories 中的音频文件，文件写完后在检查线程中调用 on_ready(path)。
+
+    同一文件写完后再次被修改时会重新等待并再次调用 on_ready，是否需要重新转录由调用方决定。
+    """
+
+    def __init__(self, directories, on_ready, settle_seconds=DEFAULT_SETTLE_SECONDS, recursive=True,
+                 extensions=core.AUDIO_EXTENSIONS):
+        if Observer is None:
+            raise RuntimeError("监视文件夹需要先安装 watchdog")
+        self.directories = list(directories)
+        self.on_ready = on_ready
+        self.settle_seconds = settle_seconds
+        self.recursive = recursive
+        self.extensions = tuple(extensions)
+        self._pending = {}  # 路径 -> _PendingFile
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._observer = Observer()
+        self._checker = threading.Thread(target=self._check_loop, name="FolderWatcher", daemon=True)
+
+    def touch(self, path, closed=False):
+        """记录 path 上的一次文件事件。"""
+        if not path.lower().endswith(self.extensions):
+            return
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is None:
+                pending = self._pending[path] = _PendingFile()
+            pending.last_event = time.monotonic()
+            pending.closed = closed
+
+    def start(self):
+        handler = _EventHandler(self)
+        for directory in self.directories:
+            self._observer.schedule(handler, directory, recursive=self.recursive)
+        self._observer.start()
+        self._checker.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._observer.stop()
+        self._observer.join()
+        if self._checker.is_alive():
+            self._checker.join()
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _check_loop(self):
+        while not self._stopped.wait(CHECK_INTERVAL):
+            for path in self._collect_ready():
+                self.on_ready(path)
+
+    def _collect_ready(self):
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, pending in list(self._pending.items()):
+                if not pending.closed and now - pending.last_event < self.settle_seconds:
+                    continue
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    # 文件已被删除或改名，改名后的路径会有单独的事件
+                    del self._pending[path]
+                    continue
+                if size != pending.size:
+                    # 大小仍在变化（或第一次检查），下一轮再确认
+                    pending.size = size
+                    continue
+                del self._pending[path]
+                ready.append(path)
+        return ready